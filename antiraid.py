@@ -0,0 +1,165 @@
+from typing import Dict, List, NamedTuple, Optional
+
+
+# Compteur sur fenêtre glissante
+class SlidingCounter:
+    """Nombre d'événements sur les `window` dernières secondes, par tranches de `resolution` secondes.
+
+    Le tampon circulaire a une taille fixe : ajout et lecture coûtent au
+    plus un tour de tampon, quel que soit le nombre d'événements.
+    """
+
+    __slots__ = ('resolution', 'buckets', 'total', 'position', 'slot')
+
+    def __init__(self, window: float, resolution: float = 1.0):
+        self.resolution = resolution
+        self.buckets = [0] * max(1, int(window / resolution))
+        self.total = 0
+        self.position = 0
+        self.slot = 0  # numéro de la tranche courante (temps // resolution)
+
+    def _advance(self, now: float):
+        slot = int(now // self.resolution)
+        steps = min(slot - self.slot, len(self.buckets))
+        for _ in range(steps):
+            self.position = (self.position + 1) % len(self.buckets)
+            self.total -= self.buckets[self.position]
+            self.buckets[self.position] = 0
+        if slot > self.slot:
+            self.slot = slot
+
+    def add(self, now: float) -> int:
+        self._advance(now)
+        self.buckets[self.position] += 1
+        self.total += 1
+        return self.total
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+class RaidConfig(NamedTuple):
+    enabled: bool = False
+    joins: int = 10              # arrivées dans la fenêtre pour déclencher le mode raid
+    window: float = 10.0         # secondes
+    young_joins: int = 5         # arrivées de comptes récents dans la fenêtre pour déclencher
+    account_age_days: float = 7  # en dessous, le compte est considéré comme récent
+    cooldown: float = 300.0      # le mode raid dure tant qu'un seuil est atteint, plus ce délai
+    auto_timeout: float = 0.0    # minutes de timeout pour les comptes récents en mode raid (0 : désactivé)
+
+
+DEFAULT_CONFIG = RaidConfig()
+
+
+def config_from_settings(settings: Optional[dict]) -> RaidConfig:
+    """Construit la config depuis guild_settings[guild_id].get('antiraid')"""
+    if not settings:
+        return DEFAULT_CONFIG
+    return RaidConfig(**{key: value for key, value in settings.items() if key in RaidConfig._fields})
+
+
+class JoinVerdict(NamedTuple):
+    raid: bool      # le serveur est en mode raid après cette arrivée
+    started: bool   # cette arrivée a déclenché le mode raid
+    young: bool     # compte récent
+
+
+class _GuildState:
+    __slots__ = ('config', 'joins', 'young', 'raid_until', 'raid_joins', 'digest', 'digest_count')
+
+    def __init__(self, config: RaidConfig):
+        self.config = config
+        self.joins = SlidingCounter(config.window)
+        self.young = SlidingCounter(config.window)
+        self.raid_until = 0.0
+        self.raid_joins = 0
+        self.digest: List[str] = []
+        self.digest_count = 0
+
+
+class Digest(NamedTuple):
+    guild_id: int
+    mentions: List[str]   # premières arrivées, dans l'ordre
+    count: int            # total des arrivées depuis le dernier résumé
+
+
+# Détection des raids
+class RaidDetector:
+    """Détecte les vagues d'arrivées par serveur et retient les bienvenues pendant un raid.
+
+    `on_join` est appelé pour chaque arrivée ; en mode raid, les bienvenues
+    passent par `queue_welcome` et sont envoyées en un seul résumé par
+    `take_digests`.
+    """
+
+    def __init__(self, digest_mentions: int = 25):
+        self.digest_mentions = digest_mentions
+        self._guilds: Dict[int, _GuildState] = {}
+
+    def configure(self, guild_id: int, config: RaidConfig):
+        state = self._guilds.get(guild_id)
+        if state is None or state.config != config:
+            new_state = _GuildState(config)
+            if state is not None:
+                new_state.raid_until, new_state.raid_joins = state.raid_until, state.raid_joins
+                new_state.digest, new_state.digest_count = state.digest, state.digest_count
+            self._guilds[guild_id] = new_state
+
+    def _state(self, guild_id: int, config: Optional[RaidConfig]) -> _GuildState:
+        state = self._guilds.get(guild_id)
+        if state is None or (config is not None and state.config != config):
+            self.configure(guild_id, config or DEFAULT_CONFIG)
+            state = self._guilds[guild_id]
+        return state
+
+    def on_join(self, guild_id: int, account_created: float, now: float,
+                config: Optional[RaidConfig] = None) -> JoinVerdict:
+        state = self._state(guild_id, config)
+        config = state.config
+        young = now - account_created < config.account_age_days * 86400
+        joins = state.joins.add(now)
+        young_joins = state.young.add(now) if young else state.young.count(now)
+
+        was_raid = now < state.raid_until
+        # Seules les arrivées au-dessus d'un seuil prolongent le raid : sinon il finit après `cooldown`
+        if joins >= config.joins or young_joins >= config.young_joins:
+            state.raid_until = now + config.cooldown
+        elif not was_raid:
+            return JoinVerdict(False, False, young)
+        state.raid_joins = state.raid_joins + 1 if was_raid else joins
+        return JoinVerdict(True, not was_raid, young)
+
+    def in_raid(self, guild_id: int, now: float) -> bool:
+        state = self._guilds.get(guild_id)
+        return state is not None and now < state.raid_until
+
+    def raid_joins(self, guild_id: int) -> int:
+        state = self._guilds.get(guild_id)
+        return state.raid_joins if state is not None else 0
+
+    def queue_welcome(self, guild_id: int, mention: str):
+        state = self._guilds[guild_id]
+        state.digest_count += 1
+        if len(state.digest) < self.digest_mentions:
+            state.digest.append(mention)
+
+    def take_digests(self) -> List[Digest]:
+        digests = []
+        for guild_id, state in self._guilds.items():
+            if state.digest_count:
+                digests.append(Digest(guild_id, state.digest, state.digest_count))
+                state.digest, state.digest_count = [], 0
+        return digests
+
+    def take_ended(self, now: float) -> List[int]:
+        """Serveurs sortis du mode raid depuis le dernier appel (les états inactifs sont oubliés)"""
+        ended = []
+        for guild_id, state in list(self._guilds.items()):
+            if state.raid_until and now >= state.raid_until and not state.digest_count:
+                ended.append(guild_id)
+                state.raid_until = 0.0
+                state.raid_joins = 0
+            if not state.raid_until and not state.digest_count and state.joins.count(now) == 0:
+                del self._guilds[guild_id]
+        return ended
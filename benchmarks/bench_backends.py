@@ -0,0 +1,99 @@
+"""Comparaison des backends JSON et SQLite
+
+Usage : python -m benchmarks.bench_backends [--rows 1000000] [--guilds 1000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from storage import GuildStore, JsonBackend, SqliteBackend
+
+
+def build_store(rows: int, guilds: int) -> GuildStore:
+    rng = random.Random(0)
+    store = GuildStore()
+    data = {}
+    for i in range(rows):
+        guild_id = str(1_000_000 + i % guilds)
+        user_id = str(10_000_000 + i)
+        xp = rng.randrange(0, 500_000)
+        data.setdefault(guild_id, {})[user_id] = {
+            'xp': xp,
+            'level': 1,
+            'messages_sent': xp // 20,
+            'last_xp_time': None,
+            'total_xp_gained': xp,
+            'join_date': '2024-01-01T00:00:00'
+        }
+    store.load_json(data)
+    return store
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<32} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def touch(store: GuildStore, count: int):
+    rng = random.Random(1)
+    guild_ids = list(store.guild_ids())
+    for _ in range(count):
+        guild_id = rng.choice(guild_ids)
+        user_id = rng.choice(list(store.members(guild_id)))
+        store.add_xp(guild_id, user_id, 20)
+
+
+def run(backend_name, backend, store, sections, rows):
+    print(f"\n{backend_name}")
+    if isinstance(backend, SqliteBackend):
+        # Remplir la base une première fois (équivalent d'une migration)
+        changes = {guild_id: dict(store.members(guild_id)) for guild_id in store.guild_ids()}
+        timed("écriture complète", lambda: backend.write_members(changes))
+    else:
+        stats = timed("écriture complète", lambda: asyncio.run(backend.save(store, sections)))
+        print(f"  {'taille':<32} {stats.bytes / 1e6:10.1f} Mo")
+    store.take_dirty()
+
+    touch(store, rows // 100)
+    stats = timed("sauvegarde incrémentale (1%)", lambda: asyncio.run(backend.save(store, sections)))
+    print(f"  {'dont thread d’écriture':<32} {stats.duration * 1000:10.1f} ms ({stats.records} enregistrements)")
+
+    loaded = timed("chargement", backend.load)
+    guild_id = next(iter(loaded['guild_data']))
+    user_id = next(iter(loaded['guild_data'][guild_id]))
+
+    if isinstance(backend, SqliteBackend):
+        timed("rang x1000 (SQL)", lambda: [backend.rank(guild_id, user_id) for _ in range(1000)])
+        timed("top 10 x1000 (SQL)", lambda: [backend.top(guild_id, 10) for _ in range(1000)])
+    else:
+        index = timed("construction RankIndex", lambda: store.rank_index(guild_id))
+        timed("rang x1000 (RankIndex)", lambda: [index.rank(user_id) for _ in range(1000)])
+        timed("top 10 x1000 (RankIndex)", lambda: [index.top(10) for _ in range(1000)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--guilds', type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"📦 {args.rows:,} lignes membre/serveur sur {args.guilds:,} serveurs")
+    store = build_store(args.rows, args.guilds)
+    sections = {'guild_settings': {}, 'muted_users': {}, 'banned_users': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run("JSON", JsonBackend(os.path.join(tmp, 'bot_data.json')), store, sections, args.rows)
+        sqlite_backend = SqliteBackend(os.path.join(tmp, 'bot_data.db'))
+        try:
+            run("SQLite (WAL)", sqlite_backend, store, sections, args.rows)
+        finally:
+            sqlite_backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Mémoire du cache de discord.py selon le profil (CACHE_PROFILE) : full, lean, minimal
+
+Alimente un ConnectionState de discord.py avec des GUILD_CREATE synthétiques,
+comme après la connexion :
+  - full : tous les membres en cache (chargés au démarrage) avec leurs présences,
+    et les 1000 derniers messages ;
+  - lean : le bot, les membres arrivés depuis la connexion (--joins par serveur),
+    et tous les membres des serveurs où /serverinfo ou /leaderboard a servi (--active) ;
+  - minimal : le bot et les membres arrivés depuis la connexion.
+Le temps de remplissage est mesuré sous tracemalloc (comparaison seulement).
+Nécessite discord.py installé, aucun token.
+
+Usage : python -m benchmarks.bench_cache_profiles [--guilds 200] [--members 2000] [--active 0.1] [--joins 5]
+"""
+import argparse
+import datetime
+import gc
+import random
+import time
+import tracemalloc
+
+from discord.state import ConnectionState
+
+from cache_profiles import PROFILES, make_profile
+
+BOT_ID = 1
+NOW = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def user_payload(user_id: int, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0', 'global_name': f"User {user_id}",
+            'avatar': None, 'bot': bot}
+
+
+def member_payload(user_id: int, rng: random.Random) -> dict:
+    return {'user': user_payload(user_id, bot=rng.random() < 0.02), 'roles': [], 'joined_at': NOW,
+            'deaf': False, 'mute': False, 'nick': None, 'flags': 0}
+
+
+def presence_payload(user_id: int, rng: random.Random) -> dict:
+    status = rng.choice(('online', 'idle', 'dnd', 'offline'))
+    activities = [{'name': 'Minecraft', 'type': 0, 'created_at': 0}] if rng.random() < 0.3 else []
+    return {'user': {'id': str(user_id)}, 'status': status, 'activities': activities, 'client_status': {'desktop': status}}
+
+
+def guild_payload(guild_id: int, member_ids, presences: bool, rng: random.Random, member_count: int) -> dict:
+    members = [member_payload(user_id, rng) for user_id in member_ids]
+    return {
+        'id': str(guild_id), 'name': f"Serveur {guild_id}", 'owner_id': str(BOT_ID), 'member_count': member_count,
+        'large': member_count > 250, 'features': [], 'verification_level': 1, 'emojis': [], 'stickers': [],
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                   'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(guild_id * 100 + i), 'type': 0, 'name': f"salon-{i}", 'position': i,
+                      'permission_overwrites': [], 'nsfw': False} for i in range(10)],
+        'members': members,
+        'presences': [presence_payload(int(m['user']['id']), rng) for m in members] if presences else [],
+        'voice_states': [], 'threads': [], 'stage_instances': [], 'guild_scheduled_events': []
+    }
+
+
+def message_payload(message_id: int, guild_id: int, user_id: int, rng: random.Random) -> dict:
+    return {
+        'id': str(message_id), 'channel_id': str(guild_id * 100 + rng.randrange(10)), 'guild_id': str(guild_id),
+        'author': user_payload(user_id), 'member': {'roles': [], 'joined_at': NOW, 'deaf': False, 'mute': False, 'flags': 0},
+        'content': "salut tout le monde, quelqu'un pour une partie ce soir ?", 'timestamp': NOW, 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [],
+        'pinned': False, 'type': 0, 'flags': 0
+    }
+
+
+def fill(profile_name: str, args):
+    profile = make_profile(profile_name)
+    state = ConnectionState(
+        dispatch=lambda *a, **kw: None, handlers={}, hooks={}, http=None,
+        intents=profile.intents, member_cache_flags=profile.member_cache_flags,
+        chunk_guilds_at_startup=False,  # Le chargement au démarrage est simulé par le contenu des GUILD_CREATE
+        max_messages=profile.max_messages
+    )
+    rng = random.Random(0)
+    active = set(rng.sample(range(args.guilds), int(args.guilds * args.active)))
+    for g in range(args.guilds):
+        guild_id = 10_000 + g
+        all_ids = [guild_id * 1_000_000 + i for i in range(args.members)]
+        if profile.chunk_guilds_at_startup or (profile.chunk_on_demand and g in active):
+            member_ids = all_ids
+        else:
+            member_ids = all_ids[-args.joins:]
+        state.parse_guild_create(guild_payload(guild_id, [BOT_ID, *member_ids], profile.intents.presences, rng, args.members + 1))
+    for i in range(args.messages):
+        guild_id = 10_000 + rng.randrange(args.guilds)
+        state.parse_message_create(message_payload(10 ** 17 + i, guild_id, guild_id * 1_000_000 + rng.randrange(args.members), rng))
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guilds', type=int, default=200)
+    parser.add_argument('--members', type=int, default=2_000, help="membres par serveur")
+    parser.add_argument('--active', type=float, default=0.1, help="part des serveurs chargés à la demande (lean)")
+    parser.add_argument('--joins', type=int, default=5, help="arrivées par serveur depuis la connexion")
+    parser.add_argument('--messages', type=int, default=5_000, help="messages reçus")
+    args = parser.parse_args()
+
+    print(f"{args.guilds} serveur(s) × {args.members:,} membres, {args.messages:,} messages")
+    print(f"{'profil':<10} {'membres':>10} {'utilisateurs':>13} {'messages':>9} {'mémoire':>10} {'temps':>8}")
+    for name in PROFILES:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        state = fill(name, args)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        members = sum(len(guild._members) for guild in state._guilds.values())
+        messages = len(state._messages) if state._messages is not None else 0
+        print(f"{name:<10} {members:>10,} {len(state._users):>13,} {messages:>9,} {current / 1024 ** 2:>6.1f} Mio {elapsed:>6.2f} s")
+        del state
+
+
+if __name__ == "__main__":
+    main()
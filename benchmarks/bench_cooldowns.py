@@ -0,0 +1,62 @@
+"""Coût par message du cooldown d'XP : ancien format ISO contre CooldownTable
+
+Usage : python -m benchmarks.bench_cooldowns [--messages 500000] [--users 5000]
+"""
+import argparse
+import datetime
+import random
+import time
+
+from cooldowns import CooldownTable
+
+
+def old_cooldown(records, events):
+    """Ancien chemin de on_message : parse ISO, comparaison, écriture d'une nouvelle chaîne"""
+    granted = 0
+    for guild_id, user_id in events:
+        data = records[str(guild_id)][str(user_id)]
+        now = datetime.datetime.now()
+        last_xp_time = data.get('last_xp_time')
+        if last_xp_time:
+            last_time = datetime.datetime.fromisoformat(last_xp_time)
+            if (now - last_time).total_seconds() < 60:
+                continue
+        data['last_xp_time'] = now.isoformat()
+        granted += 1
+    return granted
+
+
+def new_cooldown(table, events):
+    granted = 0
+    for guild_id, user_id in events:
+        if table.try_acquire(guild_id, user_id, time.time()):
+            granted += 1
+    return granted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=500_000)
+    parser.add_argument('--users', type=int, default=5_000)
+    parser.add_argument('--guilds', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    events = [(rng.randrange(args.guilds), rng.randrange(args.users)) for _ in range(args.messages)]
+    records = {str(g): {str(u): {'last_xp_time': None} for u in range(args.users)} for g in range(args.guilds)}
+    table = CooldownTable(60)
+
+    for name, fn in (("ISO (ancien)", lambda: old_cooldown(records, events)),
+                     ("CooldownTable", lambda: new_cooldown(table, events))):
+        start = time.perf_counter()
+        granted = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<15} {elapsed / len(events) * 1e9:8.1f} ns/message ({granted:,} gains d'XP)")
+
+    start = time.perf_counter()
+    evicted = table.evict(time.time() + 61)
+    print(f"{'éviction':<15} {(time.perf_counter() - start) * 1000:8.1f} ms pour {evicted:,} entrées")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Coût de construction des embeds par commande : code d'origine contre embeds.py (partagés ou construits directement)
+
+Usage : python -m benchmarks.bench_embeds [--number 20000] [--repeat 5]
+"""
+import argparse
+import datetime
+import timeit
+
+import discord
+
+import embeds
+
+REASON = "Spam dans #général"
+AVATAR = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+# Anciennes constructions (copiées des commandes avant embeds.py)
+def old_permission():
+    return discord.Embed(
+        title="❌ Permission manquante",
+        description="Vous n'avez pas la permission de bannir des membres.",
+        color=0xff0000
+    )
+
+def old_help():
+    embed = discord.Embed(
+        title="📚 Commandes disponibles",
+        description="Voici toutes les commandes disponibles du bot:",
+        color=0x3498db
+    )
+    for category, commands in embeds.HELP_CATEGORIES:
+        embed.add_field(name=category, value=commands, inline=False)
+    embed.set_footer(text="MultiGame Bot")
+    embed.set_thumbnail(url=AVATAR)
+    return embed
+
+def old_tempban():
+    until = int(datetime.datetime.now().timestamp())
+    embed = discord.Embed(
+        title="⏰ Bannissement temporaire",
+        description="**Raider#0001** a été banni temporairement",
+        color=0xff9900
+    )
+    embed.add_field(name="👤 Utilisateur", value="<@1> (`1`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value="<@2>", inline=True)
+    embed.add_field(name="⏱️ Durée", value="1d", inline=True)
+    embed.add_field(name="🔚 Fin du ban", value=f"<t:{until}:F>", inline=True)
+    embed.add_field(name="📝 Raison", value=REASON, inline=False)
+    embed.set_thumbnail(url=AVATAR)
+    return embed
+
+def old_warn():
+    embed = discord.Embed(
+        title="⚠️ Avertissement donné",
+        description="**Raider** a reçu un avertissement",
+        color=0xff9900
+    )
+    embed.add_field(name="👤 Utilisateur", value="<@1> (`1`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value="<@2>", inline=True)
+    embed.add_field(name="🔢 Total d'avertissements", value="**3**", inline=True)
+    embed.add_field(name="📝 Raison", value=REASON, inline=False)
+    embed.set_thumbnail(url=AVATAR)
+    embed.timestamp = datetime.datetime.now()
+    return embed
+
+
+# Nouvelles constructions
+def new_permission():
+    return embeds.STATIC['missing_ban_members']
+
+def new_help():
+    return embeds.help_embed(AVATAR)
+
+def new_tempban():
+    return embeds.tempban(
+        user="Raider#0001", mention="<@1>", user_id=1, moderator="<@2>",
+        duration="1d", until=int(datetime.datetime.now().timestamp()), reason=REASON, thumbnail=AVATAR
+    )
+
+def new_warn():
+    return embeds.warn(
+        user="Raider", mention="<@1>", user_id=1, moderator="<@2>", count=3, reason=REASON,
+        thumbnail=AVATAR, timestamp=datetime.datetime.now()
+    )
+
+
+CASES = [
+    ("permission manquante", old_permission, new_permission),
+    ("/help", old_help, new_help),
+    ("/tempban", old_tempban, new_tempban),
+    ("/warn", old_warn, new_warn),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # L'envoi sérialise l'embed avec to_dict : on le compte dans le coût
+    print(f"{'commande':<22} {'avant':>10} {'après':>10}")
+    for name, old, new in CASES:
+        expected, actual = old().to_dict(), new().to_dict()
+        expected.pop('timestamp', None)
+        actual.pop('timestamp', None)
+        assert expected == actual, name
+        # Meilleur de --repeat séries : le moins perturbé par le reste de la machine
+        before = min(timeit.repeat(lambda: old().to_dict(), number=args.number, repeat=args.repeat)) / args.number * 1e6
+        after = min(timeit.repeat(lambda: new().to_dict(), number=args.number, repeat=args.repeat)) / args.number * 1e6
+        print(f"{name:<22} {before:8.2f} µs {after:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Vérification et micro-benchmark du calcul de niveau
+
+Usage : python -m benchmarks.bench_levels
+"""
+import random
+import timeit
+
+from levels import DEFAULT_CURVE, LevelCurve, TableCurve
+
+
+# Anciennes implémentations (boucles), servant de référence
+def reference_level(xp):
+    level = 0
+    xp_needed = 0
+    while xp_needed <= xp:
+        level += 1
+        xp_needed += level * 100
+    return max(1, level - 1)
+
+def reference_xp_for_level(level):
+    total = 0
+    for i in range(1, level + 1):
+        total += i * 100
+    return total
+
+
+def check_properties(samples=200_000):
+    """Compare la formule directe à la référence (bornes des seuils + XP aléatoire)"""
+    rng = random.Random(0)
+    table = TableCurve(threshold_fn=DEFAULT_CURVE.xp_for_level, size=16)
+
+    values = list(range(-10, 20_000))
+    for level in range(0, 600):
+        threshold = reference_xp_for_level(level)
+        values.extend((threshold - 1, threshold, threshold + 1))
+    values.extend(rng.randrange(0, 50_000_000) for _ in range(samples))
+
+    for xp in values:
+        expected = reference_level(xp)
+        assert DEFAULT_CURVE.level(xp) == expected, xp
+        assert table.level(xp) == expected, xp
+    for level in range(-5, 2_000):
+        assert DEFAULT_CURVE.xp_for_level(level) == reference_xp_for_level(level), level
+        assert table.xp_for_level(level) == reference_xp_for_level(level), level
+
+    # Autres pas : la formule directe doit rester égale à la table
+    for step in (1, 3, 50, 150, 1_000):
+        curve = LevelCurve(step)
+        custom = TableCurve(threshold_fn=curve.xp_for_level)
+        for xp in rng.sample(range(0, 10_000_000), 20_000):
+            assert curve.level(xp) == custom.level(xp), (step, xp)
+    print(f"✅ {len(values):,} valeurs vérifiées")
+
+
+def bench(number=20_000):
+    rng = random.Random(1)
+    xps = [rng.randrange(0, 2_000_000) for _ in range(200)]
+    table = TableCurve(threshold_fn=DEFAULT_CURVE.xp_for_level)
+    cases = [
+        ("boucle (ancienne)", lambda: [reference_level(xp) for xp in xps]),
+        ("formule directe", lambda: [DEFAULT_CURVE.level(xp) for xp in xps]),
+        ("table + bisect", lambda: [table.level(xp) for xp in xps]),
+    ]
+    for name, fn in cases:
+        seconds = timeit.timeit(fn, number=number // 100)
+        per_call = seconds / (number // 100 * len(xps)) * 1e9
+        print(f"{name:<20} {per_call:8.1f} ns/appel")
+
+
+if __name__ == "__main__":
+    check_properties()
+    bench()
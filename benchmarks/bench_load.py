@@ -0,0 +1,173 @@
+"""Test de charge hors ligne de bot.py avec de faux objets Discord
+
+Rejoue un trafic synthétique (messages, arrivées, commandes slash) sur les
+handlers réels, sans connexion à Discord, et rapporte la latence des
+handlers (p50/p99), le retard de la boucle d'événements et la mémoire.
+Nécessite discord.py installé (bot.py l'importe), mais aucun token.
+
+Usage : python -m benchmarks.bench_load [--guilds 50] [--users 2000] [--rate 500]
+                                        [--duration 20] [--joins 5] [--commands 20]
+                                        [--api-latency 0.02] [--tracemalloc]
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks import fake_discord
+
+WORDS = "salut ça va quelqu'un pour une partie ce soir gg bien joué lol ok merci".split()
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+class Recorder:
+    """Durée de chaque appel de handler, par nom"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.tasks = set()
+
+    async def _run(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            if not self.errors[name]:
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+            self.errors[name] += 1
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+    def spawn(self, name: str, coro):
+        # discord.py lance chaque événement dans sa propre tâche : on fait pareil
+        task = asyncio.create_task(self._run(name, coro))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+async def sample_loop_lag(lags, interval: float = 0.05):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def drive(bot_module, args):
+    rng = random.Random(0)
+    # Sans compte connecté, bot.process_commands échoue dans get_context
+    bot_module.bot._connection.user = fake_discord.ClientUser(1)
+    chunked = bot_module.cache_profile.chunk_guilds_at_startup
+    guilds = [fake_discord.Guild(g + 1, args.users, rng, chunked) for g in range(args.guilds)]
+    for guild in guilds[::2]:
+        # Un serveur sur deux a un salon de bienvenue
+        bot_module.guild_settings.setdefault(str(guild.id), {})['welcome_channel'] = guild.channels[0].id
+    members = [[m for m in guild.all_members if not m.bot] for guild in guilds]
+
+    recorder = Recorder()
+    lags = []
+    lag_task = asyncio.create_task(sample_loop_lag(lags))
+    bot_module.xp_pipeline.start()
+    bot_module.punishment_scheduler.start()
+
+    commands = [
+        ('rank', lambda i: bot_module.rank_slash.callback(i, None)),
+        ('leaderboard', lambda i: bot_module.leaderboard_slash.callback(i, 1)),
+        ('profile', lambda i: bot_module.profile_slash.callback(i, None)),
+        ('serverinfo', lambda i: bot_module.serverinfo_slash.callback(i)),
+    ]
+
+    sent = {'message': 0, 'join': 0, 'command': 0}
+    rates = {'message': args.rate, 'join': args.joins, 'command': args.commands}
+    next_id = 10 ** 15
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < args.duration:
+        for kind, rate in rates.items():
+            due = int(rate * elapsed) - sent[kind]
+            for _ in range(due):
+                sent[kind] += 1
+                g = rng.randrange(len(guilds))
+                guild = guilds[g]
+                if kind == 'message':
+                    author = rng.choice(members[g])
+                    next_id += 1
+                    message = fake_discord.Message(next_id, author, rng.choice(guild.channels), " ".join(rng.choices(WORDS, k=5)))
+                    recorder.spawn('on_message', bot_module.on_message(message))
+                elif kind == 'join':
+                    next_id += 1
+                    member = guild.add_member(next_id, account_age=rng.uniform(0, 60) * 86400)
+                    members[g].append(member)
+                    recorder.spawn('on_member_join', bot_module.on_member_join(member))
+                else:
+                    name, callback = rng.choice(commands)
+                    interaction = fake_discord.Interaction(rng.choice(members[g]))
+                    recorder.spawn(f'/{name}', callback(interaction))
+        await asyncio.sleep(0.005)
+
+    await asyncio.gather(*list(recorder.tasks))
+    # Laisser la file d'XP et les notifications se vider
+    while bot_module.xp_pipeline.depth:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(bot_module.level_up_dispatcher.window + 0.1)
+    bot_module.xp_pipeline.stop()
+    bot_module.punishment_scheduler.stop()
+    lag_task.cancel()
+    return recorder, lags, sent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--users', type=int, default=2_000, help="membres par serveur")
+    parser.add_argument('--rate', type=float, default=500, help="messages par seconde")
+    parser.add_argument('--duration', type=float, default=20, help="secondes de trafic")
+    parser.add_argument('--joins', type=float, default=5, help="arrivées par seconde")
+    parser.add_argument('--commands', type=float, default=20, help="commandes slash par seconde")
+    parser.add_argument('--api-latency', type=float, default=0.02, help="latence simulée des appels à Discord (s)")
+    parser.add_argument('--tracemalloc', action='store_true', help="mesure fine de la mémoire (ralentit tout)")
+    args = parser.parse_args()
+
+    # Aucune donnée réelle ne doit être lue ni écrite
+    os.chdir(tempfile.mkdtemp(prefix="bench_load_"))
+    os.environ['STORAGE_BACKEND'] = 'json'
+    fake_discord.api_latency = args.api_latency
+    import bot as bot_module
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    recorder, lags, sent = asyncio.run(drive(bot_module, args))
+
+    print(f"{args.guilds} serveur(s) × {args.users:,} membres, {args.duration:g} s de trafic, "
+          f"latence API simulée {args.api_latency * 1000:g} ms")
+    print(f"envoyés: {sent['message']:,} messages, {sent['join']:,} arrivées, {sent['command']:,} commandes")
+    print(f"\n{'handler':<16} {'appels':>8} {'p50':>9} {'p99':>9} {'max':>9} {'erreurs':>8}")
+    for name, samples in sorted(recorder.samples.items()):
+        print(f"{name:<16} {len(samples):>8,} {percentile(samples, 0.5) * 1000:>6.2f} ms "
+              f"{percentile(samples, 0.99) * 1000:>6.2f} ms {max(samples) * 1000:>6.2f} ms {recorder.errors[name]:>8}")
+    print(f"\nretard de boucle  p50 {percentile(lags, 0.5) * 1000:.2f} ms, p99 {percentile(lags, 0.99) * 1000:.2f} ms, "
+          f"max {max(lags, default=0) * 1000:.2f} ms")
+
+    pipeline = bot_module.xp_pipeline.stats()
+    print(f"file d'XP         {pipeline['processed']:,} traités, {pipeline['coalesced']:,} fusionnés, "
+          f"{pipeline['dropped']:,} perdus, retard max {pipeline['max_lag'] * 1000:.1f} ms")
+    print(f"level ups         {bot_module.level_up_dispatcher.submitted:,} soumis, {bot_module.level_up_dispatcher.sent:,} envois")
+    print(f"appels API        {dict(fake_discord.calls)}")
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"mémoire           RSS max {rss:.0f} Mio, {len(bot_module.user_store):,} fiche(s) membre")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"                  tracemalloc {current / 1024 ** 2:.1f} Mio (pic {peak / 1024 ** 2:.1f} Mio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Mémoire des fiches membres : dicts du format sauvegardé contre UserRecord
+
+La mémoire comprend les ids et les dates (chaînes ISO) dans les deux cas.
+
+Usage : python -m benchmarks.bench_records [--sizes 100000 1000000]
+"""
+import argparse
+import datetime
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from records import UserRecord
+
+
+def saved_records(count: int, seed: int = 0):
+    """Fiches au format sauvegardé (dates ISO), comme lues depuis bot_data.json"""
+    rng = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1)
+    for _ in range(count):
+        xp = rng.randrange(20, 200_000)
+        yield {
+            'xp': xp,
+            'level': rng.randrange(1, 60),
+            'messages_sent': xp // 20,
+            'last_xp_time': (base + datetime.timedelta(seconds=rng.randrange(30_000_000))).isoformat(),
+            'total_xp_gained': xp,
+            'join_date': (base + datetime.timedelta(seconds=rng.randrange(30_000_000))).isoformat()
+        }
+
+
+def measure(build):
+    """Mémoire retenue (octets) et durée de construction"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'fiches':>10} {'dict':>10} {'UserRecord':>12} {'gain':>6} {'conversion':>12} {'retour':>12}")
+    for size in args.sizes:
+        # Table d'un serveur telle que sauvegardée ; la mesure part du JSON, comme au chargement
+        payload = json.dumps({str(100_000_000_000_000_000 + i): data for i, data in enumerate(saved_records(size))})
+
+        dicts, dict_bytes, _ = measure(lambda: json.loads(payload))
+        del dicts
+        compact, compact_bytes, _ = measure(
+            lambda: {user_id: UserRecord.from_dict(data) for user_id, data in json.loads(payload).items()}
+        )
+
+        # Conversion seule, depuis des dicts déjà décodés
+        loaded = json.loads(payload)
+        start = time.perf_counter()
+        compact = {user_id: UserRecord.from_dict(data) for user_id, data in loaded.items()}
+        to_record = (time.perf_counter() - start) / size
+        start = time.perf_counter()
+        saved = {user_id: record.to_dict() for user_id, record in compact.items()}
+        to_dict = (time.perf_counter() - start) / size
+        assert saved == loaded
+        del loaded, compact, saved
+
+        print(f"{size:>10,} {dict_bytes / size:>6.0f} o/f {compact_bytes / size:>8.0f} o/f "
+              f"{dict_bytes / compact_bytes:>5.2f}x {to_record * 1e9:>8.0f} ns/f {to_dict * 1e9:>8.0f} ns/f")
+
+
+if __name__ == "__main__":
+    main()
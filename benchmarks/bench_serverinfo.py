@@ -0,0 +1,76 @@
+"""Coût des statistiques de /serverinfo : parcours complets contre compteurs incrémentaux
+
+Usage : python -m benchmarks.bench_serverinfo [--members 1000 100000] [--number 200]
+"""
+import argparse
+import random
+import timeit
+
+from guild_stats import GuildStats
+from storage import GuildStore
+
+
+class Member:
+    __slots__ = ('id', 'bot')
+
+    def __init__(self, member_id: int, bot: bool):
+        self.id = member_id
+        self.bot = bot
+
+
+class TextChannel:
+    pass
+
+
+class VoiceChannel:
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--members', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'membres':>10} {'parcours':>12} {'compteurs':>12} {'reconstruction':>15}")
+    for size in args.members:
+        rng = random.Random(0)
+        members = [Member(i, rng.random() < 0.02) for i in range(size)]
+        channels = [TextChannel() if rng.random() < 0.7 else VoiceChannel() for _ in range(200)]
+        store = GuildStore()
+        for i in range(size // 2):
+            store.add_xp('1', str(i), rng.randint(15, 5000))
+
+        # Ancienne version de la commande : deux parcours des membres, deux des salons, deux des fiches
+        def scan():
+            humans = len([m for m in members if not m.bot])
+            bots = len([m for m in members if m.bot])
+            text = len([c for c in channels if isinstance(c, TextChannel)])
+            voice = len([c for c in channels if isinstance(c, VoiceChannel)])
+            records = store.members('1')
+            return humans, bots, text, voice, len(records), sum(data['xp'] for data in records.values())
+
+        stats = GuildStats()
+
+        def rebuild():
+            kinds = ['text' if isinstance(c, TextChannel) else 'voice' for c in channels]
+            stats.rebuild_channels(1, kinds.count('text'), kinds.count('voice'))
+            bots = sum(1 for m in members if m.bot)
+            stats.rebuild_members(1, len(members) - bots, bots)
+            store.rebuild_totals('1')
+
+        def counters():
+            counts = stats.get(1)
+            registered, total_xp = store.totals('1')
+            return counts.humans, counts.bots, counts.text_channels, counts.voice_channels, registered, total_xp
+
+        rebuild()
+        assert scan() == counters()
+        before = timeit.timeit(scan, number=args.number) / args.number * 1e6
+        after = timeit.timeit(counters, number=args.number * 100) / (args.number * 100) * 1e6
+        rebuilt = timeit.timeit(rebuild, number=args.number) / args.number * 1e6
+        print(f"{size:>10,} {before:>9.1f} µs {after:>9.2f} µs {rebuilt:>12.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
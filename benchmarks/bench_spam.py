@@ -0,0 +1,81 @@
+"""Rejeu de flux de messages synthétiques dans le détecteur de spam
+
+Mesure le coût par message, la mémoire du détecteur et la précision sur
+un mélange de membres normaux, de flooders et de spammeurs de copier-coller.
+
+Usage : python -m benchmarks.bench_spam [--messages 1000000] [--users 100000] [--max-users 50000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from spam import SpamConfig, SpamDetector
+
+CONFIG = SpamConfig(enabled=True)
+WORDS = "salut ça va quelqu'un pour une partie ce soir gg bien joué lol ok merci".split()
+
+
+def synthetic_stream(messages: int, users: int, guilds: int, spammers: int, seed: int = 0):
+    """(serveur, membre, contenu, horodatage, spammeur?) sur un débit global de 200 messages/s"""
+    rng = random.Random(seed)
+    stream = []
+    now = 0.0
+    bad = set(rng.sample(range(users), spammers))
+    while len(stream) < messages:
+        now += rng.expovariate(200)
+        user = rng.randrange(users)
+        guild = user % guilds
+        if user in bad and rng.random() < 0.5:
+            # Rafale : flood de messages variés ou copier-coller
+            burst = rng.randrange(8, 15)
+            text = "🎁 Nitro gratuit sur discord-gift.example" if user % 2 else None
+            for i in range(burst):
+                content = text or " ".join(rng.choices(WORDS, k=4)) + f" {i}"
+                stream.append((guild, user, content, now + i * 0.3, True))
+        else:
+            stream.append((guild, user, " ".join(rng.choices(WORDS, k=rng.randrange(1, 8))), now, False))
+    stream.sort(key=lambda event: event[3])
+    return stream[:messages]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--spammers', type=int, default=200)
+    parser.add_argument('--max-users', type=int, default=50_000)
+    args = parser.parse_args()
+
+    stream = synthetic_stream(args.messages, args.users, args.guilds, args.spammers)
+    duration = stream[-1][3] - stream[0][3]
+    print(f"{len(stream):,} messages sur {duration / 60:.1f} min simulées, {args.spammers} spammeur(s)")
+
+    detector = SpamDetector(max_users=args.max_users)
+    flagged_bad, flagged_good = set(), set()
+    check = detector.check
+    start = time.perf_counter()
+    for guild, user, content, timestamp, is_spam in stream:
+        if check(guild, user, content, timestamp, CONFIG) is not None:
+            (flagged_bad if is_spam else flagged_good).add(user)
+    elapsed = time.perf_counter() - start
+
+    # Second passage pour la mémoire : tracemalloc fausserait la mesure du temps
+    tracemalloc.start()
+    replay = SpamDetector(max_users=args.max_users)
+    for guild, user, content, timestamp, _ in stream:
+        replay.check(guild, user, content, timestamp, CONFIG)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    spammers = {user for _, user, _, _, is_spam in stream if is_spam}
+    print(f"coût           {elapsed / len(stream) * 1e9:8.1f} ns/message")
+    print(f"mémoire        {current / 1024 ** 2:8.1f} Mio ({len(detector):,} membres suivis, pic {peak / 1024 ** 2:.1f} Mio)")
+    print(f"évictions LRU  {detector.evicted:8,}")
+    print(f"détectés       {len(flagged_bad):8,} / {len(spammers):,} spammeurs")
+    print(f"faux positifs  {len(flagged_good - flagged_bad):8,}")
+
+
+if __name__ == "__main__":
+    main()
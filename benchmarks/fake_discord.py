@@ -0,0 +1,232 @@
+"""Faux objets Discord pour faire tourner les handlers de bot.py sans connexion
+
+Seuls les attributs et méthodes utilisés par bot.py sont fournis. Chaque
+appel « réseau » (send, defer, ban...) attend `api_latency` secondes pour
+reproduire l'entrelacement réel des tâches, et est compté dans `calls`.
+"""
+import asyncio
+import datetime
+import random
+from collections import Counter
+from typing import Dict, List, Optional
+
+calls: Counter = Counter()
+api_latency = 0.0
+
+
+async def api_call(name: str):
+    calls[name] += 1
+    if api_latency:
+        await asyncio.sleep(api_latency)
+
+
+class Asset:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class Permissions:
+    """Toutes les permissions, ou aucune"""
+
+    def __init__(self, value: bool):
+        self._value = value
+
+    def __getattr__(self, name):
+        return self._value
+
+
+class Role:
+    def __init__(self, position: int):
+        self.position = position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    def __le__(self, other):
+        return self.position <= other.position
+
+    def __gt__(self, other):
+        return self.position > other.position
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+
+class Messageable:
+    async def send(self, *args, **kwargs):
+        await api_call('send')
+
+
+class Member(Messageable):
+    def __init__(self, guild: "Guild", member_id: int, bot: bool = False, admin: bool = False,
+                 account_age: float = 365 * 86400, joined: Optional[datetime.datetime] = None):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.guild = guild
+        self.id = member_id
+        self.name = f"user{member_id}"
+        self.display_name = self.name
+        self.mention = f"<@{member_id}>"
+        self.bot = bot
+        self.display_avatar = Asset(f"https://cdn.discordapp.com/embed/avatars/{member_id % 5}.png")
+        self.created_at = now - datetime.timedelta(seconds=account_age)
+        self.joined_at = joined or now - datetime.timedelta(days=30)
+        self.top_role = Role(10 if admin else 1)
+        self.guild_permissions = Permissions(admin)
+
+    def __str__(self):
+        return self.name
+
+    async def timeout(self, until=None, reason=None):
+        await api_call('timeout')
+
+    async def ban(self, reason=None):
+        await api_call('ban')
+
+
+class ClientUser:
+    """Compte du bot (bot.user), lu par commands.Bot.get_context"""
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = "bot"
+        self.mention = f"<@{user_id}>"
+        self.bot = True
+        self.display_avatar = Asset("https://cdn.discordapp.com/embed/avatars/0.png")
+
+    def __str__(self):
+        return self.name
+
+
+class TextChannel(Messageable):
+    def __init__(self, guild: "Guild", channel_id: int):
+        self.guild = guild
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+
+
+class Guild:
+    """Non chargé (chunked=False) : seuls le bot et les arrivées sont en cache (profils lean/minimal)"""
+
+    def __init__(self, guild_id: int, members: int, rng: random.Random, chunked: bool = True):
+        self.id = guild_id
+        self.name = f"Serveur {guild_id}"
+        self.icon = None
+        self.created_at = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        self.verification_level = "low"
+        self.premium_tier = 0
+        self.premium_subscription_count = 0
+        self.roles: List[Role] = [Role(0), Role(1), Role(10)]
+        self.emojis: list = []
+        self.categories: list = []
+        self.channels: List[TextChannel] = [TextChannel(self, guild_id * 100 + i) for i in range(5)]
+        self._channels: Dict[int, TextChannel] = {channel.id: channel for channel in self.channels}
+        self._members: Dict[int, Member] = {}  # Tous les membres, côté Discord
+        self._cache: Dict[int, Member] = {}  # Ceux que voit guild.get_member
+        self.chunked = True
+        self.me = self.add_member(guild_id * 1_000_000, bot=True, admin=True)
+        self.owner = self.add_member(guild_id * 1_000_000 + 1, admin=True)
+        self.owner_id = self.owner.id
+        for i in range(members):
+            self.add_member(guild_id * 1_000_000 + 2 + i, bot=rng.random() < 0.02)
+        if not chunked:
+            self.chunked = False
+            self._cache = {self.me.id: self.me}
+
+    @property
+    def members(self) -> List[Member]:
+        return list(self._cache.values())
+
+    @property
+    def all_members(self) -> List[Member]:
+        """Auteurs possibles des messages, en cache ou non"""
+        return list(self._members.values())
+
+    @property
+    def member_count(self) -> int:
+        return len(self._members)
+
+    def add_member(self, member_id: int, **kwargs) -> Member:
+        # Les arrivées sont toujours en cache (MemberCacheFlags.joined)
+        member = self._members[member_id] = self._cache[member_id] = Member(self, member_id, **kwargs)
+        return member
+
+    def get_member(self, member_id: int) -> Optional[Member]:
+        return self._cache.get(member_id)
+
+    async def fetch_member(self, member_id: int) -> Member:
+        await api_call('fetch_member')
+        return self._members[member_id]
+
+    async def chunk(self, *, cache: bool = True) -> List[Member]:
+        await api_call('chunk')
+        if cache:
+            self._cache = dict(self._members)
+            self.chunked = True
+        return list(self._members.values())
+
+    async def query_members(self, *, user_ids: List[int], cache: bool = True) -> List[Member]:
+        await api_call('query_members')
+        found = [self._members[user_id] for user_id in user_ids if user_id in self._members]
+        if cache:
+            self._cache.update((member.id, member) for member in found)
+        return found
+
+    def get_channel(self, channel_id: int) -> Optional[TextChannel]:
+        return self._channels.get(channel_id)
+
+    async def ban(self, user, reason=None):
+        await api_call('ban')
+
+
+class Message:
+    _state = None  # lu par commands.Context
+
+    def __init__(self, message_id: int, author: Member, channel: TextChannel, content: str):
+        self.id = message_id
+        self.author = author
+        self.guild = author.guild
+        self.channel = channel
+        self.content = content
+        self.attachments: list = []
+
+    async def delete(self):
+        await api_call('delete')
+
+
+class InteractionResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+        await api_call('response')
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+        await api_call('defer')
+
+    async def edit_message(self, *args, **kwargs):
+        self._done = True
+        await api_call('edit')
+
+
+class Webhook:
+    async def send(self, *args, **kwargs):
+        await api_call('followup')
+
+
+class Interaction:
+    def __init__(self, user: Member):
+        self.user = user
+        self.guild = user.guild
+        self.response = InteractionResponse()
+        self.followup = Webhook()
+
+    async def edit_original_response(self, **kwargs):
+        await api_call('edit')
+
+    async def delete_original_response(self):
+        await api_call('delete')
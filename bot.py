@@ -1,99 +1,216 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import json
 import random
 import asyncio
 import datetime
-from typing import Dict, List, Optional
+import time
+import re
+from typing import Optional
 from dotenv import load_dotenv  # <-- très important
 import os
 
+from antiraid import RaidDetector, config_from_settings
+from cache_profiles import MemberLRU, make_profile
+from cooldowns import CooldownTable
+from guild_stats import GuildStats
+import embeds
+from levels import DEFAULT_CURVE, curve_from_settings
+from metrics import Metrics, serve_prometheus, write_text
+from moderation import StepTimings, after, run_bulk, timed
+from notifications import LevelUpDispatcher
+from punishments import ExpiryScheduler, PunishmentStore
+from sharding import format_shard_ids, layout_from_env, partition_path, partition_state, read_cluster, write_report
+import spam
+from storage import GuildStore, discard, make_backend
+from warning_log import WarningLog
+from xp_pipeline import XpPipeline
+
 # Configuration du bot
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix='!', intents=intents)
+class InstrumentedTree(app_commands.CommandTree):
+    """Arbre de commandes qui horodate chaque interaction (durée mesurée à la fin de la commande)"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if metrics.enabled:
+            interaction.extras['started'] = time.perf_counter()
+        return True
+
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 
+# Intents et cache (CACHE_PROFILE : 'full', 'lean' ou 'minimal', voir cache_profiles.py)
+cache_profile = make_profile(os.getenv("CACHE_PROFILE", "lean"))
+bot_options = dict(
+    command_prefix='!', intents=cache_profile.intents, tree_cls=InstrumentedTree,
+    member_cache_flags=cache_profile.member_cache_flags,
+    chunk_guilds_at_startup=cache_profile.chunk_guilds_at_startup,
+    max_messages=cache_profile.max_messages
+)
+
+# Shards (SHARD_MODE) : une connexion, tous les shards dans ce processus, ou une plage (voir launcher.py)
+shard_layout = layout_from_env()
+if shard_layout.mode == 'single':
+    bot = commands.Bot(**bot_options)
+else:
+    # Sans SHARD_COUNT, Discord choisit le nombre de shards
+    bot = commands.AutoShardedBot(**bot_options, shard_count=shard_layout.shard_count, shard_ids=shard_layout.shard_ids)
+SHARD_STATS_DIR = os.getenv("SHARD_STATS_DIR", "shard_stats")
+
+# Instrumentation (METRICS=0 pour désactiver les mesures de latence)
+metrics = Metrics(enabled=os.getenv("METRICS", "1") != "0")
+METRICS_FILE = os.getenv("METRICS_FILE")  # Export texte Prometheus (textfile collector)
+METRICS_PORT = os.getenv("METRICS_PORT")  # Ou servi en HTTP sur 127.0.0.1
+metrics_server = None
+
+# Tâches lancées sans attendre leur fin : gardées ici, sinon le ramasse-miettes peut les détruire en cours
+background_tasks = set()
+
+def spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 # Données en mémoire (dans un vrai bot, utilisez une base de données)
-user_data = {}
+user_store = GuildStore()
 guild_settings = {}
-muted_users = {}
-banned_users = {}
+mutes = PunishmentStore('unmute_time')
+bans = PunishmentStore('unban_time')
+warning_log = WarningLog()
+UNPUNISH_CONCURRENCY = 5  # Levées de sanctions simultanées au maximum
+
+# Cooldowns d'XP (ids entiers -> timestamp du dernier gain)
+xp_cooldowns = CooldownTable(60)
 
 # Système de sauvegarde
-def save_data():
-    with open('bot_data.json', 'w') as f:
-        json.dump({
-            'user_data': user_data, 
-            'guild_settings': guild_settings,
-            'muted_users': muted_users,
-            'banned_users': banned_users
-        }, f)
-
-def load_data():
-    # Si le fichier n'existe pas, le créer vide
-    if not os.path.exists("bot_data.json"):
-        with open("bot_data.json", "w") as f:
-            json.dump({}, f)
-
-    # Lire le JSON
-    with open("bot_data.json", "r") as f:
+DATA_FILE = 'bot_data.json'
+DATABASE_FILE = os.getenv("DATABASE_FILE", "bot_data.db")
+STORAGE_KIND = os.getenv("STORAGE_BACKEND", "json")
+# Un processus de shards ne sauvegarde que ses serveurs, dans sa propre partition ;
+# la première fois, elle est créée à partir des données communes, sous un nom
+# temporaire renommé une fois écrite : un démarrage interrompu recommence la création
+_main_path = DATABASE_FILE if STORAGE_KIND == 'sqlite' else DATA_FILE
+_partition_path = partition_path(_main_path, shard_layout)
+seed_partition = (shard_layout.partitioned and os.path.exists(_main_path)
+                  and not os.path.exists(_partition_path))
+if seed_partition:
+    _seed_path = f"{_partition_path}.seed"
+    discard(_seed_path)
+    backend = make_backend(STORAGE_KIND, _seed_path, _seed_path)
+else:
+    backend = make_backend(STORAGE_KIND, partition_path(DATA_FILE, shard_layout), partition_path(DATABASE_FILE, shard_layout))
+
+@metrics.timed('save_data')
+async def save_data():
+    stats = await backend.save(user_store, {
+        'guild_settings': guild_settings,
+        'muted_users': mutes.records,
+        'banned_users': bans.records
+    }, warning_log)
+    print(f'💾 Sauvegarde: {stats.records} enregistrement(s) modifié(s), {stats.bytes:,} octets en {stats.duration * 1000:.1f} ms '
+          f'({stats.skipped} fiche(s) vide(s) ignorée(s), {user_store.default_reads} lecture(s) sans création de fiche)')
+
+def load_data(lazy: bool = False):
+    if seed_partition:
+        source = make_backend(STORAGE_KIND, DATA_FILE, DATABASE_FILE)
         try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            data = {}  # Si le fichier est vide ou mal formé, on retourne un objet vide
-    return data
-
-# Initialisation des données utilisateur
-def init_user(user_id: str, guild_id: str):
-    if user_id not in user_data:
-        user_data[user_id] = {}
-    if guild_id not in user_data[user_id]:
-        user_data[user_id][guild_id] = {
-            'xp': 0,
-            'level': 1,
-            'messages_sent': 0,
-            'last_xp_time': None,
-            'total_xp_gained': 0,
-            'join_date': datetime.datetime.now().isoformat()
-        }
+            return partition_state(source.load(), shard_layout)
+        finally:
+            source.close()
+    return backend.load(lazy=lazy)
+
+def load_state():
+    """Charge les données sauvegardées dans les stores en mémoire (une seule fois, avant la connexion)"""
+    start = time.perf_counter()
+    data = load_data(lazy=True)
+    read_done = time.perf_counter()
+
+    if 'guild_data' in data:
+        user_store.load_json(data['guild_data'])
+        guild_count = len(data['guild_data'])
+        if seed_partition:
+            # Tout est à écrire dans la nouvelle partition
+            for guild_id, members in data['guild_data'].items():
+                for user_id in members:
+                    user_store.mark_dirty(guild_id, user_id)
+    else:
+        user_store.load_lazy(data['guild_ids'], backend.load_guild)
+        guild_count = len(data['guild_ids'])
+    guild_settings.update(data.get('guild_settings', {}))
+    mutes.load(data.get('muted_users', {}))
+    bans.load(data.get('banned_users', {}))
+    warning_log.load(data.get('warning_log', {}))
+    if seed_partition:
+        warning_log.mark_all()
+    for key in bans.records:
+        punishment_scheduler.schedule('ban', key, bans.expiry(key))
+    for key in mutes.records:
+        punishment_scheduler.schedule('mute', key, mutes.expiry(key))
+    done = time.perf_counter()
+
+    print(f'📂 Données chargées: lecture {(read_done - start) * 1000:.1f} ms, '
+          f'mise en place {(done - read_done) * 1000:.1f} ms '
+          f'({guild_count} serveur(s), chargés à la demande)')
+    if shard_layout.partitioned:
+        origin = f"créée à partir de {_main_path}" if seed_partition else "existante"
+        print(f'🧩 Shards {format_shard_ids(shard_layout.shard_ids)} sur {shard_layout.shard_count}: partition {origin}')
 
 # Calcul du niveau basé sur l'XP (comme DraftBot)
-def calculate_level(xp):
-    # Formule similaire à DraftBot
-    level = 0
-    xp_needed = 0
-    while xp_needed <= xp:
-        level += 1
-        xp_needed += level * 100
-    return max(1, level - 1)
-
-def xp_for_level(level):
-    total = 0
-    for i in range(1, level + 1):
-        total += i * 100
-    return total
+level_curves = {}  # guild_id -> (config, courbe)
+
+def get_level_curve(guild_id: Optional[str] = None):
+    """Courbe de niveaux du serveur (courbe DraftBot par défaut)"""
+    config = guild_settings.get(guild_id, {}).get('level_curve') if guild_id else None
+    if config is None:
+        return DEFAULT_CURVE
+    cached = level_curves.get(guild_id)
+    if cached is None or cached[0] is not config:
+        cached = level_curves[guild_id] = (config, curve_from_settings(config))
+    return cached[1]
+
+def calculate_level(xp, guild_id: Optional[str] = None):
+    return get_level_curve(guild_id).level(xp)
+
+def xp_for_level(level, guild_id: Optional[str] = None):
+    return get_level_curve(guild_id).xp_for_level(level)
 
 def xp_for_next_level(current_level):
     return (current_level + 1) * 100
 
 # Événements du bot
-@bot.event
-async def on_ready():
-    print(f'🤖 {bot.user} est connecté et prêt!')
-    load_data()
-    
-    # Synchronisation des commandes slash
-    try:
-        synced = await bot.tree.sync()
-        print(f'✅ {len(synced)} commande(s) slash synchronisée(s)')
-    except Exception as e:
-        print(f'❌ Erreur lors de la synchronisation: {e}')
+async def setup_hook():
+    """Appelé une seule fois, avant la connexion à Discord"""
+    load_state()
+    if seed_partition:
+        await save_data()
+        backend.move(_partition_path)
+    
+    # Synchronisation des commandes slash (commandes globales : un seul processus de shards s'en charge)
+    if not shard_layout.partitioned or 0 in shard_layout.shard_ids:
+        start = time.perf_counter()
+        try:
+            synced = await bot.tree.sync()
+            print(f'✅ {len(synced)} commande(s) slash synchronisée(s) en {(time.perf_counter() - start) * 1000:.0f} ms')
+        except Exception as e:
+            print(f'❌ Erreur lors de la synchronisation: {e}')
     
     # Démarrage des tâches
     save_data_task.start()
-    check_temp_punishments.start()
+    punishment_scheduler.start()
+    xp_pipeline.start()
+    evict_caches.start()
+    flush_raid_digests.start()
+    reconcile_guild_stats.start()
+    await start_metrics_export()
+    if shard_layout.partitioned:
+        report_shard_stats.start()
+
+bot.setup_hook = setup_hook
+
+@bot.event
+async def on_ready():
+    # on_ready peut être rappelé à chaque reconnexion : rien à initialiser ici
+    print(f'🤖 {bot.user} est connecté et prêt!')
     
     # Statut du bot
     await bot.change_presence(
@@ -104,51 +221,122 @@ async def on_ready():
     )
 
 
+# Anti-spam
+spam_detector = spam.SpamDetector()
+spam_configs = {}  # guild_id entier -> SpamConfig, retiré quand /antispam change la config
+
+def get_spam_config(guild_id: int) -> spam.SpamConfig:
+    # Appelé à chaque message : pas de str(guild_id) une fois la config en cache
+    config = spam_configs.get(guild_id)
+    if config is None:
+        settings = guild_settings.get(str(guild_id))
+        config = spam_configs[guild_id] = spam.config_from_settings(settings.get('antispam') if settings else None)
+    return config
+
+async def mute_spammer(message, reason: str, minutes: float):
+    """Mute automatique d'un membre détecté par l'anti-spam"""
+    member = message.author
+    unmute_time = datetime.datetime.now() + datetime.timedelta(minutes=minutes)
+    label = "Flood" if reason == 'flood' else "Messages répétés"
+    try:
+        await member.timeout(until=unmute_time, reason=f"[ANTI-SPAM] {label}")
+    except discord.HTTPException as e:
+        print(f"❌ Anti-spam: impossible de mute {member.id}: {e}")
+        return
+    mutes.add(member.guild.id, member.id, unmute_time, f"Anti-spam : {label}", bot.user.id)
+    punishment_scheduler.schedule('mute', mutes.key(member.guild.id, member.id), unmute_time.timestamp())
+    print(f'🔇 Anti-spam: {member} rendu muet sur {member.guild.name} ({label})')
+    
+    embed = embeds.mute(
+        user=member.display_name, mention=member.mention, user_id=member.id, moderator=bot.user.mention,
+        duration=f"{minutes:g}m", until=int(unmute_time.timestamp()), reason=f"Anti-spam : {label}",
+        thumbnail=member.display_avatar.url
+    )
+    results = await asyncio.gather(message.delete(), send_mod_log(member.guild, embed), return_exceptions=True)
+    metrics.swallow_results('antispam.cleanup', results)
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, discord.HTTPException):
+            print(f"❌ Anti-spam: {result}")
+
 @bot.event
+@metrics.timed('event.on_message')
 async def on_message(message):
     if message.author.bot or not message.guild:
         return
     
-    user_id = str(message.author.id)
-    guild_id = str(message.guild.id)
-    init_user(user_id, guild_id)
-    
     # Vérifier si l'utilisateur est mute
-    mute_key = f"{guild_id}_{user_id}"
-    if mute_key in muted_users:
+    if mutes.contains(message.guild.id, message.author.id):
         try:
             await message.delete()
-        except:
-            pass
+        except Exception as e:
+            metrics.swallow('on_message.delete_muted', e)
         return
     
-    # Système d'XP avec cooldown (comme DraftBot)
-    now = datetime.datetime.now()
-    last_xp_time = user_data[user_id][guild_id].get('last_xp_time')
-    
-    if last_xp_time:
-        last_time = datetime.datetime.fromisoformat(last_xp_time)
-        if (now - last_time).total_seconds() < 60:  # Cooldown de 60 secondes
-            await bot.process_commands(message)
+    # Anti-spam (désactivé par défaut, voir /antispam)
+    spam_config = get_spam_config(message.guild.id)
+    if spam_config.enabled:
+        reason = spam_detector.check(message.guild.id, message.author.id, message.content, time.time(), spam_config)
+        if reason is not None:
+            spawn(mute_spammer(message, reason, spam_config.mute_minutes))
             return
     
-    # Gain d'XP aléatoire
-    xp_gain = random.randint(15, 25)
-    user_data[user_id][guild_id]['xp'] += xp_gain
-    user_data[user_id][guild_id]['total_xp_gained'] += xp_gain
-    user_data[user_id][guild_id]['messages_sent'] += 1
-    user_data[user_id][guild_id]['last_xp_time'] = now.isoformat()
-    
-    # Vérification level up
-    old_level = user_data[user_id][guild_id]['level']
-    new_level = calculate_level(user_data[user_id][guild_id]['xp'])
-    user_data[user_id][guild_id]['level'] = new_level
+    # L'XP est attribuée par lots, hors du traitement du message
+    xp_pipeline.push(message.guild.id, message.author.id, time.time(), message)
     
-    # Notification de level up
-    if new_level > old_level:
+    await bot.process_commands(message)
+
+@metrics.timed('xp_batch')
+async def apply_xp_batch(events):
+    """Attribue l'XP d'un lot de messages et transmet les level ups au dispatcher"""
+    level_ups = []
+    for event in events:
+        # Système d'XP avec cooldown de 60 secondes (comme DraftBot)
+        if not xp_cooldowns.try_acquire(event.guild_id, event.user_id, event.timestamp):
+            continue
+        
+        user_id = str(event.user_id)
+        guild_id = str(event.guild_id)
+        
+        # Gain d'XP aléatoire
+        xp_gain = random.randint(15, 25)
+        data = user_store.add_xp(guild_id, user_id, xp_gain)
+        data.messages_sent += 1
+        data.last_xp_time = event.timestamp  # Converti en ISO à la sauvegarde
+        
+        # Vérification level up
+        old_level = data.level
+        new_level = calculate_level(data.xp, guild_id)
+        data.level = new_level
+        if new_level > old_level:
+            level_ups.append((event.message, new_level, data.xp))
+    
+    for message, level, xp in level_ups:
+        destination = level_up_destination(message)
+        if destination is not None:
+            level_up_dispatcher.submit(destination, (message.author, level, xp))
+
+def level_up_destination(message):
+    """Salon (ou MP) où annoncer un level up, selon guild_settings"""
+    settings = guild_settings.get(str(message.guild.id))
+    if not settings:
+        return message.channel
+    mode = settings.get('levelup_mode', 'channel')
+    if mode == 'off':
+        return None
+    if mode == 'dm':
+        return message.author
+    channel_id = settings.get('levelup_channel')
+    if channel_id:
+        return message.guild.get_channel(channel_id) or message.channel
+    return message.channel
+
+async def send_level_ups(destination, level_ups):
+    """Envoie une notification, regroupée si plusieurs level ups sont arrivés ensemble"""
+    if len(level_ups) == 1:
+        member, new_level, xp = level_ups[0]
         embed = discord.Embed(
             title="🎉 Niveau supérieur atteint!",
-            description=f"Félicitations {message.author.mention}!",
+            description=f"Félicitations {member.mention}!",
             color=0x00ff88
         )
         embed.add_field(
@@ -158,7 +346,7 @@ async def on_message(message):
         )
         embed.add_field(
             name="⭐ XP total", 
-            value=f"**{user_data[user_id][guild_id]['xp']}**", 
+            value=f"**{xp}**", 
             inline=True
         )
         embed.add_field(
@@ -166,36 +354,61 @@ async def on_message(message):
             value=f"+{new_level * 50} coins", 
             inline=True
         )
-        embed.set_thumbnail(url=message.author.display_avatar.url)
+        embed.set_thumbnail(url=member.display_avatar.url)
         embed.set_footer(text=f"Bravo pour ce niveau {new_level}!")
-        
-        await message.channel.send(embed=embed)
+    else:
+        lines = [
+            f"{member.mention} → niveau **{new_level}** (+{new_level * 50} coins)"
+            for member, new_level, xp in level_ups[:20]
+        ]
+        if len(level_ups) > 20:
+            lines.append(f"... et {len(level_ups) - 20} autre(s)")
+        embed = discord.Embed(
+            title="🎉 Niveaux supérieurs atteints!",
+            description="\n".join(lines),
+            color=0x00ff88
+        )
+        embed.set_footer(text=f"Bravo à tous les {len(level_ups)}!")
     
-    await bot.process_commands(message)
+    await destination.send(embed=embed)
+
+level_up_dispatcher = LevelUpDispatcher(send_level_ups)
+
+xp_pipeline = XpPipeline(apply_xp_batch)
 
 # Commandes Slash
 
+# Membres hors cache (profils lean/minimal)
+CHUNK_TIMEOUT = 30.0
+member_lru = MemberLRU()
+
+async def ensure_chunked(interaction: discord.Interaction) -> bool:
+    """Charge une fois les membres du serveur si le profil le prévoit ; False si le serveur reste hors cache"""
+    guild = interaction.guild
+    if guild.chunked or not cache_profile.chunk_on_demand:
+        return guild.chunked
+    # Le chargement d'un gros serveur dépasse le délai de réponse de 3 s
+    if not interaction.response.is_done():
+        await interaction.response.defer()
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(guild.chunk(cache=True), CHUNK_TIMEOUT)
+    except asyncio.TimeoutError as e:
+        metrics.swallow('ensure_chunked', e)
+        return False
+    print(f'👥 {guild.name}: {guild.member_count} membre(s) chargé(s) en {time.perf_counter() - start:.1f} s')
+    return True
+
+async def reply(interaction: discord.Interaction, **kwargs):
+    """Réponse publique, que l'interaction ait été différée ou non"""
+    if interaction.response.is_done():
+        await interaction.followup.send(**kwargs)
+    else:
+        await interaction.response.send_message(**kwargs)
+
 @bot.tree.command(name="help", description="Affiche toutes les commandes disponibles")
 async def help_slash(interaction: discord.Interaction):
-    embed = discord.Embed(
-        title="📚 Commandes disponibles",
-        description="Voici toutes les commandes disponibles du bot:",
-        color=0x3498db
-    )
-    
-    commands_info = [
-        ("👤 **Profil & XP**", "`/profile` - Voir son profil\n`/rank` - Voir son rang\n`/leaderboard` - Classement du serveur"),
-        ("🔨 **Modération**", "`/ban` - Bannir un membre\n`/tempban` - Ban temporaire\n`/mute` - Rendre muet temporairement\n`/unmute` - Démute un membre"),
-        ("⚠️ **Avertissements**", "`/warn` - Avertir un membre\n`/warnings` - Voir les avertissements\n`/clearwarns` - Effacer les avertissements"),
-        ("ℹ️ **Utilitaires**", "`/help` - Cette aide\n`/serverinfo` - Infos du serveur\n`/userinfo` - Infos d'un utilisateur")
-    ]
-    
-    for category, commands in commands_info:
-        embed.add_field(name=category, value=commands, inline=False)
-    
-    embed.set_footer(text="MultiGame Bot")
-    embed.set_thumbnail(url=bot.user.display_avatar.url)
-    
+    embed = embeds.help_embed(bot.user.display_avatar.url)
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="profile", description="Affiche le profil d'un utilisateur")
@@ -206,13 +419,11 @@ async def profile_slash(interaction: discord.Interaction, user: discord.Member =
     
     user_id = str(user.id)
     guild_id = str(interaction.guild.id)
-    init_user(user_id, guild_id)
-    
-    data = user_data[user_id][guild_id]
+    data = user_store.view(guild_id, user_id)
     current_level = data['level']
     current_xp = data['xp']
-    xp_for_current = xp_for_level(current_level - 1) if current_level > 1 else 0
-    xp_for_next = xp_for_level(current_level)
+    xp_for_current = xp_for_level(current_level - 1, guild_id) if current_level > 1 else 0
+    xp_for_next = xp_for_level(current_level, guild_id)
     xp_progress = current_xp - xp_for_current
     xp_needed = xp_for_next - xp_for_current
     
@@ -237,13 +448,8 @@ async def profile_slash(interaction: discord.Interaction, user: discord.Member =
     )
     
     # Calcul du rang
-    all_users = []
-    for uid, guilds in user_data.items():
-        if guild_id in guilds:
-            all_users.append((uid, guilds[guild_id]['xp']))
-    
-    all_users.sort(key=lambda x: x[1], reverse=True)
-    rank = next((i + 1 for i, (uid, _) in enumerate(all_users) if uid == user_id), "N/A")
+    index = user_store.rank_index(guild_id)
+    rank = index.rank(user_id) or index.rank_for_xp(data['xp'])
     
     embed.add_field(name="🏆 Rang sur le serveur", value=f"**#{rank}**", inline=True)
     embed.add_field(name="📅 Membre depuis", value=f"<t:{int(user.joined_at.timestamp())}:D>", inline=True)
@@ -253,44 +459,128 @@ async def profile_slash(interaction: discord.Interaction, user: discord.Member =
     
     await interaction.response.send_message(embed=embed)
 
-@bot.tree.command(name="leaderboard", description="Affiche le classement XP du serveur")
-async def leaderboard_slash(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    
-    # Récupérer tous les utilisateurs du serveur
-    server_users = []
-    for user_id, guilds in user_data.items():
-        if guild_id in guilds:
-            try:
-                member = interaction.guild.get_member(int(user_id))
-                if member:
-                    server_users.append((user_id, guilds[guild_id], member))
-            except:
-                continue
-    
-    # Trier par XP
-    server_users.sort(key=lambda x: x[1]['xp'], reverse=True)
+LEADERBOARD_PAGE_SIZE = 10
+
+def build_leaderboard_embed(guild, snapshot, page: int, names=None):
+    """Page du classement, servie depuis l'instantané en cache (`names` : membres hors cache, récupérés à la demande)"""
+    pages = max(1, -(-len(snapshot.entries) // LEADERBOARD_PAGE_SIZE))
+    start = page * LEADERBOARD_PAGE_SIZE
     
     embed = discord.Embed(
-        title=f"🏆 Classement XP - {interaction.guild.name}",
-        description="Top 10 des utilisateurs avec le plus d'XP",
+        title=f"🏆 Classement XP - {guild.name}",
+        description=f"Top {len(snapshot.entries)} des utilisateurs avec le plus d'XP",
         color=0xf1c40f
     )
     
-    for i, (user_id, data, member) in enumerate(server_users[:10]):
+    for i, (user_id, xp, level, messages_sent) in enumerate(snapshot.entries[start:start + LEADERBOARD_PAGE_SIZE], start):
+        member = guild.get_member(int(user_id)) or (names or {}).get(int(user_id))
+        name = member.display_name if member else f"Utilisateur {user_id}"
         medal = ["🥇", "🥈", "🥉"][i] if i < 3 else f"**{i+1}.**"
         embed.add_field(
-            name=f"{medal} {member.display_name}",
-            value=f"Niveau **{data['level']}** • **{data['xp']:,}** XP\n💬 {data['messages_sent']:,} messages",
+            name=f"{medal} {name}",
+            value=f"Niveau **{level}** • **{xp:,}** XP\n💬 {messages_sent:,} messages",
             inline=False
         )
     
-    embed.set_footer(text=f"Total: {len(server_users)} utilisateurs classés")
-    embed.set_thumbnail(url=interaction.guild.icon.url if interaction.guild.icon else None)
+    scope = " (anciens membres compris)" if snapshot.all_time else ""
+    embed.set_footer(text=f"Page {page + 1}/{pages} • Total: {snapshot.total} utilisateurs classés{scope}")
+    embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
+    return embed
+
+class PageView(discord.ui.View):
+    """Navigation ◀/▶ entre les pages d'un résultat déjà calculé (`render(page)` construit l'embed)"""
+    
+    def __init__(self, render, items: int, page_size: int, page: int = 0, prepare=None):
+        super().__init__(timeout=180)
+        self.render = render
+        self.prepare = prepare  # Coroutine facultative appelée avant de construire une page
+        self.pages = max(1, -(-items // page_size))
+        self.page = min(max(0, page), self.pages - 1)
+        self.update_buttons()
+    
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+    
+    async def show(self, interaction: discord.Interaction):
+        self.update_buttons()
+        if self.prepare is not None:
+            await self.prepare(self.page)
+        await interaction.response.edit_message(embed=self.render(self.page), view=self)
+    
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self.show(interaction)
+    
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await self.show(interaction)
+
+@bot.tree.command(name="leaderboard", description="Affiche le classement XP du serveur")
+@app_commands.describe(page="Page du classement (10 utilisateurs par page)")
+async def leaderboard_slash(interaction: discord.Interaction, page: int = 1):
+    guild = interaction.guild
+    await ensure_chunked(interaction)
+    
+    # Les membres ayant quitté le serveur sont écartés à la construction de l'instantané
+    # (seulement si le serveur est en cache : sinon on ne sait pas qui est parti)
+    snapshot = user_store.leaderboard(
+        str(guild.id),
+        time.time(),
+        keep=(lambda user_id: guild.get_member(int(user_id)) is not None) if guild.chunked else None
+    )
     
-    await interaction.response.send_message(embed=embed)
+    # Hors cache, les noms de la page affichée sont demandés à la gateway
+    names = {}
+    async def prepare(page: int):
+        if not guild.chunked:
+            entries = snapshot.entries[page * LEADERBOARD_PAGE_SIZE:(page + 1) * LEADERBOARD_PAGE_SIZE]
+            names.update(await member_lru.resolve(guild, [int(entry[0]) for entry in entries]))
+    
+    view = PageView(lambda page: build_leaderboard_embed(guild, snapshot, page, names),
+                    len(snapshot.entries), LEADERBOARD_PAGE_SIZE, page - 1, prepare)
+    await prepare(view.page)
+    
+    await reply(interaction, embed=view.render(view.page), view=view)
 
 # Commandes de modération
+DM_TIMEOUT = 5.0         # MP à l'utilisateur sanctionné
+BAN_DM_GRACE = 1.5       # Avance laissée au MP avant un ban (plus de serveur commun ensuite)
+ACTION_TIMEOUT = 10.0    # Ban / timeout
+RESPONSE_TIMEOUT = 10.0  # Followup et salon de logs
+moderation_timings = StepTimings()
+
+async def send_mod_log(guild, embed):
+    """Copie la confirmation dans le salon de logs de modération, s'il est configuré"""
+    channel_id = guild_settings.get(str(guild.id), {}).get('mod_log_channel')
+    channel = guild.get_channel(channel_id) if channel_id else None
+    if channel is not None:
+        await channel.send(embed=embed)
+
+async def send_error(interaction: discord.Interaction, embed):
+    """Erreur visible du seul auteur, que l'interaction ait été différée ou non"""
+    if not interaction.response.is_done():
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    # La réponse différée est publique : on la retire avant d'envoyer l'erreur
+    try:
+        await interaction.delete_original_response()
+    except discord.HTTPException as e:
+        metrics.swallow('send_error.delete_original', e)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def finish_moderation(command: str, interaction: discord.Interaction, embed, dm=None):
+    """Envoie la confirmation, le log et le MP en parallèle (les échecs sont comptés dans les timings)"""
+    steps = [
+        timed(moderation_timings, f'{command}.response', interaction.followup.send(embed=embed), RESPONSE_TIMEOUT),
+        timed(moderation_timings, f'{command}.log', send_mod_log(interaction.guild, embed), RESPONSE_TIMEOUT)
+    ]
+    if dm is not None:
+        steps.append(dm)
+    metrics.swallow_results(f'{command}.finish', await asyncio.gather(*steps, return_exceptions=True))
+
 
 @bot.tree.command(name="ban", description="Bannir un membre du serveur")
 @app_commands.describe(
@@ -299,59 +589,32 @@ async def leaderboard_slash(interaction: discord.Interaction):
 )
 async def ban_slash(interaction: discord.Interaction, user: discord.Member, reason: str = "Aucune raison spécifiée"):
     if not interaction.user.guild_permissions.ban_members:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de bannir des membres.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_ban_members'], ephemeral=True)
         return
     
-    if user.top_role >= interaction.user.top_role and interaction.user != interaction.guild.owner:
-        embed = discord.Embed(
-            title="❌ Hiérarchie insuffisante",
-            description="Vous ne pouvez pas bannir ce membre (rôle supérieur ou égal).",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+    if user.top_role >= interaction.user.top_role and interaction.user.id != interaction.guild.owner_id:
+        await interaction.response.send_message(embed=embeds.STATIC['hierarchy_ban'], ephemeral=True)
         return
     
+    await interaction.response.defer()
+    
+    # MP à l'utilisateur, avec une avance bornée sur le ban
+    dm_embed = embeds.ban_dm(guild=interaction.guild.name, reason=reason, moderator=interaction.user.mention)
+    dm = asyncio.ensure_future(timed(moderation_timings, 'ban.dm', user.send(embed=dm_embed), DM_TIMEOUT))
     try:
-        # Essayer d'envoyer un MP à l'utilisateur
-        try:
-            dm_embed = discord.Embed(
-                title="🔨 Vous avez été banni",
-                description=f"Vous avez été banni de **{interaction.guild.name}**",
-                color=0xff0000
-            )
-            dm_embed.add_field(name="Raison", value=reason, inline=False)
-            dm_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
-            await user.send(embed=dm_embed)
-        except:
-            pass
-        
-        await user.ban(reason=f"{reason} | Par: {interaction.user}")
-        
-        embed = discord.Embed(
-            title="🔨 Membre banni",
-            description=f"**{user}** a été banni du serveur",
-            color=0xff0000
-        )
-        embed.add_field(name="👤 Utilisateur", value=f"{user.mention} (`{user.id}`)", inline=True)
-        embed.add_field(name="🛡️ Modérateur", value=interaction.user.mention, inline=True)
-        embed.add_field(name="📝 Raison", value=reason, inline=False)
-        embed.set_thumbnail(url=user.display_avatar.url)
-        embed.timestamp = datetime.datetime.now()
-        
-        await interaction.response.send_message(embed=embed)
-        
+        await timed(moderation_timings, 'ban.action',
+                    after(dm, BAN_DM_GRACE, user.ban(reason=f"{reason} | Par: {interaction.user}")), ACTION_TIMEOUT)
     except discord.Forbidden:
-        embed = discord.Embed(
-            title="❌ Erreur",
-            description="Je n'ai pas les permissions pour bannir ce membre.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['forbidden_ban'])
+        return
+    finally:
+        dm.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    embed = embeds.ban(
+        user=user, mention=user.mention, user_id=user.id, moderator=interaction.user.mention, reason=reason,
+        thumbnail=user.display_avatar.url, timestamp=datetime.datetime.now()
+    )
+    await finish_moderation('ban', interaction, embed, dm)
 
 @bot.tree.command(name="tempban", description="Bannir temporairement un membre")
 @app_commands.describe(
@@ -361,75 +624,44 @@ async def ban_slash(interaction: discord.Interaction, user: discord.Member, reas
 )
 async def tempban_slash(interaction: discord.Interaction, user: discord.Member, duration: str, reason: str = "Aucune raison spécifiée"):
     if not interaction.user.guild_permissions.ban_members:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de bannir des membres.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_ban_members'], ephemeral=True)
         return
     
     # Parser la durée
     duration_seconds = parse_duration(duration)
     if duration_seconds is None:
-        embed = discord.Embed(
-            title="❌ Durée invalide",
-            description="Format valide: 1h, 1d, 1w (h=heures, d=jours, w=semaines)",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['invalid_ban_duration'], ephemeral=True)
         return
     
     unban_time = datetime.datetime.now() + datetime.timedelta(seconds=duration_seconds)
     
+    await interaction.response.defer()
+    
+    # MP à l'utilisateur, avec une avance bornée sur le ban
+    dm_embed = embeds.tempban_dm(
+        guild=interaction.guild.name, duration=duration, until=int(unban_time.timestamp()), reason=reason
+    )
+    dm = asyncio.ensure_future(timed(moderation_timings, 'tempban.dm', user.send(embed=dm_embed), DM_TIMEOUT))
     try:
-        # MP à l'utilisateur
-        try:
-            dm_embed = discord.Embed(
-                title="⏰ Bannissement temporaire",
-                description=f"Vous avez été banni temporairement de **{interaction.guild.name}**",
-                color=0xff9900
-            )
-            dm_embed.add_field(name="Durée", value=duration, inline=True)
-            dm_embed.add_field(name="Fin du ban", value=f"<t:{int(unban_time.timestamp())}:F>", inline=True)
-            dm_embed.add_field(name="Raison", value=reason, inline=False)
-            await user.send(embed=dm_embed)
-        except:
-            pass
-        
-        await user.ban(reason=f"[TEMP] {reason} | Durée: {duration} | Par: {interaction.user}")
-        
-        # Enregistrer le ban temporaire
-        ban_key = f"{interaction.guild.id}_{user.id}"
-        banned_users[ban_key] = {
-            'user_id': user.id,
-            'guild_id': interaction.guild.id,
-            'unban_time': unban_time.isoformat(),
-            'reason': reason,
-            'moderator': interaction.user.id
-        }
-        
-        embed = discord.Embed(
-            title="⏰ Bannissement temporaire",
-            description=f"**{user}** a été banni temporairement",
-            color=0xff9900
-        )
-        embed.add_field(name="👤 Utilisateur", value=f"{user.mention} (`{user.id}`)", inline=True)
-        embed.add_field(name="🛡️ Modérateur", value=interaction.user.mention, inline=True)
-        embed.add_field(name="⏱️ Durée", value=duration, inline=True)
-        embed.add_field(name="🔚 Fin du ban", value=f"<t:{int(unban_time.timestamp())}:F>", inline=True)
-        embed.add_field(name="📝 Raison", value=reason, inline=False)
-        embed.set_thumbnail(url=user.display_avatar.url)
-        
-        await interaction.response.send_message(embed=embed)
-        
+        await timed(moderation_timings, 'tempban.action',
+                    after(dm, BAN_DM_GRACE, user.ban(reason=f"[TEMP] {reason} | Durée: {duration} | Par: {interaction.user}")),
+                    ACTION_TIMEOUT)
     except discord.Forbidden:
-        embed = discord.Embed(
-            title="❌ Erreur",
-            description="Je n'ai pas les permissions pour bannir ce membre.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['forbidden_ban'])
+        return
+    finally:
+        dm.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    # Enregistrer le ban temporaire
+    bans.add(interaction.guild.id, user.id, unban_time, reason, interaction.user.id)
+    punishment_scheduler.schedule('ban', bans.key(interaction.guild.id, user.id), unban_time.timestamp())
+    
+    embed = embeds.tempban(
+        user=user, mention=user.mention, user_id=user.id, moderator=interaction.user.mention,
+        duration=duration, until=int(unban_time.timestamp()), reason=reason,
+        thumbnail=user.display_avatar.url
+    )
+    await finish_moderation('tempban', interaction, embed, dm)
 
 @bot.tree.command(name="mute", description="Rendre muet un membre temporairement")
 @app_commands.describe(
@@ -439,94 +671,55 @@ async def tempban_slash(interaction: discord.Interaction, user: discord.Member,
 )
 async def mute_slash(interaction: discord.Interaction, user: discord.Member, duration: str, reason: str = "Aucune raison spécifiée"):
     if not interaction.user.guild_permissions.moderate_members:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de modérer les membres.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_moderate_members'], ephemeral=True)
         return
     
     duration_seconds = parse_duration(duration)
     if duration_seconds is None:
-        embed = discord.Embed(
-            title="❌ Durée invalide",
-            description="Format valide: 10m, 1h, 1d (m=minutes, h=heures, d=jours)",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['invalid_mute_duration'], ephemeral=True)
         return
     
     unmute_time = datetime.datetime.now() + datetime.timedelta(seconds=duration_seconds)
     
+    await interaction.response.defer()
+    
     try:
-        await user.timeout(until=unmute_time, reason=f"{reason} | Par: {interaction.user}")
-        
-        # Enregistrer le mute
-        mute_key = f"{interaction.guild.id}_{user.id}"
-        muted_users[mute_key] = {
-            'user_id': user.id,
-            'guild_id': interaction.guild.id,
-            'unmute_time': unmute_time.isoformat(),
-            'reason': reason,
-            'moderator': interaction.user.id
-        }
-        
-        embed = discord.Embed(
-            title="🔇 Membre rendu muet",
-            description=f"**{user.display_name}** a été rendu muet",
-            color=0xff9900
-        )
-        embed.add_field(name="👤 Utilisateur", value=f"{user.mention} (`{user.id}`)", inline=True)
-        embed.add_field(name="🛡️ Modérateur", value=interaction.user.mention, inline=True)
-        embed.add_field(name="⏱️ Durée", value=duration, inline=True)
-        embed.add_field(name="🔚 Fin du mute", value=f"<t:{int(unmute_time.timestamp())}:F>", inline=True)
-        embed.add_field(name="📝 Raison", value=reason, inline=False)
-        embed.set_thumbnail(url=user.display_avatar.url)
-        
-        await interaction.response.send_message(embed=embed)
-        
-        # MP à l'utilisateur
-        try:
-            dm_embed = discord.Embed(
-                title="🔇 Vous avez été rendu muet",
-                description=f"Vous avez été rendu muet sur **{interaction.guild.name}**",
-                color=0xff9900
-            )
-            dm_embed.add_field(name="Durée", value=duration, inline=True)
-            dm_embed.add_field(name="Fin du mute", value=f"<t:{int(unmute_time.timestamp())}:F>", inline=True)
-            dm_embed.add_field(name="Raison", value=reason, inline=False)
-            await user.send(embed=dm_embed)
-        except:
-            pass
-            
+        await timed(moderation_timings, 'mute.action',
+                    user.timeout(until=unmute_time, reason=f"{reason} | Par: {interaction.user}"), ACTION_TIMEOUT)
     except discord.Forbidden:
-        embed = discord.Embed(
-            title="❌ Erreur",
-            description="Je n'ai pas les permissions pour mute ce membre.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['forbidden_mute'])
+        return
+    
+    # Enregistrer le mute
+    mutes.add(interaction.guild.id, user.id, unmute_time, reason, interaction.user.id)
+    punishment_scheduler.schedule('mute', mutes.key(interaction.guild.id, user.id), unmute_time.timestamp())
+    
+    embed = embeds.mute(
+        user=user.display_name, mention=user.mention, user_id=user.id, moderator=interaction.user.mention,
+        duration=duration, until=int(unmute_time.timestamp()), reason=reason,
+        thumbnail=user.display_avatar.url
+    )
+    
+    # MP à l'utilisateur (un membre muet reste joignable : pas besoin de le faire passer avant)
+    dm_embed = embeds.mute_dm(
+        guild=interaction.guild.name, duration=duration, until=int(unmute_time.timestamp()), reason=reason
+    )
+    await finish_moderation('mute', interaction, embed,
+                            timed(moderation_timings, 'mute.dm', user.send(embed=dm_embed), DM_TIMEOUT))
 
 @bot.tree.command(name="unmute", description="Démute un membre")
 @app_commands.describe(user="Le membre à démute")
 async def unmute_slash(interaction: discord.Interaction, user: discord.Member):
     if not interaction.user.guild_permissions.moderate_members:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de modérer les membres.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_moderate_members'], ephemeral=True)
         return
     
     try:
         await user.timeout(until=None, reason=f"Démute par: {interaction.user}")
         
         # Supprimer le mute enregistré
-        mute_key = f"{interaction.guild.id}_{user.id}"
-        if mute_key in muted_users:
-            del muted_users[mute_key]
+        mutes.remove(interaction.guild.id, user.id)
+        punishment_scheduler.cancel('mute', mutes.key(interaction.guild.id, user.id))
         
         embed = discord.Embed(
             title="🔊 Membre démuté",
@@ -540,12 +733,13 @@ async def unmute_slash(interaction: discord.Interaction, user: discord.Member):
         await interaction.response.send_message(embed=embed)
         
     except discord.Forbidden:
-        embed = discord.Embed(
-            title="❌ Erreur",
-            description="Je n'ai pas les permissions pour démute ce membre.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['forbidden_unmute'], ephemeral=True)
+
+def add_warning(guild_id: int, user_id: int, reason: str, moderator_id: int) -> int:
+    """Ajoute un avertissement au journal du serveur et retourne le total du membre"""
+    log = warning_log.guild(guild_id)
+    log.add(user_id, moderator_id, reason, time.time())
+    return log.count_user(user_id)
 
 @bot.tree.command(name="warn", description="Avertir un membre")
 @app_commands.describe(
@@ -554,64 +748,211 @@ async def unmute_slash(interaction: discord.Interaction, user: discord.Member):
 )
 async def warn_slash(interaction: discord.Interaction, user: discord.Member, reason: str = "Aucune raison spécifiée"):
     if not interaction.user.guild_permissions.manage_messages:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de gérer les messages.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_messages'], ephemeral=True)
         return
     
-    user_id = str(user.id)
-    guild_id = str(interaction.guild.id)
-    init_user(user_id, guild_id)
+    await interaction.response.defer()
     
-    # Ajouter l'avertissement
-    if 'warnings' not in user_data[user_id][guild_id]:
-        user_data[user_id][guild_id]['warnings'] = []
+    warn_count = add_warning(interaction.guild.id, user.id, reason, interaction.user.id)
     
-    warning = {
-        'reason': reason,
-        'moderator': interaction.user.id,
-        'date': datetime.datetime.now().isoformat(),
-        'id': len(user_data[user_id][guild_id]['warnings']) + 1
-    }
+    embed = embeds.warn(
+        user=user.display_name, mention=user.mention, user_id=user.id, moderator=interaction.user.mention,
+        count=warn_count, reason=reason,
+        thumbnail=user.display_avatar.url, timestamp=datetime.datetime.now()
+    )
+    
+    # MP à l'utilisateur
+    dm_embed = embeds.warn_dm(
+        guild=interaction.guild.name, reason=reason, moderator=interaction.user, count=warn_count
+    )
+    await finish_moderation('warn', interaction, embed,
+                            timed(moderation_timings, 'warn.dm', user.send(embed=dm_embed), DM_TIMEOUT))
+
+# Sanctions en masse
+MASS_ACTION_LIMIT = 500       # Cibles au maximum par commande
+MASS_ACTION_CONCURRENCY = 4   # Appels API simultanés
+
+async def resolve_mass_targets(interaction: discord.Interaction, users: Optional[str], joined_minutes: Optional[int],
+                               members_only: bool):
+    """Cibles d'une sanction en masse : ids ou mentions de `users`, et membres arrivés depuis `joined_minutes` minutes.
+
+    Retourne (cibles, nombre de cibles ignorées). Les cibles absentes du
+    serveur sont gardées sous forme de discord.Object sauf si `members_only`.
+    """
+    guild = interaction.guild
+    ids = [int(user_id) for user_id in re.findall(r'\d{15,20}', users or '')]
+    if joined_minutes:
+        since = discord.utils.utcnow() - datetime.timedelta(minutes=joined_minutes)
+        ids.extend(member.id for member in guild.members if member.joined_at and member.joined_at >= since)
+    
+    protected = {interaction.user.id, guild.owner_id, guild.me.id}
+    is_owner = interaction.user.id == guild.owner_id
+    # Serveur hors cache : membres demandés à la gateway (hiérarchie et cibles membres uniquement)
+    fetched = {}
+    if not guild.chunked:
+        fetched = await member_lru.resolve(guild, list(dict.fromkeys(ids))[:MASS_ACTION_LIMIT + len(protected)])
+    targets, seen, skipped = [], set(), 0
+    for user_id in ids:
+        if user_id in seen:
+            continue
+        seen.add(user_id)
+        member = guild.get_member(user_id) or fetched.get(user_id)
+        if user_id in protected or len(targets) >= MASS_ACTION_LIMIT:
+            skipped += 1
+        elif member is None:
+            if members_only:
+                skipped += 1
+            else:
+                targets.append(discord.Object(id=user_id))
+        elif member.top_role >= interaction.user.top_role and not is_owner:
+            skipped += 1
+        else:
+            targets.append(member)
+    return targets, skipped
+
+async def run_mass_action(command: str, label: str, interaction: discord.Interaction, targets, skipped: int,
+                          action, reason: str):
+    """Exécute `action` sur les cibles via le pool borné, en affichant la progression dans la réponse différée"""
+    if not targets:
+        await send_error(interaction, embeds.STATIC['mass_empty'])
+        return
     
-    user_data[user_id][guild_id]['warnings'].append(warning)
-    warn_count = len(user_data[user_id][guild_id]['warnings'])
+    async def show_progress(progress):
+        await interaction.edit_original_response(embed=embeds.mass_progress(
+            action=label, done=progress.finished, total=progress.total, failed=progress.failed
+        ))
     
-    embed = discord.Embed(
-        title="⚠️ Avertissement donné",
-        description=f"**{user.display_name}** a reçu un avertissement",
-        color=0xff9900
+    progress = await run_bulk(targets, action, concurrency=MASS_ACTION_CONCURRENCY, on_progress=show_progress)
+    moderation_timings.record(f'{command}.bulk', progress.elapsed)
+    print(f'🔨 /{command}: {progress.done} réussi(s), {progress.failed} échec(s), '
+          f'{progress.retries} nouvelle(s) tentative(s) en {progress.elapsed:.1f} s')
+    
+    embed = embeds.mass_done(
+        action=label, done=progress.done, failed=progress.failed, skipped=skipped,
+        moderator=interaction.user.mention, elapsed=f"{progress.elapsed:.1f}", reason=reason,
+        timestamp=datetime.datetime.now()
     )
-    embed.add_field(name="👤 Utilisateur", value=f"{user.mention} (`{user.id}`)", inline=True)
-    embed.add_field(name="🛡️ Modérateur", value=interaction.user.mention, inline=True)
-    embed.add_field(name="🔢 Total d'avertissements", value=f"**{warn_count}**", inline=True)
-    embed.add_field(name="📝 Raison", value=reason, inline=False)
-    embed.set_thumbnail(url=user.display_avatar.url)
-    embed.timestamp = datetime.datetime.now()
+    metrics.swallow_results(f'{command}.finish', await asyncio.gather(
+        interaction.edit_original_response(embed=embed),
+        timed(moderation_timings, f'{command}.log', send_mod_log(interaction.guild, embed), RESPONSE_TIMEOUT),
+        return_exceptions=True
+    ))
+
+@bot.tree.command(name="massban", description="Bannir plusieurs membres d'un coup")
+@app_commands.describe(
+    users="IDs ou mentions des membres à bannir",
+    joined_minutes="Bannir les membres arrivés depuis N minutes",
+    duration="Durée pour un ban temporaire (ex: 1h, 1d, 1w)",
+    reason="Raison du bannissement"
+)
+async def massban_slash(interaction: discord.Interaction, users: str = None,
+                        joined_minutes: app_commands.Range[int, 1, 1440] = None, duration: str = None,
+                        reason: str = "Aucune raison spécifiée"):
+    if not interaction.user.guild_permissions.ban_members:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_ban_members'], ephemeral=True)
+        return
     
-    await interaction.response.send_message(embed=embed)
+    unban_time = None
+    if duration is not None:
+        duration_seconds = parse_duration(duration)
+        if duration_seconds is None:
+            await interaction.response.send_message(embed=embeds.STATIC['invalid_ban_duration'], ephemeral=True)
+            return
+        unban_time = datetime.datetime.now() + datetime.timedelta(seconds=duration_seconds)
     
-    # MP à l'utilisateur
-    try:
-        dm_embed = discord.Embed(
-            title="⚠️ Avertissement reçu",
-            description=f"Vous avez reçu un avertissement sur **{interaction.guild.name}**",
-            color=0xff9900
-        )
-        dm_embed.add_field(name="Raison", value=reason, inline=False)
-        dm_embed.add_field(name="Modérateur", value=str(interaction.user), inline=False)
-        dm_embed.add_field(name="Total d'avertissements", value=f"{warn_count}", inline=False)
-        await user.send(embed=dm_embed)
-    except:
-        pass
+    if not users and not joined_minutes:
+        await interaction.response.send_message(embed=embeds.STATIC['mass_no_targets'], ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    
+    guild = interaction.guild
+    targets, skipped = await resolve_mass_targets(interaction, users, joined_minutes, members_only=False)
+    audit_reason = f"[MASS] {reason} | Par: {interaction.user}" if unban_time is None else \
+        f"[MASS][TEMP] {reason} | Durée: {duration} | Par: {interaction.user}"
+    
+    # Pas de MP : un MP par cible doublerait les appels pendant un raid
+    async def ban(target):
+        await guild.ban(target, reason=audit_reason)
+        if unban_time is not None:
+            bans.add(guild.id, target.id, unban_time, reason, interaction.user.id)
+            punishment_scheduler.schedule('ban', bans.key(guild.id, target.id), unban_time.timestamp())
+    
+    await run_mass_action('massban', "Bannissement en masse", interaction, targets, skipped, ban, reason)
+
+@bot.tree.command(name="massmute", description="Rendre muets plusieurs membres d'un coup")
+@app_commands.describe(
+    duration="Durée (ex: 10m, 1h, 1d)",
+    users="IDs ou mentions des membres à rendre muets",
+    joined_minutes="Rendre muets les membres arrivés depuis N minutes",
+    reason="Raison du mute"
+)
+async def massmute_slash(interaction: discord.Interaction, duration: str, users: str = None,
+                         joined_minutes: app_commands.Range[int, 1, 1440] = None,
+                         reason: str = "Aucune raison spécifiée"):
+    if not interaction.user.guild_permissions.moderate_members:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_moderate_members'], ephemeral=True)
+        return
+    
+    duration_seconds = parse_duration(duration)
+    if duration_seconds is None:
+        await interaction.response.send_message(embed=embeds.STATIC['invalid_mute_duration'], ephemeral=True)
+        return
+    
+    if not users and not joined_minutes:
+        await interaction.response.send_message(embed=embeds.STATIC['mass_no_targets'], ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    
+    guild = interaction.guild
+    unmute_time = datetime.datetime.now() + datetime.timedelta(seconds=duration_seconds)
+    targets, skipped = await resolve_mass_targets(interaction, users, joined_minutes, members_only=True)
+    
+    async def mute(member):
+        await member.timeout(until=unmute_time, reason=f"[MASS] {reason} | Par: {interaction.user}")
+        mutes.add(guild.id, member.id, unmute_time, reason, interaction.user.id)
+        punishment_scheduler.schedule('mute', mutes.key(guild.id, member.id), unmute_time.timestamp())
+    
+    await run_mass_action('massmute', "Mute en masse", interaction, targets, skipped, mute, reason)
+
+@bot.tree.command(name="masswarn", description="Avertir plusieurs membres d'un coup")
+@app_commands.describe(
+    users="IDs ou mentions des membres à avertir",
+    joined_minutes="Avertir les membres arrivés depuis N minutes",
+    reason="Raison de l'avertissement"
+)
+async def masswarn_slash(interaction: discord.Interaction, users: str = None,
+                         joined_minutes: app_commands.Range[int, 1, 1440] = None,
+                         reason: str = "Aucune raison spécifiée"):
+    if not interaction.user.guild_permissions.manage_messages:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_messages'], ephemeral=True)
+        return
+    
+    if not users and not joined_minutes:
+        await interaction.response.send_message(embed=embeds.STATIC['mass_no_targets'], ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    
+    targets, skipped = await resolve_mass_targets(interaction, users, joined_minutes, members_only=True)
+    
+    async def warn(member):
+        warn_count = add_warning(interaction.guild.id, member.id, reason, interaction.user.id)
+        # Le MP est facultatif : son échec ne doit pas relancer (et doubler) l'avertissement
+        try:
+            dm_embed = embeds.warn_dm(
+                guild=interaction.guild.name, reason=reason, moderator=interaction.user, count=warn_count
+            )
+            await timed(moderation_timings, 'masswarn.dm', member.send(embed=dm_embed), DM_TIMEOUT)
+        except (discord.HTTPException, asyncio.TimeoutError) as e:
+            metrics.swallow('masswarn.dm', e)
+    
+    await run_mass_action('masswarn', "Avertissement en masse", interaction, targets, skipped, warn, reason)
 
 # Fonctions utilitaires
 def parse_duration(duration_str):
     """Parse une durée comme '1h', '30m', '7d'"""
-    import re
     match = re.match(r'(\d+)([mhdw])', duration_str.lower())
     if not match:
         return None
@@ -629,96 +970,232 @@ def parse_duration(duration_str):
     return amount * multipliers.get(unit, 0)
 
 # Tâches automatiques
+async def lift_punishment(kind: str, key: str):
+    """Lever un ban ou un mute temporaire arrivé à échéance"""
+    if kind == 'ban':
+        ban_data = bans.pop(key)
+        if ban_data is None:
+            return
+        try:
+            guild = bot.get_guild(ban_data['guild_id'])
+            if guild:
+                await guild.unban(discord.Object(id=ban_data['user_id']), reason="Fin du bannissement temporaire")
+        except Exception as e:
+            metrics.swallow('lift_punishment.ban', e)
+    else:
+        mute_data = mutes.pop(key)
+        if mute_data is None:
+            return
+        try:
+            guild = bot.get_guild(mute_data['guild_id'])
+            if guild:
+                # Le membre n'est pas forcément en cache (profils lean/minimal)
+                user = guild.get_member(mute_data['user_id']) or await guild.fetch_member(mute_data['user_id'])
+                await user.timeout(until=None, reason="Fin du mute temporaire")
+        except Exception as e:
+            metrics.swallow('lift_punishment.mute', e)
+
+@metrics.timed('check_temp_punishments')
+async def check_temp_punishments(due):
+    """Lever les bans/mutes temporaires arrivés à échéance (appelé par le planificateur)"""
+    semaphore = asyncio.Semaphore(UNPUNISH_CONCURRENCY)
+    
+    async def run(kind, key):
+        async with semaphore:
+            await lift_punishment(kind, key)
+    
+    await asyncio.gather(*(run(kind, key) for kind, key in due))
+
+punishment_scheduler = ExpiryScheduler(check_temp_punishments)
+
 @tasks.loop(minutes=1)
-async def check_temp_punishments():
-    """Vérifier les bans/mutes temporaires"""
-    now = datetime.datetime.now()
-    
-    # Vérifier les bans temporaires
-    to_unban = []
-    for ban_key, ban_data in banned_users.items():
-        unban_time = datetime.datetime.fromisoformat(ban_data['unban_time'])
-        if now >= unban_time:
-            to_unban.append(ban_key)
-            try:
-                guild = bot.get_guild(ban_data['guild_id'])
-                if guild:
-                    await guild.unban(discord.Object(id=ban_data['user_id']), reason="Fin du bannissement temporaire")
-            except:
-                pass
-    
-    for ban_key in to_unban:
-        del banned_users[ban_key]
-    
-    # Vérifier les mutes temporaires
-    to_unmute = []
-    for mute_key, mute_data in muted_users.items():
-        unmute_time = datetime.datetime.fromisoformat(mute_data['unmute_time'])
-        if now >= unmute_time:
-            to_unmute.append(mute_key)
-            try:
-                guild = bot.get_guild(mute_data['guild_id'])
-                user = guild.get_member(mute_data['user_id'])
-                if guild and user:
-                    await user.timeout(until=None, reason="Fin du mute temporaire")
-            except:
-                pass
-    
-    for mute_key in to_unmute:
-        del muted_users[mute_key]
+async def evict_caches():
+    """Purge des cooldowns d'XP terminés et des classements inactifs"""
+    now = time.time()
+    xp_cooldowns.evict(now)
+    user_store.leaderboards.evict(now)
+    level_up_dispatcher.evict_buckets()
+    spam_detector.evict_idle(now)
+
+@tasks.loop(seconds=30)
+async def flush_raid_digests():
+    """Bienvenues groupées des raids en cours, et fin des raids"""
+    for digest in raid_detector.take_digests():
+        guild = bot.get_guild(digest.guild_id)
+        channel_id = guild_settings.get(str(digest.guild_id), {}).get('welcome_channel')
+        channel = guild.get_channel(channel_id) if guild and channel_id else None
+        if channel is None:
+            continue
+        others = digest.count - len(digest.mentions)
+        embed = embeds.welcome_digest(
+            guild=guild.name, count=digest.count,
+            mentions=", ".join(digest.mentions) + (f" et {others} autre(s)" if others else "")
+        )
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"❌ Erreur lors de l'envoi du résumé de bienvenue: {e}")
+    
+    for guild_id in raid_detector.take_ended(time.time()):
+        guild = bot.get_guild(guild_id)
+        if guild is not None:
+            print(f'✅ Fin du raid sur {guild.name}')
+            await announce_raid(guild, embeds.STATIC['raid_ended'])
+
+@tasks.loop(hours=1)
+async def reconcile_guild_stats():
+    """Recalcul complet des compteurs de /serverinfo, au cas où des événements auraient été manqués"""
+    drift = 0
+    for guild_id in guild_stats.guild_ids():
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            guild_stats.forget(guild_id)
+            continue
+        drift += rebuild_guild_stats(guild) + user_store.rebuild_totals(str(guild_id))
+        await asyncio.sleep(0)  # Un serveur à la fois, sans bloquer la boucle
+    if drift:
+        print(f'🔁 Compteurs /serverinfo: {drift} écart(s) corrigé(s)')
 
 @tasks.loop(minutes=5)
 async def save_data_task():
     """Sauvegarde automatique des données"""
-    save_data()
+    await save_data()
+
+def shard_latencies():
+    """(shard_id, latence) des shards de ce processus"""
+    return getattr(bot, 'latencies', None) or [(0, bot.latency)]
+
+@tasks.loop(seconds=30)
+async def report_shard_stats():
+    """Rapport de ce processus pour le coordinateur (launcher.py)"""
+    report = {
+        'label': shard_layout.label,
+        'pid': os.getpid(),
+        'guilds': len(bot.guilds),
+        'members_cached': len(bot.users),
+        'user_records': len(user_store),
+        'xp_processed': xp_pipeline.processed,
+        'latencies': [[shard_id, latency] for shard_id, latency in shard_latencies()]
+    }
+    await asyncio.to_thread(write_report, SHARD_STATS_DIR, shard_layout, report)
+
+def render_metrics() -> str:
+    return metrics.render_prometheus(moderation_timings.summary())
+
+@tasks.loop(seconds=15)
+async def export_metrics():
+    """Écrit les mesures au format Prometheus dans METRICS_FILE"""
+    await asyncio.to_thread(write_text, METRICS_FILE, render_metrics())
+
+async def start_metrics_export():
+    """Échantillonnage du retard de boucle et export (fichier et/ou port), si les mesures sont activées"""
+    global metrics_server
+    if not metrics.enabled:
+        return
+    metrics.start_lag_sampler()
+    metrics.gauge('xp_queue_depth', lambda: xp_pipeline.depth)
+    metrics.gauge('user_records', lambda: len(user_store))
+    metrics.gauge('scheduled_punishments', lambda: len(punishment_scheduler))
+    metrics.gauge('guilds', lambda: len(bot.guilds))
+    metrics.gauge('cached_users', lambda: len(bot.users))
+    metrics.gauge('member_lru', lambda: len(member_lru))
+    metrics.gauge('gateway_latency_seconds', lambda: bot.latency)
+    if METRICS_FILE:
+        export_metrics.start()
+        print(f'📊 Mesures exportées dans {METRICS_FILE}')
+    if METRICS_PORT and metrics_server is None:
+        try:
+            metrics_server = await serve_prometheus(render_metrics, int(METRICS_PORT))
+            print(f'📊 Mesures servies sur http://127.0.0.1:{METRICS_PORT}/metrics')
+        except OSError as e:
+            print(f'❌ Impossible de servir les mesures sur le port {METRICS_PORT}: {e}')
 
 # Commandes d'avertissements supplémentaires
 
+WARNINGS_PAGE_SIZE = 10
+
+def build_warnings_embed(title: str, thumbnail: str, entries, page: int, show_member: bool):
+    """Page d'une liste d'avertissements (du plus ancien au plus récent)"""
+    pages = max(1, -(-len(entries) // WARNINGS_PAGE_SIZE))
+    start = page * WARNINGS_PAGE_SIZE
+    
+    embed = discord.Embed(
+        title=title,
+        description=f"**{len(entries)}** avertissement(s) au total",
+        color=0xff9900
+    )
+    embed.set_thumbnail(url=thumbnail)
+    
+    for warning in entries[start:start + WARNINGS_PAGE_SIZE]:
+        moderator = bot.get_user(warning.moderator)
+        mod_name = moderator.name if moderator else "Modérateur inconnu"
+        member = f"**Membre:** <@{warning.user_id}>\n" if show_member else ""
+        embed.add_field(
+            name=f"#{warning.id} • {mod_name}",
+            value=f"{member}**Raison:** {warning.reason}\n**Date:** <t:{int(warning.date)}:d>",
+            inline=False
+        )
+    
+    embed.set_footer(text=f"Page {page + 1}/{pages}")
+    return embed
+
 @bot.tree.command(name="warnings", description="Voir les avertissements d'un membre")
-@app_commands.describe(user="Le membre dont voir les avertissements")
-async def warnings_slash(interaction: discord.Interaction, user: discord.Member = None):
-    if user is None:
+@app_commands.describe(
+    user="Le membre dont voir les avertissements",
+    moderator="Seulement les avertissements donnés par ce modérateur",
+    days="Seulement ceux des N derniers jours",
+    page="Page (10 avertissements par page)"
+)
+async def warnings_slash(interaction: discord.Interaction, user: discord.Member = None, moderator: discord.Member = None,
+                         days: app_commands.Range[int, 1, 3650] = None, page: int = 1):
+    if user is None and moderator is None:
         user = interaction.user
     
-    user_id = str(user.id)
-    guild_id = str(interaction.guild.id)
-    init_user(user_id, guild_id)
-    
-    warnings = user_data[user_id][guild_id].get('warnings', [])
+    since = time.time() - days * 86400 if days else None
+    entries = warning_log.guild(interaction.guild.id).query(
+        user_id=user.id if user else None,
+        moderator=moderator.id if moderator else None,
+        since=since
+    )
+    subject = user or moderator
     
-    if not warnings:
+    if not entries:
         embed = discord.Embed(
             title="✅ Aucun avertissement",
-            description=f"**{user.display_name}** n'a aucun avertissement sur ce serveur.",
+            description=f"**{user.display_name}** n'a aucun avertissement sur ce serveur." if user and not (moderator or days)
+            else "Aucun avertissement ne correspond à ces critères.",
             color=0x00ff88
         )
-        embed.set_thumbnail(url=user.display_avatar.url)
+        embed.set_thumbnail(url=subject.display_avatar.url)
         await interaction.response.send_message(embed=embed)
         return
     
-    embed = discord.Embed(
-        title=f"⚠️ Avertissements de {user.display_name}",
-        description=f"**{len(warnings)}** avertissement(s) au total",
-        color=0xff9900
-    )
-    embed.set_thumbnail(url=user.display_avatar.url)
+    title = f"⚠️ Avertissements de {user.display_name}" if user else f"⚠️ Avertissements donnés par {moderator.display_name}"
+    view = PageView(lambda page: build_warnings_embed(title, subject.display_avatar.url, entries, page, show_member=user is None),
+                    len(entries), WARNINGS_PAGE_SIZE, page - 1)
     
-    for i, warning in enumerate(warnings[:10], 1):  # Limiter à 10 pour éviter les embeds trop longs
-        try:
-            moderator = bot.get_user(warning['moderator'])
-            mod_name = moderator.name if moderator else "Modérateur inconnu"
-        except:
-            mod_name = "Modérateur inconnu"
-        
-        date = datetime.datetime.fromisoformat(warning['date'])
-        embed.add_field(
-            name=f"#{warning['id']} • {mod_name}",
-            value=f"**Raison:** {warning['reason']}\n**Date:** <t:{int(date.timestamp())}:d>",
-            inline=False
-        )
+    await interaction.response.send_message(embed=view.render(view.page), view=view)
+
+@bot.tree.command(name="delwarn", description="Supprimer un avertissement")
+@app_commands.describe(warning_id="Numéro de l'avertissement (#id dans /warnings)")
+async def delwarn_slash(interaction: discord.Interaction, warning_id: int):
+    if not interaction.user.guild_permissions.manage_messages:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_messages'], ephemeral=True)
+        return
+    
+    warning = warning_log.guild(interaction.guild.id).remove(warning_id)
+    if warning is None:
+        await interaction.response.send_message(embed=embeds.STATIC['warning_not_found'], ephemeral=True)
+        return
     
-    if len(warnings) > 10:
-        embed.set_footer(text=f"... et {len(warnings) - 10} autre(s) avertissement(s)")
+    embed = discord.Embed(
+        title="🗑️ Avertissement supprimé",
+        description=f"L'avertissement **#{warning.id}** a été supprimé",
+        color=0x00ff88
+    )
+    embed.add_field(name="👤 Utilisateur", value=f"<@{warning.user_id}> (`{warning.user_id}`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value=interaction.user.mention, inline=True)
+    embed.add_field(name="📝 Raison", value=warning.reason, inline=False)
     
     await interaction.response.send_message(embed=embed)
 
@@ -726,20 +1203,10 @@ async def warnings_slash(interaction: discord.Interaction, user: discord.Member
 @app_commands.describe(user="Le membre dont effacer les avertissements")
 async def clearwarns_slash(interaction: discord.Interaction, user: discord.Member):
     if not interaction.user.guild_permissions.manage_messages:
-        embed = discord.Embed(
-            title="❌ Permission manquante",
-            description="Vous n'avez pas la permission de gérer les messages.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_messages'], ephemeral=True)
         return
     
-    user_id = str(user.id)
-    guild_id = str(interaction.guild.id)
-    init_user(user_id, guild_id)
-    
-    old_warnings = len(user_data[user_id][guild_id].get('warnings', []))
-    user_data[user_id][guild_id]['warnings'] = []
+    old_warnings = warning_log.guild(interaction.guild.id).clear_user(user.id)
     
     embed = discord.Embed(
         title="🗑️ Avertissements effacés",
@@ -779,7 +1246,9 @@ async def userinfo_slash(interaction: discord.Interaction, user: discord.Member
         discord.Status.dnd: "🔴 Ne pas déranger",
         discord.Status.offline: "⚫ Hors ligne"
     }
-    embed.add_field(name="📊 Statut", value=status_emojis.get(user.status, "❓ Inconnu"), inline=True)
+    # Sans l'intent des présences, tout le monde paraîtrait hors ligne
+    status = status_emojis.get(user.status, "❓ Inconnu") if bot.intents.presences else "❓ Non suivi"
+    embed.add_field(name="📊 Statut", value=status, inline=True)
     
     # Rôles
     if len(user.roles) > 1:  # Exclure @everyone
@@ -811,8 +1280,8 @@ async def userinfo_slash(interaction: discord.Interaction, user: discord.Member
     # Informations XP si disponible
     user_id = str(user.id)
     guild_id = str(interaction.guild.id)
-    if user_id in user_data and guild_id in user_data[user_id]:
-        data = user_data[user_id][guild_id]
+    data = user_store.get(guild_id, user_id)
+    if data is not None:
         embed.add_field(name="📊 Niveau", value=f"**{data['level']}**", inline=True)
         embed.add_field(name="⭐ XP", value=f"**{data['xp']:,}**", inline=True)
         embed.add_field(name="💬 Messages", value=f"**{data['messages_sent']:,}**", inline=True)
@@ -824,20 +1293,56 @@ async def userinfo_slash(interaction: discord.Interaction, user: discord.Member
 
 @bot.tree.command(name="info", description="Affiche un message embed")
 async def info(interaction: discord.Interaction):
-    embed = discord.Embed(
-        title="Information",
-        description="Voici un exemple d'embed envoyé par une commande slash",
-        color=discord.Color.blue()
-    )
-    embed.add_field(name="Auteur", value=interaction.user.mention)
-    embed.set_footer(text="Footer de l'embed")
-    embed.set_thumbnail(url="https://i.imgur.com/9B6F2GZ.png")  # Exemple d'image
+    embed = embeds.info(author=interaction.user.mention)
 
     await interaction.response.send_message(embed=embed)
 
+# Compteurs de /serverinfo (tenus à jour par les événements, voir plus bas)
+guild_stats = GuildStats()
+
+def channel_kind(channel) -> Optional[str]:
+    if isinstance(channel, discord.TextChannel):
+        return 'text'
+    if isinstance(channel, discord.VoiceChannel):
+        return 'voice'
+    return None
+
+def rebuild_guild_stats(guild) -> int:
+    """Recalcule depuis zéro les compteurs d'un serveur (les membres seulement s'ils sont en cache)"""
+    kinds = [channel_kind(channel) for channel in guild.channels]
+    drift = guild_stats.rebuild_channels(guild.id, kinds.count('text'), kinds.count('voice'))
+    if guild.chunked:
+        bots = sum(1 for member in guild.members if member.bot)
+        drift += guild_stats.rebuild_members(guild.id, len(guild.members) - bots, bots)
+    return drift
+
+async def ensure_guild_counts(interaction: discord.Interaction):
+    """Compteurs du serveur ; les membres sont comptés une seule fois, ensuite suivis par les événements"""
+    guild = interaction.guild
+    if guild_stats.get(guild.id) is None:
+        rebuild_guild_stats(guild)
+    counts = guild_stats.get(guild.id)
+    if counts.members_known:
+        return counts
+    if await ensure_chunked(interaction):
+        rebuild_guild_stats(guild)
+    elif cache_profile.name == 'minimal':
+        # Comptage sans remplir le cache de discord.py
+        if not interaction.response.is_done():
+            await interaction.response.defer()
+        try:
+            members = await asyncio.wait_for(guild.chunk(cache=False), CHUNK_TIMEOUT)
+        except asyncio.TimeoutError as e:
+            metrics.swallow('ensure_guild_counts', e)
+        else:
+            bots = sum(1 for member in members if member.bot)
+            guild_stats.rebuild_members(guild.id, len(members) - bots, bots)
+    return counts
+
 @bot.tree.command(name="serverinfo", description="Affiche les informations du serveur")
 async def serverinfo_slash(interaction: discord.Interaction):
     guild = interaction.guild
+    counts = await ensure_guild_counts(interaction)
     
     embed = discord.Embed(
         title=f"🏰 Informations de {guild.name}",
@@ -849,25 +1354,22 @@ async def serverinfo_slash(interaction: discord.Interaction):
     
     # Informations de base
     embed.add_field(name="🆔 ID", value=f"`{guild.id}`", inline=True)
-    embed.add_field(name="👑 Propriétaire", value=guild.owner.mention if guild.owner else "Inconnu", inline=True)
+    embed.add_field(name="👑 Propriétaire", value=f"<@{guild.owner_id}>", inline=True)
     embed.add_field(name="📅 Créé le", value=f"<t:{int(guild.created_at.timestamp())}:D>", inline=True)
     
-    # Statistiques des membres
-    humans = len([m for m in guild.members if not m.bot])
-    bots = len([m for m in guild.members if m.bot])
-    
+    # Statistiques des membres (humains/bots inconnus si le comptage a échoué)
     embed.add_field(name="👥 Membres", value=f"**{guild.member_count}** total", inline=True)
-    embed.add_field(name="👤 Humains", value=f"**{humans}**", inline=True)
-    embed.add_field(name="🤖 Bots", value=f"**{bots}**", inline=True)
+    if counts.members_known:
+        embed.add_field(name="👤 Humains", value=f"**{counts.humans}**", inline=True)
+        embed.add_field(name="🤖 Bots", value=f"**{counts.bots}**", inline=True)
+    else:
+        embed.add_field(name="👤 Humains", value="*non chargé*", inline=True)
+        embed.add_field(name="🤖 Bots", value="*non chargé*", inline=True)
     
     # Channels
-    text_channels = len([c for c in guild.channels if isinstance(c, discord.TextChannel)])
-    voice_channels = len([c for c in guild.channels if isinstance(c, discord.VoiceChannel)])
-    categories = len(guild.categories)
-    
-    embed.add_field(name="💬 Salons texte", value=f"**{text_channels}**", inline=True)
-    embed.add_field(name="🔊 Salons vocaux", value=f"**{voice_channels}**", inline=True)
-    embed.add_field(name="📁 Catégories", value=f"**{categories}**", inline=True)
+    embed.add_field(name="💬 Salons texte", value=f"**{counts.text_channels}**", inline=True)
+    embed.add_field(name="🔊 Salons vocaux", value=f"**{counts.voice_channels}**", inline=True)
+    embed.add_field(name="📁 Catégories", value=f"**{len(guild.categories)}**", inline=True)
     
     # Autres infos
     embed.add_field(name="🎭 Rôles", value=f"**{len(guild.roles)}**", inline=True)
@@ -883,9 +1385,7 @@ async def serverinfo_slash(interaction: discord.Interaction):
         )
     
     # Statistiques du bot sur ce serveur
-    guild_id = str(guild.id)
-    guild_users = sum(1 for user_id, guilds in user_data.items() if guild_id in guilds)
-    total_xp = sum(guilds[guild_id]['xp'] for user_id, guilds in user_data.items() if guild_id in guilds)
+    guild_users, total_xp = user_store.totals(str(guild.id))
     
     if guild_users > 0:
         embed.add_field(
@@ -897,7 +1397,7 @@ async def serverinfo_slash(interaction: discord.Interaction):
     embed.set_footer(text=f"Demandé par {interaction.user.display_name}")
     embed.timestamp = datetime.datetime.now()
     
-    await interaction.response.send_message(embed=embed)
+    await reply(interaction, embed=embed)
 
 @bot.tree.command(name="rank", description="Affiche votre rang sur le serveur")
 async def rank_slash(interaction: discord.Interaction, user: discord.Member = None):
@@ -906,32 +1406,20 @@ async def rank_slash(interaction: discord.Interaction, user: discord.Member = No
     
     user_id = str(user.id)
     guild_id = str(interaction.guild.id)
-    init_user(user_id, guild_id)
-    
-    # Calculer le rang
-    all_users = []
-    for uid, guilds in user_data.items():
-        if guild_id in guilds:
-            all_users.append((uid, guilds[guild_id]['xp'], guilds[guild_id]['level']))
-    
-    all_users.sort(key=lambda x: x[1], reverse=True)  # Trier par XP
-    
-    user_rank = next((i + 1 for i, (uid, _, _) in enumerate(all_users) if uid == user_id), None)
+    data = user_store.view(guild_id, user_id)
     
+    # Calculer le rang (un membre sans fiche est classé avec 0 XP)
+    index = user_store.rank_index(guild_id)
+    user_rank = index.rank(user_id)
+    ranked = len(index)
     if user_rank is None:
-        embed = discord.Embed(
-            title="❌ Aucune données",
-            description="Aucune donnée trouvée pour cet utilisateur.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
-        return
+        user_rank = index.rank_for_xp(data['xp'])
+        ranked += 1
     
-    data = user_data[user_id][guild_id]
     current_level = data['level']
     current_xp = data['xp']
-    xp_for_current = xp_for_level(current_level - 1) if current_level > 1 else 0
-    xp_for_next = xp_for_level(current_level)
+    xp_for_current = xp_for_level(current_level - 1, guild_id) if current_level > 1 else 0
+    xp_for_next = xp_for_level(current_level, guild_id)
     xp_progress = current_xp - xp_for_current
     xp_needed = xp_for_next - xp_for_current
     
@@ -942,7 +1430,7 @@ async def rank_slash(interaction: discord.Interaction, user: discord.Member = No
     
     embed = discord.Embed(
         title=f"{rank_emoji} Rang de {user.display_name}",
-        description=f"Position **#{user_rank}** sur {len(all_users)} utilisateurs",
+        description=f"Position **#{user_rank}** sur {ranked} utilisateurs",
         color=0xf1c40f if user_rank <= 3 else 0x3498db
     )
     embed.set_thumbnail(url=user.display_avatar.url)
@@ -967,7 +1455,7 @@ async def rank_slash(interaction: discord.Interaction, user: discord.Member = No
     
     # Différence avec le joueur suivant/précédent
     if user_rank > 1:
-        prev_user_xp = all_users[user_rank - 2][1]
+        prev_user_xp = index.xp_at(user_rank - 1)
         xp_diff = prev_user_xp - current_xp
         embed.add_field(name="⬆️ XP pour le rang supérieur", value=f"**{xp_diff:,}** XP", inline=True)
     
@@ -975,50 +1463,286 @@ async def rank_slash(interaction: discord.Interaction, user: discord.Member = No
     
     await interaction.response.send_message(embed=embed)
 
+# Configuration du serveur
+
+@bot.tree.command(name="levelup", description="Configure les notifications de level up")
+@app_commands.describe(
+    mode="Où annoncer les level ups",
+    channel="Salon dédié (mode salon uniquement, sinon le salon du message)"
+)
+@app_commands.choices(mode=[
+    app_commands.Choice(name="Salon", value="channel"),
+    app_commands.Choice(name="Message privé", value="dm"),
+    app_commands.Choice(name="Désactivé", value="off")
+])
+async def levelup_slash(interaction: discord.Interaction, mode: app_commands.Choice[str], channel: discord.TextChannel = None):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_guild'], ephemeral=True)
+        return
+    
+    settings = guild_settings.setdefault(str(interaction.guild.id), {})
+    settings['levelup_mode'] = mode.value
+    if channel is not None:
+        settings['levelup_channel'] = channel.id
+    else:
+        settings.pop('levelup_channel', None)
+    
+    embed = discord.Embed(
+        title="⚙️ Notifications de level up",
+        description=f"Mode: **{mode.name}**" + (f"\nSalon: {channel.mention}" if channel and mode.value == 'channel' else ""),
+        color=0x00ff88
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="modlog", description="Configure le salon de logs de modération")
+@app_commands.describe(channel="Salon qui reçoit une copie des sanctions (vide pour désactiver)")
+async def modlog_slash(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_guild'], ephemeral=True)
+        return
+    
+    settings = guild_settings.setdefault(str(interaction.guild.id), {})
+    if channel is not None:
+        settings['mod_log_channel'] = channel.id
+    else:
+        settings.pop('mod_log_channel', None)
+    
+    embed = discord.Embed(
+        title="⚙️ Logs de modération",
+        description=f"Salon: {channel.mention}" if channel else "Logs de modération désactivés",
+        color=0x00ff88
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="antiraid", description="Configure la détection des raids")
+@app_commands.describe(
+    enabled="Activer la détection",
+    joins="Arrivées dans la fenêtre pour déclencher le mode raid",
+    window="Fenêtre en secondes",
+    account_age_days="Âge (jours) en dessous duquel un compte est récent",
+    auto_timeout="Minutes de timeout des comptes récents pendant un raid (0 : désactivé)"
+)
+async def antiraid_slash(interaction: discord.Interaction, enabled: bool = True,
+                         joins: app_commands.Range[int, 2, 500] = None,
+                         window: app_commands.Range[int, 1, 600] = None,
+                         account_age_days: app_commands.Range[int, 0, 365] = None,
+                         auto_timeout: app_commands.Range[int, 0, 40320] = None):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_guild'], ephemeral=True)
+        return
+    
+    settings = guild_settings.setdefault(str(interaction.guild.id), {}).setdefault('antiraid', {})
+    settings['enabled'] = enabled
+    for key, value in (('joins', joins), ('window', window), ('account_age_days', account_age_days), ('auto_timeout', auto_timeout)):
+        if value is not None:
+            settings[key] = value
+    config = config_from_settings(settings)
+    
+    embed = discord.Embed(
+        title="⚙️ Anti-raid",
+        description=f"Détection: **{'activée' if config.enabled else 'désactivée'}**",
+        color=0x00ff88
+    )
+    embed.add_field(name="🚪 Seuil", value=f"{config.joins} arrivées en {config.window:g} s", inline=True)
+    embed.add_field(name="🐣 Comptes récents", value=f"moins de {config.account_age_days:g} jour(s)", inline=True)
+    embed.add_field(name="🔇 Timeout auto", value=f"{config.auto_timeout:g} min" if config.auto_timeout else "désactivé", inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="antispam", description="Configure la détection du spam")
+@app_commands.describe(
+    enabled="Activer le mute automatique",
+    messages="Messages tolérés dans la fenêtre",
+    window="Fenêtre en secondes",
+    duplicates="Messages identiques (parmi les 5 derniers, en 30 s) pour déclencher",
+    mute_minutes="Durée du mute automatique en minutes"
+)
+async def antispam_slash(interaction: discord.Interaction, enabled: bool = True,
+                         messages: app_commands.Range[int, 2, 50] = None,
+                         window: app_commands.Range[int, 1, 120] = None,
+                         duplicates: app_commands.Range[int, 2, 5] = None,
+                         mute_minutes: app_commands.Range[int, 1, 40320] = None):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_manage_guild'], ephemeral=True)
+        return
+    
+    settings = guild_settings.setdefault(str(interaction.guild.id), {})
+    antispam = dict(settings.get('antispam', {}), enabled=enabled)
+    for key, value in (('messages', messages), ('window', window), ('duplicates', duplicates), ('mute_minutes', mute_minutes)):
+        if value is not None:
+            antispam[key] = value
+    settings['antispam'] = antispam
+    spam_configs.pop(interaction.guild.id, None)
+    config = get_spam_config(interaction.guild.id)
+    
+    embed = discord.Embed(
+        title="⚙️ Anti-spam",
+        description=f"Mute automatique: **{'activé' if config.enabled else 'désactivé'}**",
+        color=0x00ff88
+    )
+    embed.add_field(name="💬 Flood", value=f"plus de {config.messages} messages en {config.window:g} s", inline=True)
+    embed.add_field(name="🔁 Répétitions", value=f"{config.duplicates} messages identiques en {config.duplicate_window:g} s", inline=True)
+    embed.add_field(name="🔇 Mute", value=f"{config.mute_minutes:g} min", inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# Statistiques internes
+def format_timings(items) -> str:
+    lines = [
+        f"`{name}` ×{h.count:,} • p50 {h.quantile(0.5) * 1000:.1f} ms • p99 {h.quantile(0.99) * 1000:.1f} ms • max {h.max * 1000:.0f} ms"
+        for name, h in items
+    ]
+    return "\n".join(lines) or "Aucune mesure"
+
+@bot.tree.command(name="botstats", description="Statistiques internes du bot (latences, erreurs)")
+async def botstats_slash(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message(embed=embeds.STATIC['missing_permissions'], ephemeral=True)
+        return
+    
+    uptime = int(time.time() - metrics.started)
+    embed = discord.Embed(
+        title="📊 Statistiques du bot",
+        description=f"En ligne depuis **{uptime // 3600} h {uptime % 3600 // 60:02d}**"
+                    + ("" if metrics.enabled else "\nMesures de latence désactivées (`METRICS=0`)"),
+        color=0x3498db
+    )
+    
+    if metrics.enabled:
+        embed.add_field(name="⏱️ Commandes", value=format_timings(metrics.top('command.', 6)), inline=False)
+        embed.add_field(name="📨 Événements", value=format_timings(metrics.top('event.', 4)), inline=False)
+        tasks_timings = [(name, metrics.histograms[name]) for name in ('save_data', 'check_temp_punishments', 'xp_batch')
+                         if name in metrics.histograms]
+        embed.add_field(name="⚙️ Tâches", value=format_timings(tasks_timings), inline=False)
+        lag = metrics.histograms.get('loop.lag')
+        if lag is not None:
+            embed.add_field(
+                name="🔁 Retard de la boucle",
+                value=f"p50 {lag.quantile(0.5) * 1000:.1f} ms • p99 {lag.quantile(0.99) * 1000:.1f} ms • max {lag.max * 1000:.0f} ms",
+                inline=False
+            )
+    
+    steps = sorted(moderation_timings.summary().items(), key=lambda item: item[1]['count'], reverse=True)[:5]
+    if steps:
+        embed.add_field(name="🔨 Modération", value="\n".join(
+            f"`{step}` ×{s['count']} • p50 {s['p50'] * 1000:.0f} ms • max {s['max'] * 1000:.0f} ms • {s['timeouts']} timeout(s)"
+            for step, s in steps
+        ), inline=False)
+    
+    swallowed = sorted(metrics.swallowed.items(), key=lambda item: item[1], reverse=True)
+    embed.add_field(
+        name=f"⚠️ Exceptions ignorées ({sum(metrics.swallowed.values()):,})",
+        value="\n".join(f"`{site}` {error} ×{count:,}" for (site, error), count in swallowed[:6]) or "Aucune",
+        inline=False
+    )
+    
+    embed.add_field(name="👥 Fiches en mémoire", value=f"**{len(user_store):,}**", inline=True)
+    embed.add_field(name="📬 File d'XP", value=f"**{xp_pipeline.depth}**", inline=True)
+    embed.add_field(name="📶 Latence gateway", value=f"**{bot.latency * 1000:.0f} ms**", inline=True)
+    embed.add_field(
+        name=f"🗃️ Cache ({cache_profile.name})",
+        value=f"**{len(bot.users):,}** utilisateur(s) • {sum(guild.chunked for guild in bot.guilds)}/{len(bot.guilds)} serveur(s) chargé(s) • "
+              f"LRU {len(member_lru):,} ({member_lru.hits:,} hits, {member_lru.fetched:,} récupérés)",
+        inline=False
+    )
+    
+    if shard_layout.mode != 'single':
+        latencies = shard_latencies()
+        embed.add_field(
+            name=f"🧩 Shards de ce processus ({len(latencies)})",
+            value=" • ".join(f"#{shard_id} {latency * 1000:.0f} ms" for shard_id, latency in latencies[:20]),
+            inline=False
+        )
+    if shard_layout.partitioned:
+        cluster = await asyncio.to_thread(read_cluster, SHARD_STATS_DIR)
+        if cluster is not None:
+            value = (f"**{cluster['processes']}** processus • **{cluster['guilds']:,}** serveurs • "
+                     f"**{cluster['user_records']:,}** fiches • **{cluster['xp_processed']:,}** messages traités")
+            if cluster['stale']:
+                value += f"\n⚠️ Sans nouvelles de {', '.join(cluster['stale'])}"
+            embed.add_field(name="🌐 Tous les processus", value=value, inline=False)
+    embed.timestamp = datetime.datetime.now()
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def observe_command(interaction: discord.Interaction):
+    started = interaction.extras.get('started')
+    if started is not None and interaction.command is not None:
+        metrics.observe(f'command.{interaction.command.qualified_name}', time.perf_counter() - started)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    observe_command(interaction)
+
 # Gestion d'erreurs globale
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    observe_command(interaction)
     if isinstance(error, app_commands.MissingPermissions):
-        embed = discord.Embed(
-            title="❌ Permissions manquantes",
-            description="Vous n'avez pas les permissions nécessaires pour utiliser cette commande.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['missing_permissions'])
     elif isinstance(error, app_commands.CommandOnCooldown):
         embed = discord.Embed(
             title="⏰ Cooldown",
             description=f"Cette commande est en cooldown. Réessayez dans {error.retry_after:.1f} secondes.",
             color=0xff9900
         )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embed)
     elif isinstance(error, app_commands.BotMissingPermissions):
-        embed = discord.Embed(
-            title="❌ Bot sans permissions",
-            description="Je n'ai pas les permissions nécessaires pour exécuter cette commande.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['bot_missing_permissions'])
     else:
-        embed = discord.Embed(
-            title="❌ Erreur",
-            description="Une erreur s'est produite lors de l'exécution de la commande.",
-            color=0xff0000
-        )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await send_error(interaction, embeds.STATIC['command_error'])
+        metrics.swallow(f"command.{interaction.command.qualified_name if interaction.command else '?'}",
+                        getattr(error, 'original', error))
         print(f"Erreur de commande slash: {error}")
 
 # Événement pour les nouveaux membres
+raid_detector = RaidDetector()
+
+async def timeout_new_account(member, minutes: float):
+    """Met en timeout un compte récent arrivé pendant un raid"""
+    until = datetime.datetime.now() + datetime.timedelta(minutes=minutes)
+    try:
+        await member.timeout(until=until, reason="[ANTI-RAID] Compte récent pendant un raid")
+    except discord.HTTPException as e:
+        print(f"❌ Anti-raid: impossible de mute {member.id}: {e}")
+        return
+    mutes.add(member.guild.id, member.id, until, "Anti-raid : compte récent", bot.user.id)
+    punishment_scheduler.schedule('mute', mutes.key(member.guild.id, member.id), until.timestamp())
+
+async def announce_raid(guild, embed):
+    try:
+        await send_mod_log(guild, embed)
+    except discord.HTTPException as e:
+        print(f"❌ Anti-raid: impossible d'envoyer l'alerte: {e}")
+
 @bot.event
+@metrics.timed('event.on_member_join')
 async def on_member_join(member):
-    # Initialiser les données du nouvel utilisateur
-    user_id = str(member.id)
     guild_id = str(member.guild.id)
-    init_user(user_id, guild_id)
+    settings = guild_settings.get(guild_id, {})
+    guild_stats.member_joined(member.guild.id, member.bot)
+    
+    # Détection des raids (coût constant par arrivée)
+    config = config_from_settings(settings.get('antiraid'))
+    if config.enabled:
+        verdict = raid_detector.on_join(member.guild.id, member.created_at.timestamp(), time.time(), config)
+        if verdict.started:
+            print(f'🚨 Raid détecté sur {member.guild.name}')
+            spawn(announce_raid(member.guild, embeds.raid_started(
+                joins=raid_detector.raid_joins(member.guild.id), window=f"{config.window:g}",
+                timestamp=datetime.datetime.now()
+            )))
+        if verdict.raid:
+            # Pas de bienvenue individuelle pendant un raid
+            if verdict.young and config.auto_timeout > 0:
+                spawn(timeout_new_account(member, config.auto_timeout))
+            if 'welcome_channel' in settings:
+                raid_detector.queue_welcome(member.guild.id, member.mention)
+            return
+    
+    # Pas de fiche à l'arrivée : elle sera créée au premier gain d'XP ou avertissement
     
     # Message de bienvenue (optionnel)
-    if guild_id in guild_settings and 'welcome_channel' in guild_settings[guild_id]:
-        channel_id = guild_settings[guild_id]['welcome_channel']
+    if 'welcome_channel' in settings:
+        channel_id = settings['welcome_channel']
         channel = member.guild.get_channel(channel_id)
         if channel:
             embed = discord.Embed(
@@ -1041,6 +1765,37 @@ async def on_member_join(member):
             
             await channel.send(embed=embed)
 
+# Suivi des compteurs de /serverinfo
+@bot.event
+async def on_raw_member_remove(payload):
+    # Version « raw » : déclenchée même si le membre n'était pas en cache
+    guild_stats.member_left(payload.guild_id, payload.user.bot)
+    # Le classement en cache exclut les membres partis : il sera reconstruit
+    user_store.leaderboards.invalidate(str(payload.guild_id))
+
+@bot.event
+async def on_guild_channel_create(channel):
+    guild_stats.channel_added(channel.guild.id, channel_kind(channel))
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_stats.channel_removed(channel.guild.id, channel_kind(channel))
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if channel_kind(before) != channel_kind(after):
+        guild_stats.channel_removed(before.guild.id, channel_kind(before))
+        guild_stats.channel_added(after.guild.id, channel_kind(after))
+
+@bot.event
+async def on_guild_available(guild):
+    # Après une reconnexion complète, des événements ont pu être perdus : recompter au prochain /serverinfo
+    guild_stats.forget(guild.id)
+
+@bot.event
+async def on_guild_remove(guild):
+    guild_stats.forget(guild.id)
+
 # Fonction principale
 if __name__ == "__main__":
     print("🚀 Démarrage du bot...")
@@ -1049,4 +1804,4 @@ if __name__ == "__main__":
     
     # Remplacez par votre token de bot Discord
 
-    bot.run(TOKEN)
\ No newline at end of file
+    bot.run(TOKEN)
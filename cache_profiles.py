@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import discord
+
+
+# Profils d'intents et de cache
+class CacheProfile(NamedTuple):
+    """Intents et politique de cache de discord.py (CACHE_PROFILE)"""
+    name: str
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    chunk_guilds_at_startup: bool
+    max_messages: Optional[int]
+    chunk_on_demand: bool  # Charger les membres d'un serveur au premier /serverinfo ou /leaderboard
+
+
+def _without_presences() -> discord.Intents:
+    intents = discord.Intents.all()
+    intents.presences = False
+    return intents
+
+
+def _joined_only() -> discord.MemberCacheFlags:
+    # Membres arrivés depuis la connexion : /massban joined_minutes et la fin des raids en ont besoin
+    flags = discord.MemberCacheFlags.none()
+    flags.joined = True
+    return flags
+
+
+PROFILES = ('full', 'lean', 'minimal')
+
+
+def make_profile(name: str) -> CacheProfile:
+    """'full' : tout en cache (comportement historique).
+    'lean' : sans présences ni cache de messages ; les membres d'un serveur ne sont
+    chargés qu'à son premier /serverinfo ou /leaderboard.
+    'minimal' : comme lean, sans jamais charger de serveur ni recevoir les
+    événements inutilisés (frappe, vocal, invitations...).
+    """
+    if name == 'full':
+        return CacheProfile(name, discord.Intents.all(), discord.MemberCacheFlags.all(), True, 1000, False)
+    if name == 'lean':
+        return CacheProfile(name, _without_presences(), _joined_only(), False, None, True)
+    if name == 'minimal':
+        intents = _without_presences()
+        intents.typing = False
+        intents.voice_states = False
+        intents.invites = False
+        intents.webhooks = False
+        intents.integrations = False
+        intents.guild_scheduled_events = False
+        intents.auto_moderation = False
+        return CacheProfile(name, intents, _joined_only(), False, None, False)
+    raise ValueError(f"CACHE_PROFILE inconnu: {name}")
+
+
+# Membres récupérés à la demande
+class MemberLRU:
+    """Petit cache LRU des membres absents du cache de discord.py.
+
+    Les ids introuvables (membres partis) sont aussi retenus, pour ne pas
+    les redemander à chaque page de classement.
+    """
+
+    MISSING = object()
+
+    def __init__(self, size: int = 2_000, ttl: float = 600.0):
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # (guild_id, user_id) -> (membre, date)
+        self.hits = 0
+        self.fetched = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, guild_id: int, user_id: int, now: float):
+        """Membre en cache, MISSING s'il est connu comme absent, None s'il faut le demander"""
+        key = (guild_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, guild_id: int, user_id: int, member, now: float):
+        key = (guild_id, user_id)
+        self._entries[key] = (member, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    async def resolve(self, guild, user_ids: Iterable[int], timeout: float = 2.0) -> Dict[int, "discord.Member"]:
+        """Membres du serveur pour ces ids : cache de discord.py, puis LRU, puis requête à la gateway"""
+        now = time.monotonic()
+        found, missing = {}, []
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member is None:
+                member = self.get(guild.id, user_id, now)
+                if member is not None:
+                    self.hits += 1
+            if member is None:
+                missing.append(user_id)
+            elif member is not self.MISSING:
+                found[user_id] = member
+
+        # Une requête par tranche de 100 ids (limite de Discord), sans remplir le cache de discord.py
+        for start in range(0, len(missing), 100):
+            batch = missing[start:start + 100]
+            try:
+                members = await asyncio.wait_for(guild.query_members(user_ids=batch, cache=False), timeout)
+            except (asyncio.TimeoutError, discord.ClientException):
+                break  # Dégradé : les noms manquants restent affichés par id
+            self.fetched += len(members)
+            for member in members:
+                found[member.id] = member
+            for user_id in batch:
+                self.put(guild.id, user_id, found.get(user_id, self.MISSING), now)
+        return found
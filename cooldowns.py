@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+
+
+# Cooldown de gain d'XP
+class CooldownTable:
+    """Dernier gain d'XP (secondes epoch) par serveur puis par utilisateur.
+
+    Les ids sont les entiers Discord : aucun str ni datetime n'est créé sur le
+    chemin des messages. Les entrées expirées sont purgées par `evict`.
+    """
+
+    __slots__ = ('cooldown', '_guilds')
+
+    def __init__(self, cooldown: float = 60.0):
+        self.cooldown = cooldown
+        self._guilds: Dict[int, Dict[int, float]] = {}
+
+    def __len__(self):
+        return sum(len(users) for users in self._guilds.values())
+
+    def try_acquire(self, guild_id: int, user_id: int, now: float) -> bool:
+        """Retourne True (et enregistre `now`) si l'utilisateur n'est plus en cooldown"""
+        users = self._guilds.get(guild_id)
+        if users is None:
+            users = self._guilds[guild_id] = {}
+        last = users.get(user_id)
+        if last is not None and now - last < self.cooldown:
+            return False
+        users[user_id] = now
+        return True
+
+    def last(self, guild_id: int, user_id: int) -> Optional[float]:
+        users = self._guilds.get(guild_id)
+        return users.get(user_id) if users is not None else None
+
+    def evict(self, now: float) -> int:
+        """Supprime les entrées dont le cooldown est terminé ; retourne leur nombre"""
+        limit = now - self.cooldown
+        evicted = 0
+        for guild_id in list(self._guilds):
+            users = self._guilds[guild_id]
+            expired = [user_id for user_id, last in users.items() if last <= limit]
+            for user_id in expired:
+                del users[user_id]
+            evicted += len(expired)
+            if not users:
+                del self._guilds[guild_id]
+        return evicted
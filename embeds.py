@@ -0,0 +1,186 @@
+import datetime
+from typing import Dict, Optional
+
+import discord
+
+
+# Réponses fixes : construites une fois, envoyées telles quelles (ne pas modifier)
+def _static(title: str, description: str, color: int = 0xff0000) -> discord.Embed:
+    return discord.Embed(title=title, description=description, color=color)
+
+STATIC: Dict[str, discord.Embed] = {
+    'missing_ban_members': _static("❌ Permission manquante", "Vous n'avez pas la permission de bannir des membres."),
+    'missing_moderate_members': _static("❌ Permission manquante", "Vous n'avez pas la permission de modérer les membres."),
+    'missing_manage_messages': _static("❌ Permission manquante", "Vous n'avez pas la permission de gérer les messages."),
+    'missing_manage_guild': _static("❌ Permission manquante", "Vous n'avez pas la permission de gérer le serveur."),
+    'hierarchy_ban': _static("❌ Hiérarchie insuffisante", "Vous ne pouvez pas bannir ce membre (rôle supérieur ou égal)."),
+    'invalid_ban_duration': _static("❌ Durée invalide", "Format valide: 1h, 1d, 1w (h=heures, d=jours, w=semaines)"),
+    'invalid_mute_duration': _static("❌ Durée invalide", "Format valide: 10m, 1h, 1d (m=minutes, h=heures, d=jours)"),
+    'forbidden_ban': _static("❌ Erreur", "Je n'ai pas les permissions pour bannir ce membre."),
+    'forbidden_mute': _static("❌ Erreur", "Je n'ai pas les permissions pour mute ce membre."),
+    'forbidden_unmute': _static("❌ Erreur", "Je n'ai pas les permissions pour démute ce membre."),
+    'mass_no_targets': _static("❌ Aucune cible", "Indiquez des IDs ou mentions, ou `joined_minutes`."),
+    'mass_empty': _static("❌ Aucune cible", "Aucun membre ne correspond (les membres au rôle supérieur ou égal au vôtre sont ignorés)."),
+    'raid_ended': _static("✅ Fin du raid", "Le rythme des arrivées est redevenu normal, les bienvenues reprennent.", 0x00ff88),
+    'warning_not_found': _static("❌ Avertissement introuvable", "Aucun avertissement avec ce numéro sur ce serveur."),
+    'no_data': _static("❌ Aucune données", "Aucune donnée trouvée pour cet utilisateur."),
+    'missing_permissions': _static("❌ Permissions manquantes", "Vous n'avez pas les permissions nécessaires pour utiliser cette commande."),
+    'bot_missing_permissions': _static("❌ Bot sans permissions", "Je n'ai pas les permissions nécessaires pour exécuter cette commande."),
+    'command_error': _static("❌ Erreur", "Une erreur s'est produite lors de l'exécution de la commande."),
+}
+
+HELP_CATEGORIES = [
+    ("👤 **Profil & XP**", "`/profile` - Voir son profil\n`/rank` - Voir son rang\n`/leaderboard` - Classement du serveur"),
+    ("🔨 **Modération**", "`/ban` - Bannir un membre\n`/tempban` - Ban temporaire\n`/mute` - Rendre muet temporairement\n`/unmute` - Démute un membre\n`/massban` `/massmute` `/masswarn` - Sanctions en masse"),
+    ("⚠️ **Avertissements**", "`/warn` - Avertir un membre\n`/warnings` - Voir les avertissements\n`/delwarn` - Supprimer un avertissement\n`/clearwarns` - Effacer les avertissements"),
+    ("ℹ️ **Utilitaires**", "`/help` - Cette aide\n`/serverinfo` - Infos du serveur\n`/userinfo` - Infos d'un utilisateur\n`/levelup` - Notifications de level up\n`/modlog` - Salon de logs de modération\n`/antiraid` - Détection des raids\n`/antispam` - Détection du spam\n`/botstats` - Statistiques internes (admin)")
+]
+
+_help_embed: Optional[discord.Embed] = None
+
+def help_embed(bot_avatar_url: str) -> discord.Embed:
+    """Embed de /help, construit au premier appel (l'avatar du bot n'est connu qu'une fois connecté)"""
+    global _help_embed
+    if _help_embed is None:
+        embed = discord.Embed(
+            title="📚 Commandes disponibles",
+            description="Voici toutes les commandes disponibles du bot:",
+            color=0x3498db
+        )
+        for category, commands in HELP_CATEGORIES:
+            embed.add_field(name=category, value=commands, inline=False)
+        embed.set_footer(text="MultiGame Bot")
+        embed.set_thumbnail(url=bot_avatar_url)
+        _help_embed = embed
+    return _help_embed
+
+
+# Embeds paramétrés : construits directement à chaque appel (plus rapide qu'un gabarit formaté)
+RED = discord.Colour(0xff0000)
+ORANGE = discord.Colour(0xff9900)
+GREEN = discord.Colour(0x00ff88)
+BLUE = discord.Colour(0x3498db)
+
+
+# Commande /info
+INFO_THUMBNAIL = "https://i.imgur.com/9B6F2GZ.png"  # Exemple d'image
+
+def info(*, author: str) -> discord.Embed:
+    embed = discord.Embed(
+        title="Information",
+        description="Voici un exemple d'embed envoyé par une commande slash",
+        colour=BLUE
+    )
+    embed.add_field(name="Auteur", value=author, inline=True)
+    embed.set_footer(text="Footer de l'embed")
+    embed.set_thumbnail(url=INFO_THUMBNAIL)
+    return embed
+
+
+# Confirmations de modération (salon) et MP à l'utilisateur sanctionné
+def ban(*, user, mention: str, user_id: int, moderator: str, reason: str, thumbnail: str,
+        timestamp: Optional[datetime.datetime] = None) -> discord.Embed:
+    embed = discord.Embed(title="🔨 Membre banni", description=f"**{user}** a été banni du serveur", colour=RED, timestamp=timestamp)
+    embed.add_field(name="👤 Utilisateur", value=f"{mention} (`{user_id}`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value=moderator, inline=True)
+    embed.add_field(name="📝 Raison", value=reason, inline=False)
+    embed.set_thumbnail(url=thumbnail)
+    return embed
+
+def ban_dm(*, guild: str, reason: str, moderator: str) -> discord.Embed:
+    embed = discord.Embed(title="🔨 Vous avez été banni", description=f"Vous avez été banni de **{guild}**", colour=RED)
+    embed.add_field(name="Raison", value=reason, inline=False)
+    embed.add_field(name="Modérateur", value=moderator, inline=False)
+    return embed
+
+def _timed_sanction(title: str, description: str, end: str, mention: str, user_id: int, moderator: str,
+                    duration: str, until: int, reason: str, thumbnail: str) -> discord.Embed:
+    embed = discord.Embed(title=title, description=description, colour=ORANGE)
+    embed.add_field(name="👤 Utilisateur", value=f"{mention} (`{user_id}`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value=moderator, inline=True)
+    embed.add_field(name="⏱️ Durée", value=duration, inline=True)
+    embed.add_field(name=end, value=f"<t:{until}:F>", inline=True)
+    embed.add_field(name="📝 Raison", value=reason, inline=False)
+    embed.set_thumbnail(url=thumbnail)
+    return embed
+
+def _timed_sanction_dm(title: str, description: str, end: str, duration: str, until: int, reason: str) -> discord.Embed:
+    embed = discord.Embed(title=title, description=description, colour=ORANGE)
+    embed.add_field(name="Durée", value=duration, inline=True)
+    embed.add_field(name=end, value=f"<t:{until}:F>", inline=True)
+    embed.add_field(name="Raison", value=reason, inline=False)
+    return embed
+
+def tempban(*, user, mention: str, user_id: int, moderator: str, duration: str, until: int, reason: str,
+            thumbnail: str) -> discord.Embed:
+    return _timed_sanction("⏰ Bannissement temporaire", f"**{user}** a été banni temporairement", "🔚 Fin du ban",
+                           mention, user_id, moderator, duration, until, reason, thumbnail)
+
+def tempban_dm(*, guild: str, duration: str, until: int, reason: str) -> discord.Embed:
+    return _timed_sanction_dm("⏰ Bannissement temporaire", f"Vous avez été banni temporairement de **{guild}**",
+                              "Fin du ban", duration, until, reason)
+
+def mute(*, user, mention: str, user_id: int, moderator: str, duration: str, until: int, reason: str,
+         thumbnail: str) -> discord.Embed:
+    return _timed_sanction("🔇 Membre rendu muet", f"**{user}** a été rendu muet", "🔚 Fin du mute",
+                           mention, user_id, moderator, duration, until, reason, thumbnail)
+
+def mute_dm(*, guild: str, duration: str, until: int, reason: str) -> discord.Embed:
+    return _timed_sanction_dm("🔇 Vous avez été rendu muet", f"Vous avez été rendu muet sur **{guild}**",
+                              "Fin du mute", duration, until, reason)
+
+def warn(*, user, mention: str, user_id: int, moderator: str, count: int, reason: str, thumbnail: str,
+         timestamp: Optional[datetime.datetime] = None) -> discord.Embed:
+    embed = discord.Embed(title="⚠️ Avertissement donné", description=f"**{user}** a reçu un avertissement", colour=ORANGE, timestamp=timestamp)
+    embed.add_field(name="👤 Utilisateur", value=f"{mention} (`{user_id}`)", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value=moderator, inline=True)
+    embed.add_field(name="🔢 Total d'avertissements", value=f"**{count}**", inline=True)
+    embed.add_field(name="📝 Raison", value=reason, inline=False)
+    embed.set_thumbnail(url=thumbnail)
+    return embed
+
+def warn_dm(*, guild: str, reason: str, moderator, count: int) -> discord.Embed:
+    embed = discord.Embed(title="⚠️ Avertissement reçu", description=f"Vous avez reçu un avertissement sur **{guild}**", colour=ORANGE)
+    embed.add_field(name="Raison", value=reason, inline=False)
+    embed.add_field(name="Modérateur", value=moderator, inline=False)
+    embed.add_field(name="Total d'avertissements", value=count, inline=False)
+    return embed
+
+
+# Sanctions en masse
+def mass_progress(*, action: str, done: int, total: int, failed: int) -> discord.Embed:
+    return discord.Embed(
+        title=f"⏳ {action} en cours",
+        description=f"**{done}/{total}** membre(s) traité(s), {failed} échec(s)",
+        colour=BLUE
+    )
+
+def mass_done(*, action: str, done: int, failed: int, skipped: int, moderator: str, elapsed: str, reason: str,
+              timestamp: Optional[datetime.datetime] = None) -> discord.Embed:
+    embed = discord.Embed(title=f"✅ {action} terminé", colour=GREEN, timestamp=timestamp)
+    embed.add_field(name="✔️ Réussis", value=f"**{done}**", inline=True)
+    embed.add_field(name="❌ Échecs", value=f"**{failed}**", inline=True)
+    embed.add_field(name="⏭️ Ignorés", value=f"**{skipped}**", inline=True)
+    embed.add_field(name="🛡️ Modérateur", value=moderator, inline=True)
+    embed.add_field(name="⏱️ Durée d'exécution", value=f"{elapsed} s", inline=True)
+    embed.add_field(name="📝 Raison", value=reason, inline=False)
+    return embed
+
+
+# Anti-raid
+def raid_started(*, joins: int, window: str, timestamp: Optional[datetime.datetime] = None) -> discord.Embed:
+    return discord.Embed(
+        title="🚨 Raid détecté",
+        description=f"**{joins}** arrivées en moins de {window} s : les bienvenues sont regroupées jusqu'à la fin du raid.",
+        colour=RED,
+        timestamp=timestamp
+    )
+
+def welcome_digest(*, guild: str, count: int, mentions: str) -> discord.Embed:
+    embed = discord.Embed(
+        title="👋 Bienvenue aux nouveaux membres!",
+        description=f"**{count}** membre(s) viennent de rejoindre **{guild}** : {mentions}",
+        colour=GREEN
+    )
+    embed.add_field(name="ℹ️ Aide", value="Tapez `/help` pour voir toutes les commandes disponibles.", inline=False)
+    return embed
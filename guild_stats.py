@@ -0,0 +1,105 @@
+from typing import Dict, List, Optional
+
+
+# Compteurs de /serverinfo
+class GuildCounts:
+    """Membres (humains, bots) et salons (texte, vocaux) d'un serveur"""
+
+    __slots__ = ('humans', 'bots', 'text_channels', 'voice_channels', 'members_known')
+
+    def __init__(self):
+        self.humans = 0
+        self.bots = 0
+        self.text_channels = 0
+        self.voice_channels = 0
+        self.members_known = False  # Faux tant que les membres n'ont jamais été comptés
+
+
+class GuildStats:
+    """Compteurs par serveur, tenus à jour par les événements (arrivées, départs, salons).
+
+    Chaque événement coûte O(1). `rebuild_*` recalcule depuis zéro, pour
+    l'initialisation et la réconciliation ; l'écart corrigé est retourné.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, GuildCounts] = {}
+        self.rebuilds = 0
+        self.drift = 0  # valeurs corrigées par les reconstructions
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def get(self, guild_id: int) -> Optional[GuildCounts]:
+        return self._guilds.get(guild_id)
+
+    def guild_ids(self) -> List[int]:
+        return list(self._guilds)
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def _counts(self, guild_id: int) -> GuildCounts:
+        counts = self._guilds.get(guild_id)
+        if counts is None:
+            counts = self._guilds[guild_id] = GuildCounts()
+        return counts
+
+    def _record(self, drift: int) -> int:
+        self.rebuilds += 1
+        self.drift += drift
+        return drift
+
+    def rebuild_channels(self, guild_id: int, text: int, voice: int) -> int:
+        counts = self._guilds.get(guild_id)
+        if counts is None:
+            counts = self._counts(guild_id)
+            drift = 0  # Première construction : pas un écart
+        else:
+            drift = (counts.text_channels != text) + (counts.voice_channels != voice)
+        counts.text_channels = text
+        counts.voice_channels = voice
+        return self._record(drift)
+
+    def rebuild_members(self, guild_id: int, humans: int, bots: int) -> int:
+        counts = self._counts(guild_id)
+        drift = (counts.humans != humans) + (counts.bots != bots) if counts.members_known else 0
+        counts.humans = humans
+        counts.bots = bots
+        counts.members_known = True
+        return self._record(drift)
+
+    # Événements
+    def member_joined(self, guild_id: int, bot: bool):
+        counts = self._guilds.get(guild_id)
+        if counts is not None and counts.members_known:
+            if bot:
+                counts.bots += 1
+            else:
+                counts.humans += 1
+
+    def member_left(self, guild_id: int, bot: bool):
+        counts = self._guilds.get(guild_id)
+        if counts is not None and counts.members_known:
+            if bot:
+                counts.bots = max(0, counts.bots - 1)
+            else:
+                counts.humans = max(0, counts.humans - 1)
+
+    def channel_added(self, guild_id: int, kind: Optional[str]):
+        counts = self._guilds.get(guild_id)
+        if counts is None or kind is None:
+            return
+        if kind == 'text':
+            counts.text_channels += 1
+        elif kind == 'voice':
+            counts.voice_channels += 1
+
+    def channel_removed(self, guild_id: int, kind: Optional[str]):
+        counts = self._guilds.get(guild_id)
+        if counts is None or kind is None:
+            return
+        if kind == 'text':
+            counts.text_channels = max(0, counts.text_channels - 1)
+        elif kind == 'voice':
+            counts.voice_channels = max(0, counts.voice_channels - 1)
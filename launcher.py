@@ -0,0 +1,192 @@
+"""Lancement multi-processus : chaque processus porte une plage de shards
+
+Chaque processus (bot.py avec SHARD_MODE=process) ne sauvegarde que ses
+serveurs, dans sa propre partition (bot_data.shards-0-3.json...). Au premier
+lancement, une partition est créée à partir de bot_data.json filtré.
+Le coordinateur relance les processus arrêtés et agrège leurs statistiques
+dans shard_stats/cluster.json (affichées par /botstats).
+
+Pour changer le nombre de shards ou de processus, arrêter le coordinateur
+et réunir d'abord les partitions : python launcher.py --merge
+
+Usage : python launcher.py [--processes 4] [--shards 16] [--stagger 5]
+"""
+import argparse
+import glob
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+from sharding import (CLUSTER_FILE, ShardLayout, aggregate_reports, format_shard_ids, merge_states,
+                      partition_path, read_reports, split_shards)
+from storage import atomic_write, make_backend
+
+DATA_FILE = 'bot_data.json'
+REPORT_INTERVAL = 15.0   # Agrégation des rapports (s)
+PRINT_INTERVAL = 60.0    # Résumé dans la console (s)
+MAX_BACKOFF = 300.0      # Attente maximale avant de relancer un processus (s)
+
+
+def recommended_shards(token: str) -> int:
+    """Nombre de shards conseillé par Discord pour ce bot"""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (launcher, 0.1.0)"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)['shards']
+
+
+# Processus de shards
+class ShardProcess:
+    def __init__(self, index: int, layout: ShardLayout, stats_dir: str):
+        self.index = index
+        self.layout = layout
+        self.stats_dir = stats_dir
+        self.process = None
+        self.started = 0.0
+        self.backoff = 5.0
+        self.restart_at = 0.0
+
+    def env(self) -> dict:
+        env = dict(os.environ)
+        env.update({
+            'SHARD_MODE': 'process',
+            'SHARD_COUNT': str(self.layout.shard_count),
+            'SHARD_IDS': format_shard_ids(self.layout.shard_ids),
+            'SHARD_STATS_DIR': self.stats_dir
+        })
+        # Un export de mesures par processus
+        if os.getenv('METRICS_PORT'):
+            env['METRICS_PORT'] = str(int(os.environ['METRICS_PORT']) + self.index)
+        if os.getenv('METRICS_FILE'):
+            env['METRICS_FILE'] = partition_path(os.environ['METRICS_FILE'], self.layout)
+        return env
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, 'bot.py'], env=self.env())
+        self.started = time.monotonic()
+        print(f"🚀 Processus {self.index} (shards {format_shard_ids(self.layout.shard_ids)}) lancé, pid {self.process.pid}")
+
+    def check(self, now: float):
+        """Relance le processus s'il s'est arrêté, avec une attente croissante s'il plante en boucle"""
+        if self.process is not None and self.process.poll() is None:
+            if now - self.started > 600:
+                self.backoff = 5.0
+            return
+        if self.process is not None:
+            print(f"❌ Processus {self.index} arrêté (code {self.process.returncode}), relance dans {self.backoff:.0f} s")
+            self.process = None
+            self.restart_at = now + self.backoff
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+        if now >= self.restart_at:
+            self.start()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+def write_cluster(stats_dir: str, cluster: dict):
+    atomic_write(os.path.join(stats_dir, CLUSTER_FILE), json.dumps(cluster).encode('utf-8'))
+
+
+def run(args):
+    shard_count = args.shards or recommended_shards(os.getenv("DISCORD_TOKEN"))
+    ranges = split_shards(shard_count, args.processes)
+    print(f"🧩 {shard_count} shard(s) sur {len(ranges)} processus")
+    os.makedirs(args.stats_dir, exist_ok=True)
+
+    processes = [ShardProcess(i, ShardLayout('process', shard_count, shard_ids), args.stats_dir)
+                 for i, shard_ids in enumerate(ranges)]
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Connexions espacées : Discord limite les identifications simultanées
+    for process in processes:
+        process.start()
+        time.sleep(args.stagger)
+
+    last_report = last_print = time.monotonic()
+    while not stopping:
+        time.sleep(1.0)
+        now = time.monotonic()
+        for process in processes:
+            process.check(now)
+        if now - last_report < REPORT_INTERVAL:
+            continue
+        last_report = now
+        cluster = aggregate_reports(read_reports(args.stats_dir), time.time())
+        write_cluster(args.stats_dir, cluster)
+        if now - last_print >= PRINT_INTERVAL:
+            last_print = now
+            print(f"📊 {cluster['processes']} processus, {cluster['guilds']:,} serveur(s), "
+                  f"{cluster['user_records']:,} fiche(s), {cluster['xp_processed']:,} message(s) traité(s)"
+                  + (f", sans nouvelles de {', '.join(cluster['stale'])}" if cluster['stale'] else ""))
+
+    print("🛑 Arrêt des processus...")
+    for process in processes:
+        process.stop()
+    for process in processes:
+        if process.process is not None:
+            process.process.wait()
+
+
+# Réunion des partitions
+def merge(kind: str, database_file: str) -> int:
+    """Réunit les partitions dans le fichier commun et les renomme en .merged"""
+    main_path = database_file if kind == 'sqlite' else DATA_FILE
+    root, ext = os.path.splitext(main_path)
+    paths = sorted(glob.glob(f"{root}.shards-*{ext}"))
+    if not paths:
+        print("ℹ️ Aucune partition à réunir")
+        return 0
+
+    states = []
+    for path in paths:
+        backend = make_backend(kind, path, path)
+        try:
+            states.append(backend.load())
+        finally:
+            backend.close()
+    target = make_backend(kind, DATA_FILE, database_file)
+    try:
+        count = target.write_full(merge_states(states))
+    finally:
+        target.close()
+    for path in paths:
+        os.replace(path, f"{path}.merged")
+    print(f"✅ {len(paths)} partition(s) réunie(s) dans {main_path}: {count} membre(s)")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lance le bot sur plusieurs processus (une plage de shards chacun)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shards', type=int, default=0, help="nombre total de shards (0 : valeur conseillée par Discord)")
+    parser.add_argument('--stagger', type=float, default=5.0, help="secondes entre deux lancements")
+    parser.add_argument('--stats-dir', default=os.getenv("SHARD_STATS_DIR", "shard_stats"))
+    parser.add_argument('--merge', action='store_true', help="réunir les partitions dans le fichier commun, puis quitter")
+    args = parser.parse_args()
+    load_dotenv()
+
+    if args.merge:
+        merge(os.getenv("STORAGE_BACKEND", "json"), os.getenv("DATABASE_FILE", "bot_data.db"))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import bisect
+import math
+from typing import Callable, List, Optional
+
+
+# Courbes de niveaux
+class LevelCurve:
+    """Courbe triangulaire (comme DraftBot) : le niveau n demande step * n(n+1)/2 XP cumulée.
+
+    Niveau et seuils sont calculés directement, sans boucle, avec une racine
+    carrée entière.
+    """
+
+    __slots__ = ('step',)
+
+    def __init__(self, step: int = 100):
+        self.step = step
+
+    def level(self, xp: int) -> int:
+        # Plus grand k tel que step * k(k+1)/2 <= xp, c'est-à-dire k(k+1) <= 2xp // step
+        if xp < 0:
+            return 1
+        m = 2 * xp // self.step
+        return max(1, (math.isqrt(4 * m + 1) - 1) // 2)
+
+    def xp_for_level(self, level: int) -> int:
+        if level <= 0:
+            return 0
+        return self.step * level * (level + 1) // 2
+
+
+class TableCurve:
+    """Courbe personnalisée : seuils cumulés précalculés, niveau trouvé par bisect.
+
+    `thresholds[n]` est l'XP cumulée nécessaire pour le niveau n (thresholds[0] == 0).
+    Si une fonction de seuil est fournie, la table s'agrandit à la demande.
+    """
+
+    __slots__ = ('_thresholds', '_threshold_fn')
+
+    def __init__(self, thresholds: Optional[List[int]] = None,
+                 threshold_fn: Optional[Callable[[int], int]] = None, size: int = 256):
+        if thresholds is None:
+            thresholds = [threshold_fn(n) for n in range(size + 1)]
+        self._thresholds = list(thresholds)
+        self._threshold_fn = threshold_fn
+
+    def _extend(self, xp: int):
+        # Doubler la table tant que le dernier seuil ne dépasse pas l'XP demandée
+        while self._threshold_fn is not None and self._thresholds[-1] <= xp:
+            start = len(self._thresholds)
+            self._thresholds.extend(self._threshold_fn(n) for n in range(start, 2 * start))
+
+    def level(self, xp: int) -> int:
+        if xp >= self._thresholds[-1]:
+            self._extend(xp)
+        return max(1, bisect.bisect_right(self._thresholds, xp) - 1)
+
+    def xp_for_level(self, level: int) -> int:
+        if level <= 0:
+            return 0
+        if level >= len(self._thresholds):
+            if self._threshold_fn is None:
+                return self._thresholds[-1]
+            return self._threshold_fn(level)
+        return self._thresholds[level]
+
+
+DEFAULT_CURVE = LevelCurve(100)
+
+
+def curve_from_settings(config: dict):
+    """Construit une courbe depuis guild_settings[guild_id]['level_curve']
+
+    Formats acceptés : {'step': 150} ou {'thresholds': [0, 100, 300, ...]}
+    """
+    if 'thresholds' in config:
+        return TableCurve(config['thresholds'])
+    return LevelCurve(int(config.get('step', 100)))
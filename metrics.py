@@ -0,0 +1,188 @@
+import asyncio
+import bisect
+import functools
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Histogrammes de latence
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Durées réparties dans des seaux fixes (format Prometheus), en secondes.
+
+    Coût constant par mesure et mémoire fixe, quel que soit le nombre
+    d'appels ; les quantiles sont estimés par interpolation dans le seau.
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # dernier seau : +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.max
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = min(self.bounds[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+# Registre des mesures
+class Metrics:
+    """Latences des commandes et événements, retard de la boucle, exceptions ignorées.
+
+    Désactivé, `observe` se réduit à un test de booléen et `timed` ne décore
+    rien. Les exceptions ignorées sont comptées dans tous les cas (chemin rare).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.histograms: Dict[str, Histogram] = {}
+        self.swallowed: Dict[Tuple[str, str], int] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def observe(self, name: str, duration: float):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(duration)
+
+    def timed(self, name: str):
+        """Décorateur : durée de chaque appel d'une coroutine, même en cas d'exception.
+
+        Désactivé à la décoration (METRICS=0 au démarrage), la coroutine est
+        rendue telle quelle : aucun surcoût.
+        """
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def swallow(self, site: str, error: BaseException):
+        """Compte une exception volontairement ignorée à l'endroit `site`"""
+        key = (site, type(error).__name__)
+        self.swallowed[key] = self.swallowed.get(key, 0) + 1
+
+    def swallow_results(self, site: str, results: Iterable):
+        """Compte les exceptions d'un `gather(..., return_exceptions=True)`"""
+        for result in results:
+            if isinstance(result, BaseException):
+                self.swallow(site, result)
+
+    def gauge(self, name: str, read: Callable[[], float]):
+        """Valeur lue au moment de l'export (taille de file, nombre de fiches...)"""
+        self._gauges[name] = read
+
+    def gauges(self) -> Dict[str, float]:
+        return {name: read() for name, read in self._gauges.items()}
+
+    # Retard de la boucle d'événements
+    def start_lag_sampler(self, interval: float = 0.5):
+        if self.enabled and (self._lag_task is None or self._lag_task.done()):
+            self._lag_task = asyncio.create_task(self._sample_lag(interval))
+
+    async def _sample_lag(self, interval: float):
+        # Un sommeil qui dure plus que prévu mesure le temps où la boucle était bloquée
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.observe('loop.lag', max(0.0, time.perf_counter() - start - interval))
+
+    def top(self, prefix: str, count: int) -> List[Tuple[str, Histogram]]:
+        """Les histogrammes d'un préfixe ('command.', 'event.'...) les plus appelés"""
+        items = [(name[len(prefix):], h) for name, h in self.histograms.items() if name.startswith(prefix)]
+        items.sort(key=lambda item: item[1].count, reverse=True)
+        return items[:count]
+
+    # Export au format texte Prometheus
+    def render_prometheus(self, summaries: Optional[Dict[str, dict]] = None) -> str:
+        lines = [
+            "# TYPE bot_uptime_seconds gauge",
+            f"bot_uptime_seconds {time.time() - self.started:.0f}",
+            "# TYPE bot_latency_seconds histogram"
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'bot_latency_seconds_bucket{{name="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'bot_latency_seconds_bucket{{name="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'bot_latency_seconds_sum{{name="{name}"}} {histogram.sum:.6f}')
+            lines.append(f'bot_latency_seconds_count{{name="{name}"}} {histogram.count}')
+
+        lines.append("# TYPE bot_swallowed_exceptions_total counter")
+        for (site, error), count in sorted(self.swallowed.items()):
+            lines.append(f'bot_swallowed_exceptions_total{{site="{site}",type="{error}"}} {count}')
+
+        # Étapes de modération (StepTimings) : quantiles déjà calculés
+        if summaries:
+            lines.append("# TYPE bot_moderation_step_seconds summary")
+            for step, summary in sorted(summaries.items()):
+                lines.append(f'bot_moderation_step_seconds{{step="{step}",quantile="0.5"}} {summary["p50"]:.6f}')
+                lines.append(f'bot_moderation_step_seconds{{step="{step}",quantile="0.99"}} {summary["p99"]:.6f}')
+                lines.append(f'bot_moderation_step_seconds_count{{step="{step}"}} {summary["count"]}')
+
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f"# TYPE bot_{name} gauge")
+            lines.append(f"bot_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def write_text(path: str, text: str):
+    """Écriture atomique : un lecteur (node_exporter...) ne voit jamais un fichier à moitié écrit"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+async def serve_prometheus(render: Callable[[], str], port: int, host: str = '127.0.0.1') -> asyncio.AbstractServer:
+    """Serveur HTTP minimal : toute requête reçoit le texte de `render()`"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+            body = render().encode('utf-8')
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
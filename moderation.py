@@ -0,0 +1,149 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Latences des étapes de modération
+class StepTimings:
+    """Dernières durées de chaque étape ('ban.dm', 'mute.action'...), en secondes"""
+
+    def __init__(self, keep: int = 256):
+        self.keep = keep
+        self._samples: Dict[str, deque] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def record(self, name: str, duration: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.keep)
+        samples.append(duration)
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[name] = {
+                'count': len(ordered),
+                'p50': ordered[len(ordered) // 2],
+                'p99': ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)],
+                'max': ordered[-1],
+                'timeouts': self.timeouts.get(name, 0)
+            }
+        return result
+
+
+async def timed(timings: StepTimings, name: str, aw: Awaitable, timeout: float) -> Any:
+    """Attend `aw` au plus `timeout` secondes et enregistre sa durée, même en cas d'échec"""
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError:
+        timings.timeouts[name] = timings.timeouts.get(name, 0) + 1
+        raise
+    finally:
+        timings.record(name, time.perf_counter() - start)
+
+
+async def after(first: asyncio.Future, grace: float, aw: Awaitable) -> Any:
+    """Attend `aw` une fois `first` terminé, ou au plus tard après `grace` secondes"""
+    await asyncio.wait({first}, timeout=grace)
+    return await aw
+
+
+# Sanctions en masse
+class BulkProgress:
+    """Avancement d'une action en masse"""
+
+    __slots__ = ('total', 'done', 'failed', 'retries', 'errors', 'started')
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0      # cibles traitées avec succès
+        self.failed = 0    # cibles abandonnées
+        self.retries = 0   # nouvelles tentatives (limitation de débit, erreurs serveur)
+        self.errors: List[Tuple[Any, BaseException]] = []
+        self.started = time.monotonic()
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def _retry_delay(error: BaseException, attempt: int, base_delay: float) -> Optional[float]:
+    """Délai avant nouvelle tentative, ou None si l'erreur est définitive"""
+    status = getattr(error, 'status', None)
+    if status == 429:
+        retry_after = getattr(error, 'retry_after', None)
+        return retry_after if retry_after else base_delay * 2 ** attempt
+    if isinstance(error, asyncio.TimeoutError) or (status is not None and status >= 500):
+        return base_delay * 2 ** attempt
+    return None
+
+
+async def run_bulk(targets: Iterable[Any], action: Callable[[Any], Awaitable[None]], *,
+                   concurrency: int = 4, retries: int = 3, base_delay: float = 1.0, timeout: float = 10.0,
+                   on_progress: Optional[Callable[[BulkProgress], Awaitable[None]]] = None,
+                   progress_every: float = 2.0) -> BulkProgress:
+    """Applique `action` à chaque cible avec `concurrency` tâches au plus.
+
+    Une limitation de débit (statut 429) met toute la file en pause pendant
+    le `retry_after` annoncé ; les erreurs serveur et les délais dépassés
+    sont retentés avec un recul exponentiel, les autres erreurs sont
+    définitives. `on_progress` est appelé au plus toutes les `progress_every`
+    secondes ; le bilan final est laissé à l'appelant.
+    """
+    targets = list(targets)
+    progress = BulkProgress(len(targets))
+    queue = iter(targets)
+    resume_at = 0.0
+    last_report = time.monotonic()
+    reporting = False
+
+    async def report():
+        nonlocal last_report, reporting
+        if on_progress is None or reporting:
+            return
+        reporting = True
+        last_report = time.monotonic()
+        try:
+            await on_progress(progress)
+        except Exception as e:
+            print(f"❌ Erreur lors de la mise à jour de la progression: {e}")
+        finally:
+            reporting = False
+
+    async def worker():
+        nonlocal resume_at
+        for target in queue:
+            attempt = 0
+            while True:
+                pause = resume_at - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                try:
+                    await asyncio.wait_for(action(target), timeout)
+                except Exception as e:
+                    delay = _retry_delay(e, attempt, base_delay)
+                    if delay is None or attempt >= retries:
+                        progress.failed += 1
+                        progress.errors.append((target, e))
+                        break
+                    attempt += 1
+                    progress.retries += 1
+                    if getattr(e, 'status', None) == 429:
+                        resume_at = max(resume_at, time.monotonic() + delay)
+                    else:
+                        await asyncio.sleep(delay)
+                else:
+                    progress.done += 1
+                    break
+            if time.monotonic() - last_report >= progress_every:
+                await report()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(targets))))))
+    return progress
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+# Limitation de débit par salon
+class TokenBucket:
+    """Seau à jetons : `rate` envois par seconde en moyenne, rafales de `capacity`"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Temps d'attente avant le prochain jeton (0 si disponible)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+# Envoi des notifications de level up
+class LevelUpDispatcher:
+    """Regroupe les level ups par destination (salon ou MP) et les envoie hors du chemin des messages.
+
+    Le premier level up d'une destination ouvre une fenêtre de `window`
+    secondes ; tous ceux qui arrivent pendant la fenêtre (ou pendant
+    l'attente d'un jeton) partent dans un seul envoi.
+    """
+
+    def __init__(self, send: Callable[[Any, List[Any]], Awaitable[None]],
+                 window: float = 2.0, rate: float = 0.5, burst: float = 2.0):
+        self._send = send
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self._pending: Dict[int, List[Any]] = {}
+        self._destinations: Dict[int, Any] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.submitted = 0
+        self.sent = 0
+
+    def submit(self, destination, level_up):
+        key = destination.id
+        self.submitted += 1
+        self._pending.setdefault(key, []).append(level_up)
+        self._destinations[key] = destination
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._flush(key))
+
+    async def _flush(self, key: int):
+        try:
+            await asyncio.sleep(self.window)
+            while self._pending.get(key):
+                now = time.monotonic()
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+                delay = bucket.delay(now)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                bucket.take()
+
+                level_ups = self._pending.pop(key)
+                try:
+                    await self._send(self._destinations[key], level_ups)
+                    self.sent += 1
+                except Exception as e:
+                    print(f"❌ Erreur lors de l'envoi d'une notification de level up: {e}")
+        finally:
+            del self._tasks[key]
+            if key not in self._pending:
+                self._destinations.pop(key, None)
+
+    def evict_buckets(self, idle: float = 300.0):
+        """Oublie les seaux pleins des destinations inactives"""
+        now = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if key not in self._tasks and now - bucket.updated > idle]:
+            del self._buckets[key]
@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+# Sanctions temporaires (mutes, bans)
+class PunishmentStore:
+    """Sanctions temporaires d'un type donné (mutes ou bans).
+
+    `records` garde le format sauvegardé ("{guild_id}_{user_id}" -> dict avec
+    la date de fin en ISO). À côté, un set d'ids entiers par serveur sert au
+    test d'appartenance sur le chemin des messages, et les dates de fin sont
+    gardées déjà converties en timestamps.
+    """
+
+    def __init__(self, time_key: str):
+        self.time_key = time_key  # 'unmute_time' ou 'unban_time'
+        self.records: Dict[str, dict] = {}
+        self._expiry: Dict[str, float] = {}
+        self._by_guild: Dict[int, Set[int]] = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def key(guild_id: int, user_id: int) -> str:
+        return f"{guild_id}_{user_id}"
+
+    def contains(self, guild_id: int, user_id: int) -> bool:
+        """Test sans allocation, utilisé pour chaque message"""
+        users = self._by_guild.get(guild_id)
+        return users is not None and user_id in users
+
+    def get(self, guild_id: int, user_id: int) -> Optional[dict]:
+        return self.records.get(self.key(guild_id, user_id))
+
+    def expiry(self, key: str) -> Optional[float]:
+        return self._expiry.get(key)
+
+    def add(self, guild_id: int, user_id: int, until: datetime.datetime, reason: str, moderator: int) -> dict:
+        record = {
+            'user_id': user_id,
+            'guild_id': guild_id,
+            self.time_key: until.isoformat(),
+            'reason': reason,
+            'moderator': moderator
+        }
+        self._index(self.key(guild_id, user_id), record, until.timestamp())
+        return record
+
+    def remove(self, guild_id: int, user_id: int) -> Optional[dict]:
+        return self.pop(self.key(guild_id, user_id))
+
+    def pop(self, key: str) -> Optional[dict]:
+        record = self.records.pop(key, None)
+        if record is None:
+            return None
+        del self._expiry[key]
+        users = self._by_guild.get(record['guild_id'])
+        if users is not None:
+            users.discard(record['user_id'])
+            if not users:
+                del self._by_guild[record['guild_id']]
+        return record
+
+    def load(self, records: Dict[str, dict]):
+        """Reconstruit les index depuis le format sauvegardé"""
+        self.records = {}
+        self._expiry.clear()
+        self._by_guild.clear()
+        for key, record in records.items():
+            until = datetime.datetime.fromisoformat(record[self.time_key]).timestamp()
+            self._index(key, record, until)
+
+    def _index(self, key: str, record: dict, until: float):
+        self.records[key] = record
+        self._expiry[key] = until
+        users = self._by_guild.get(record['guild_id'])
+        if users is None:
+            users = self._by_guild[record['guild_id']] = set()
+        users.add(record['user_id'])
+
+
+# Planification des fins de sanctions
+class ExpiryScheduler:
+    """File de priorité (min-heap) des échéances, servie par une seule tâche.
+
+    La tâche dort jusqu'à la prochaine échéance et se réveille plus tôt si une
+    échéance plus proche est ajoutée. Une annulation retire simplement la
+    clé de `_deadlines` ; l'entrée périmée est ignorée en sortie de tas.
+    """
+
+    def __init__(self, handler: Callable[[List[Tuple[str, str]]], Awaitable[None]], clock: Callable[[], float] = time.time):
+        self._handler = handler  # reçoit la liste des (type, clé) arrivés à échéance
+        self._clock = clock
+        self._heap: List[Tuple[float, str, str]] = []
+        self._deadlines: Dict[Tuple[str, str], float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, kind: str, key: str, deadline: float):
+        self._deadlines[(kind, key)] = deadline
+        heapq.heappush(self._heap, (deadline, kind, key))
+        if self._heap[0][0] == deadline:
+            self._wakeup.set()
+
+    def cancel(self, kind: str, key: str):
+        self._deadlines.pop((kind, key), None)
+
+    def next_deadline(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._deadlines.get((heap[0][1], heap[0][2])) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def pop_due(self, now: float) -> List[Tuple[str, str]]:
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, kind, key = heapq.heappop(heap)
+            if self._deadlines.get((kind, key)) == deadline:
+                del self._deadlines[(kind, key)]
+                due.append((kind, key))
+        return due
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            due = self.pop_due(self._clock())
+            if due:
+                try:
+                    await self._handler(due)
+                except Exception as e:
+                    print(f"❌ Erreur lors de la levée des sanctions: {e}")
+                continue
+
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self._clock())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
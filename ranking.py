@@ -0,0 +1,238 @@
+import bisect
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+# Index de classement par serveur
+class RankIndex:
+    """Classement d'un serveur trié par XP décroissante.
+
+    Les clés (-xp, user_id) sont rangées dans une liste de blocs triés de
+    `load` / 2 à 2 * `load` éléments : un changement d'XP ne décale qu'un
+    bloc, au lieu de toute la liste. Un arbre de Fenwick sur la taille des blocs donne
+    le rang et la n-ième clé en O(log n).
+    """
+
+    __slots__ = ('_blocks', '_maxes', '_tree', '_size', '_xp', 'load')
+
+    def __init__(self, items: Iterable[Tuple[str, int]] = (), load: int = 512):
+        self.load = load
+        self._xp: Dict[str, int] = {}
+        for user_id, xp in items:
+            self._xp[user_id] = xp
+        keys = sorted((-xp, user_id) for user_id, xp in self._xp.items())
+        self._blocks: List[List[Tuple[int, str]]] = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._maxes: List[Tuple[int, str]] = [block[-1] for block in self._blocks]
+        self._size = len(keys)
+        self._tree: Optional[List[int]] = None  # reconstruit après un découpage ou la disparition d'un bloc
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, user_id):
+        return user_id in self._xp
+
+    # Arbre de Fenwick sur la taille des blocs
+    def _build_tree(self) -> List[int]:
+        tree = [0] + [len(block) for block in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, block: int, delta: int):
+        tree = self._tree
+        if tree is None:
+            return
+        i = block + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _before(self, block: int) -> int:
+        """Nombre de clés dans les blocs précédant `block`"""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        total = 0
+        while block > 0:
+            total += tree[block]
+            block -= block & -block
+        return total
+
+    def _find(self, position: int) -> Tuple[int, int]:
+        """(bloc, position dans le bloc) de la clé de rang `position` (à partir de 0)"""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        block, step = 0, 1 << (len(tree).bit_length() - 1)
+        while step:
+            if block + step < len(tree) and tree[block + step] <= position:
+                block += step
+                position -= tree[block]
+            step >>= 1
+        return block, position
+
+    # Clés
+    def _insert(self, key: Tuple[int, str]):
+        blocks, maxes = self._blocks, self._maxes
+        self._size += 1
+        if not blocks:
+            blocks.append([key])
+            maxes.append(key)
+            self._tree = None
+            return
+        i = bisect.bisect_left(maxes, key)
+        if i == len(blocks):
+            i -= 1
+        block = blocks[i]
+        bisect.insort(block, key)
+        maxes[i] = block[-1]
+        if len(block) > 2 * self.load:
+            blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            maxes[i:i + 1] = [blocks[i][-1], blocks[i + 1][-1]]
+            self._tree = None
+        else:
+            self._tree_add(i, 1)
+
+    def _delete(self, key: Tuple[int, str]):
+        i = bisect.bisect_left(self._maxes, key)
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, key)]
+        self._size -= 1
+        if not block:
+            del self._blocks[i]
+            del self._maxes[i]
+            self._tree = None
+        elif len(block) < self.load // 2 and len(self._blocks) > 1:
+            # Bloc trop petit : fusionné avec un voisin (puis redécoupé s'il devient trop grand)
+            i = min(i, len(self._blocks) - 2)
+            merged = self._blocks[i] + self._blocks[i + 1]
+            parts = [merged[:self.load], merged[self.load:]] if len(merged) > 2 * self.load else [merged]
+            self._blocks[i:i + 2] = parts
+            self._maxes[i:i + 2] = [part[-1] for part in parts]
+            self._tree = None
+        else:
+            self._maxes[i] = block[-1]
+            self._tree_add(i, -1)
+
+    def _position(self, key) -> int:
+        """Nombre de clés strictement inférieures à `key`"""
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return self._size
+        return self._before(i) + bisect.bisect_left(self._blocks[i], key)
+
+    def update(self, user_id: str, xp: int):
+        """Insère ou déplace un utilisateur après un changement d'XP"""
+        old_xp = self._xp.get(user_id)
+        if old_xp == xp:
+            return
+        if old_xp is not None:
+            self._delete((-old_xp, user_id))
+        self._xp[user_id] = xp
+        self._insert((-xp, user_id))
+
+    def remove(self, user_id: str):
+        old_xp = self._xp.pop(user_id, None)
+        if old_xp is not None:
+            self._delete((-old_xp, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Rang (à partir de 1) de l'utilisateur, ou None s'il n'est pas classé"""
+        xp = self._xp.get(user_id)
+        if xp is None:
+            return None
+        return self._position((-xp, user_id)) + 1
+
+    def rank_for_xp(self, xp: int) -> int:
+        """Rang qu'aurait un utilisateur non classé avec cette XP (devant ses ex aequo)"""
+        return self._position((-xp,)) + 1
+
+    def xp_at(self, rank: int) -> Optional[int]:
+        """XP du joueur classé à la position donnée"""
+        if 1 <= rank <= self._size:
+            block, position = self._find(rank - 1)
+            return -self._blocks[block][position][0]
+        return None
+
+    def top(self, count: int, offset: int = 0) -> List[Tuple[str, int]]:
+        """Les `count` meilleurs utilisateurs à partir de `offset`, sous forme (user_id, xp)"""
+        result: List[Tuple[str, int]] = []
+        if offset >= self._size or count <= 0:
+            return result
+        block, position = self._find(offset)
+        while len(result) < count and block < len(self._blocks):
+            keys = self._blocks[block][position:position + count - len(result)]
+            result.extend((user_id, -neg_xp) for neg_xp, user_id in keys)
+            block, position = block + 1, 0
+        return result
+
+
+# Cache des classements
+class LeaderboardSnapshot(NamedTuple):
+    entries: List[Tuple[str, int, int, int]]  # (user_id, xp, level, messages_sent)
+    total: int      # utilisateurs classés encore présents sur le serveur (tous si all_time)
+    created: float
+    all_time: bool = False  # total compté sans savoir qui est parti (serveur hors cache)
+
+
+class LeaderboardCache:
+    """Top K matérialisé par serveur.
+
+    Un instantané reste valable tant qu'aucun changement d'XP n'atteint le
+    seuil du K-ième ou ne concerne un membre déjà dedans. Les instantanés
+    non consultés depuis `ttl` secondes sont évincés.
+    """
+
+    def __init__(self, size: int = 100, ttl: float = 600.0):
+        self.size = size
+        self.ttl = ttl
+        self._snapshots: Dict[str, LeaderboardSnapshot] = {}
+        self._members: Dict[str, Set[str]] = {}
+        self._thresholds: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(self, guild_id: str, now: float) -> Optional[LeaderboardSnapshot]:
+        snapshot = self._snapshots.get(guild_id)
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._last_used[guild_id] = now
+        return snapshot
+
+    def put(self, guild_id: str, snapshot: LeaderboardSnapshot):
+        self._snapshots[guild_id] = snapshot
+        self._members[guild_id] = {entry[0] for entry in snapshot.entries}
+        # Tant que le top n'est pas plein, tout changement peut y entrer
+        self._thresholds[guild_id] = snapshot.entries[-1][1] if len(snapshot.entries) >= self.size else -1
+        self._last_used[guild_id] = snapshot.created
+
+    def invalidate(self, guild_id: str):
+        self._snapshots.pop(guild_id, None)
+        self._members.pop(guild_id, None)
+        self._thresholds.pop(guild_id, None)
+        self._last_used.pop(guild_id, None)
+
+    def on_xp_change(self, guild_id: str, user_id: str, xp: int):
+        threshold = self._thresholds.get(guild_id)
+        if threshold is None:
+            return
+        if xp >= threshold or user_id in self._members[guild_id]:
+            self.invalidate(guild_id)
+
+    def on_new_member(self, guild_id: str, user_id: str):
+        """Nouvelle fiche (XP 0, membre présent) : elle compte dans le total de l'instantané"""
+        self.on_xp_change(guild_id, user_id, 0)
+        snapshot = self._snapshots.get(guild_id)
+        if snapshot is not None:
+            self._snapshots[guild_id] = snapshot._replace(total=snapshot.total + 1)
+
+    def evict(self, now: float) -> int:
+        idle = [guild_id for guild_id, last in self._last_used.items() if now - last > self.ttl]
+        for guild_id in idle:
+            self.invalidate(guild_id)
+        return len(idle)
@@ -0,0 +1,87 @@
+import datetime
+from typing import Any, Iterator, Union
+
+
+def _to_iso(value):
+    """Les dates sont gardées telles que lues (ISO) ; celles écrites par le bot sont des timestamps"""
+    if isinstance(value, float):
+        return datetime.datetime.fromtimestamp(value).isoformat()
+    return value
+
+
+# Fiche compacte d'un membre
+class UserRecord:
+    """Données XP d'un membre sur un serveur, sans dict par instance.
+
+    Les dates (last_xp_time, join_date) restent dans le format lu (ISO) ;
+    celles écrites par le bot sont des timestamps, convertis en ISO à la
+    sauvegarde (les analyser au chargement coûterait plusieurs µs par fiche).
+    L'accès façon dict (data['xp'], data.get('level')) reste disponible pour
+    le code existant. Les avertissements sont dans warning_log.
+    """
+
+    __slots__ = ('xp', 'level', 'messages_sent', 'last_xp_time', 'total_xp_gained', 'join_date')
+
+    FIELDS = ('xp', 'level', 'messages_sent', 'last_xp_time', 'total_xp_gained', 'join_date')
+
+    def __init__(self, xp: int = 0, level: int = 1, messages_sent: int = 0, last_xp_time: Union[float, str, None] = None,
+                 total_xp_gained: int = 0, join_date: Union[float, str, None] = None):
+        self.xp = xp
+        self.level = level
+        self.messages_sent = messages_sent
+        self.last_xp_time = last_xp_time
+        self.total_xp_gained = total_xp_gained
+        self.join_date = join_date
+
+    def __repr__(self):
+        return f"UserRecord({', '.join(f'{key}={self[key]!r}' for key in self)})"
+
+    def __eq__(self, other):
+        if isinstance(other, UserRecord):
+            return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+        return NotImplemented
+
+    # Accès façon dict
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def keys(self):
+        return list(self)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self else default
+
+    # Conversion vers / depuis le format sauvegardé
+    def to_dict(self) -> dict:
+        return {
+            'xp': self.xp,
+            'level': self.level,
+            'messages_sent': self.messages_sent,
+            'last_xp_time': _to_iso(self.last_xp_time),
+            'total_xp_gained': self.total_xp_gained,
+            'join_date': _to_iso(self.join_date)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserRecord":
+        return cls(
+            data.get('xp', 0),
+            data.get('level', 1),
+            data.get('messages_sent', 0),
+            data.get('last_xp_time'),
+            data.get('total_xp_gained', 0),
+            data.get('join_date')
+        )
@@ -0,0 +1,167 @@
+import json
+import os
+import time
+from typing import Iterable, List, Mapping, NamedTuple, Optional
+
+
+# Répartition des serveurs entre shards
+def shard_of(guild_id: int, shard_count: int) -> int:
+    """Shard qui reçoit les événements d'un serveur (formule de Discord)"""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def parse_shard_ids(text: str) -> List[int]:
+    """'0-3,6' -> [0, 1, 2, 3, 6]"""
+    shard_ids = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        shard_ids.update(range(int(start), int(end or start) + 1))
+    return sorted(shard_ids)
+
+
+def format_shard_ids(shard_ids: Iterable[int]) -> str:
+    """[0, 1, 2, 3, 6] -> '0-3,6'"""
+    ranges: List[List[int]] = []
+    for shard_id in sorted(shard_ids):
+        if ranges and shard_id == ranges[-1][1] + 1:
+            ranges[-1][1] = shard_id
+        else:
+            ranges.append([shard_id, shard_id])
+    return ','.join(f"{start}-{end}" if end > start else str(start) for start, end in ranges)
+
+
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """Plages contiguës de shards, aussi égales que possible, une par processus"""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class ShardLayout(NamedTuple):
+    """Mode de lancement : 'single' (une connexion), 'auto' (AutoShardedBot, tous les shards)
+    ou 'process' (ce processus ne porte que `shard_ids` parmi `shard_count`)"""
+    mode: str = 'single'
+    shard_count: Optional[int] = None
+    shard_ids: Optional[List[int]] = None
+
+    @property
+    def partitioned(self) -> bool:
+        return self.mode == 'process'
+
+    @property
+    def label(self) -> str:
+        return f"shards-{format_shard_ids(self.shard_ids).replace(',', '_')}" if self.partitioned else "all"
+
+    def owns(self, guild_id) -> bool:
+        if not self.partitioned:
+            return True
+        return shard_of(int(guild_id), self.shard_count) in self.shard_ids
+
+
+def layout_from_env(environ: Mapping[str, str] = os.environ) -> ShardLayout:
+    """SHARD_MODE ('single', 'auto', 'process'), SHARD_COUNT et SHARD_IDS ('0-3')"""
+    mode = environ.get("SHARD_MODE", "single")
+    if mode not in ('single', 'auto', 'process'):
+        raise ValueError(f"SHARD_MODE inconnu: {mode}")
+    shard_count = int(environ["SHARD_COUNT"]) if environ.get("SHARD_COUNT") else None
+    if mode != 'process':
+        return ShardLayout(mode, shard_count)
+    if shard_count is None or not environ.get("SHARD_IDS"):
+        raise ValueError("SHARD_MODE=process demande SHARD_COUNT et SHARD_IDS")
+    shard_ids = parse_shard_ids(environ["SHARD_IDS"])
+    if shard_ids[0] < 0 or shard_ids[-1] >= shard_count:
+        raise ValueError(f"SHARD_IDS hors de 0-{shard_count - 1}: {environ['SHARD_IDS']}")
+    return ShardLayout(mode, shard_count, shard_ids)
+
+
+# Partitions des données sauvegardées
+def partition_path(path: str, layout: ShardLayout) -> str:
+    """bot_data.json -> bot_data.shards-0-3.json pour un processus de shards"""
+    if not layout.partitioned:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{layout.label}{ext}"
+
+
+def partition_state(data: dict, layout: ShardLayout) -> dict:
+    """Ne garde d'un état chargé (format de StorageBackend.load) que les serveurs du processus"""
+    owns = layout.owns
+    result = dict(data)
+    if 'guild_data' in data:
+        result['guild_data'] = {guild_id: members for guild_id, members in data['guild_data'].items() if owns(guild_id)}
+    if 'guild_ids' in data:
+        result['guild_ids'] = [guild_id for guild_id in data['guild_ids'] if owns(guild_id)]
+    for key in ('guild_settings', 'warning_log'):
+        result[key] = {guild_id: value for guild_id, value in data.get(key, {}).items() if owns(guild_id)}
+    for key in ('muted_users', 'banned_users'):
+        result[key] = {key_: record for key_, record in data.get(key, {}).items() if owns(record['guild_id'])}
+    return result
+
+
+def merge_states(states: Iterable[dict]) -> dict:
+    """Réunit des partitions (serveurs disjoints) en un seul état"""
+    merged = {key: {} for key in ('guild_data', 'guild_settings', 'muted_users', 'banned_users', 'warning_log')}
+    for state in states:
+        for key, section in merged.items():
+            section.update(state.get(key, {}))
+    return merged
+
+
+# Statistiques partagées avec le coordinateur (launcher.py)
+def write_report(directory: str, layout: ShardLayout, report: dict):
+    """Rapport d'un processus, relu par le coordinateur (écriture atomique)"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{layout.label}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(report, updated=time.time()), f)
+    os.replace(tmp_path, path)
+
+
+def read_reports(directory: str) -> List[dict]:
+    reports = []
+    if not os.path.isdir(directory):
+        return reports
+    for name in sorted(os.listdir(directory)):
+        if not name.startswith('shards-') or not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                reports.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue  # En cours de remplacement : relu au prochain passage
+    return reports
+
+
+def aggregate_reports(reports: List[dict], now: float, stale: float = 90.0) -> dict:
+    """Totaux sur tous les processus ; un rapport plus vieux que `stale` secondes est signalé"""
+    totals = {'processes': len(reports), 'stale': [], 'shards': {}}
+    for key in ('guilds', 'members_cached', 'user_records', 'xp_processed'):
+        totals[key] = sum(report.get(key, 0) for report in reports)
+    for report in reports:
+        if now - report.get('updated', 0) > stale:
+            totals['stale'].append(report.get('label'))
+        for shard_id, latency in report.get('latencies', []):
+            totals['shards'][shard_id] = latency
+    totals['updated'] = now
+    return totals
+
+
+CLUSTER_FILE = "cluster.json"
+
+
+def read_cluster(directory: str) -> Optional[dict]:
+    """Agrégat écrit par le coordinateur, s'il tourne"""
+    try:
+        with open(os.path.join(directory, CLUSTER_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
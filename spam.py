@@ -0,0 +1,121 @@
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+
+class SpamConfig(NamedTuple):
+    enabled: bool = False
+    messages: int = 6        # messages tolérés dans la fenêtre
+    window: float = 5.0      # secondes
+    duplicates: int = 3      # messages identiques parmi les `history` derniers pour déclencher
+    history: int = 5
+    duplicate_window: float = 30.0  # secondes : les répétitions plus anciennes ne comptent pas
+    mute_minutes: float = 10.0
+
+
+DEFAULT_CONFIG = SpamConfig()
+
+
+def config_from_settings(settings: Optional[dict]) -> SpamConfig:
+    """Construit la config depuis guild_settings[guild_id].get('antispam')"""
+    if not settings:
+        return DEFAULT_CONFIG
+    return SpamConfig(**{key: value for key, value in settings.items() if key in SpamConfig._fields})
+
+
+def content_hash(content: str) -> int:
+    """Empreinte du contenu, insensible à la casse et aux espaces autour"""
+    return hash(content.strip().casefold())
+
+
+class _UserWindow:
+    """Derniers horodatages et empreintes (datées) d'un membre, dans des tampons circulaires de taille fixe"""
+
+    __slots__ = ('times', 'time_pos', 'hashes', 'hash_times', 'hash_pos')
+
+    def __init__(self, config: SpamConfig):
+        self.times = array('d', [float('-inf')]) * config.messages
+        self.time_pos = 0
+        self.hashes = array('q', [0]) * config.history  # 0 : emplacement vide
+        self.hash_times = array('d', [float('-inf')]) * config.history
+        self.hash_pos = 0
+
+
+# Détection du spam
+class SpamDetector:
+    """Détecteur de flood et de messages répétés, par (serveur, membre).
+
+    Chaque message coûte un nombre constant d'opérations : le plus vieil
+    horodatage du tampon dit si la fenêtre est dépassée, et les empreintes
+    des `history` derniers messages sont comparées à la nouvelle (seules
+    celles des `duplicate_window` dernières secondes comptent). Les
+    membres inactifs sortent par ordre LRU au-delà de `max_users`.
+    """
+
+    def __init__(self, max_users: int = 50_000):
+        self.max_users = max_users
+        self._windows: "OrderedDict[Tuple[int, int], _UserWindow]" = OrderedDict()
+        self.checked = 0
+        self.flagged = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def check(self, guild_id: int, user_id: int, content: str, now: float, config: SpamConfig) -> Optional[str]:
+        """Enregistre un message ; retourne 'flood' ou 'duplicate' s'il dépasse les seuils"""
+        self.checked += 1
+        key = (guild_id, user_id)
+        window = self._windows.get(key)
+        if window is None or len(window.times) != config.messages or len(window.hashes) != config.history:
+            window = self._windows[key] = _UserWindow(config)
+            if len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._windows.move_to_end(key)
+
+        # Flood : le message le plus ancien du tampon est encore dans la fenêtre
+        times = window.times
+        oldest = times[window.time_pos]
+        times[window.time_pos] = now
+        window.time_pos = (window.time_pos + 1) % len(times)
+        if now - oldest < config.window:
+            return self._flag(key)
+
+        # Messages répétés (les messages sans texte ne comptent pas)
+        if content:
+            digest = content_hash(content) or 1
+            hashes = window.hashes
+            hash_times = window.hash_times
+            repeats = 1 + hashes.count(digest)
+            if repeats >= config.duplicates:
+                # Assez de répétitions dans le tampon : ne garder que les récentes
+                since = now - config.duplicate_window
+                repeats = 1 + sum(1 for h, t in zip(hashes, hash_times) if h == digest and t > since)
+            hashes[window.hash_pos] = digest
+            hash_times[window.hash_pos] = now
+            window.hash_pos = (window.hash_pos + 1) % len(hashes)
+            if repeats >= config.duplicates:
+                return self._flag(key, 'duplicate')
+        return None
+
+    def _flag(self, key: Tuple[int, int], reason: str = 'flood') -> str:
+        # On repart de zéro : un seul déclenchement par rafale
+        del self._windows[key]
+        self.flagged += 1
+        return reason
+
+    def evict_idle(self, now: float, idle: float = 300.0) -> int:
+        """Oublie les membres sans message depuis `idle` secondes (les plus anciens sont en tête)"""
+        evicted = 0
+        windows = self._windows
+        while windows:
+            key, window = next(iter(windows.items()))
+            last = window.times[window.time_pos - 1]
+            if now - last < idle:
+                break
+            windows.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
@@ -0,0 +1,830 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sqlite3
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from ranking import LeaderboardCache, LeaderboardSnapshot, RankIndex
+from records import UserRecord
+from warning_log import WarningLog, entry_row, migrate_member_warnings
+
+
+# Fiche d'un membre sans activité : partagée en lecture, jamais sauvegardée
+DEFAULT_RECORD: Mapping = MappingProxyType({
+    'xp': 0,
+    'level': 1,
+    'messages_sent': 0,
+    'last_xp_time': None,
+    'total_xp_gained': 0,
+    'join_date': None
+})
+
+
+def is_default(data: Mapping) -> bool:
+    """Vrai si la fiche n'apporte rien par rapport à DEFAULT_RECORD"""
+    return data['xp'] == 0 and data['messages_sent'] == 0 and data['total_xp_gained'] == 0 and data['level'] == 1
+
+
+# Stockage des données XP, serveur par serveur
+class GuildStore:
+    """Données des membres rangées par serveur : guild_id -> {user_id -> UserRecord}.
+
+    Toutes les requêtes propres à un serveur (rang, classement, statistiques)
+    ne parcourent que les membres de ce serveur. Les lectures passent par
+    `view`, qui ne crée pas de fiche ; seules les écritures (`ensure`) en
+    allouent une.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[str, Dict[str, UserRecord]] = {}
+        self._rank_indexes: Dict[str, RankIndex] = {}
+        self._totals: Dict[str, List[int]] = {}  # guild_id -> [fiches, XP totale], tenus à jour par ensure/add_xp
+        self.leaderboards = LeaderboardCache()
+        self._dirty: Dict[str, Set[str]] = {}  # guild_id -> user_ids modifiés depuis la dernière sauvegarde
+        # Serveurs chargés mais pas encore préparés : table brute, ou None si le loader doit la lire
+        self._pending: Dict[str, Optional[dict]] = {}
+        self._loader: Optional[Callable[[str], dict]] = None
+        self.default_reads = 0  # lectures servies par DEFAULT_RECORD (fiches non créées)
+        self.pruned = 0         # fiches vides retirées au chargement
+
+    def __len__(self):
+        loaded = sum(len(members) for members in self._guilds.values())
+        return loaded + sum(len(members) for members in self._pending.values() if members)
+
+    def guild_ids(self) -> List[str]:
+        return [*self._guilds, *self._pending]
+
+    def _table(self, guild_id: str) -> Optional[Dict[str, UserRecord]]:
+        members = self._guilds.get(guild_id)
+        if members is None and guild_id in self._pending:
+            members = self._hydrate(guild_id)
+        return members
+
+    def raw_table(self, guild_id: str) -> Optional[dict]:
+        """Table telle que chargée (format sauvegardé) d'un serveur pas encore préparé, sans le préparer"""
+        return self._pending.get(guild_id)
+
+    def _hydrate(self, guild_id: str) -> Dict[str, UserRecord]:
+        """Prépare la table d'un serveur au premier accès (dicts sauvegardés -> UserRecord)"""
+        raw = self._pending.pop(guild_id)
+        if raw is None:
+            raw = self._loader(guild_id)
+        members = self._guilds[guild_id] = {}
+        total_xp = 0
+        for user_id, data in raw.items():
+            # Anciennes fiches vides (créées à l'arrivée ou à la simple lecture) : retirées, puis supprimées à la sauvegarde
+            if is_default(data):
+                self.mark_dirty(guild_id, user_id)
+                self.pruned += 1
+            else:
+                record = members[user_id] = UserRecord.from_dict(data)
+                total_xp += record.xp
+        self._totals[guild_id] = [len(members), total_xp]
+        return members
+
+    def members(self, guild_id: str) -> Dict[str, UserRecord]:
+        """Table des membres d'un serveur (vide si le serveur est inconnu)"""
+        members = self._table(guild_id)
+        return members if members is not None else {}
+
+    def get(self, guild_id: str, user_id: str) -> Optional[UserRecord]:
+        members = self._table(guild_id)
+        if members is None:
+            return None
+        return members.get(user_id)
+
+    def view(self, guild_id: str, user_id: str) -> Mapping:
+        """Données du membre en lecture seule ; DEFAULT_RECORD s'il n'a pas de fiche"""
+        data = self.get(guild_id, user_id)
+        if data is None:
+            self.default_reads += 1
+            return DEFAULT_RECORD
+        return data
+
+    def ensure(self, guild_id: str, user_id: str) -> UserRecord:
+        """Retourne les données du membre, en les créant si besoin"""
+        members = self._table(guild_id)
+        if members is None:
+            members = self._guilds[guild_id] = {}
+            self._totals[guild_id] = [0, 0]
+        data = members.get(user_id)
+        if data is None:
+            data = members[user_id] = UserRecord(join_date=time.time())
+            self._totals[guild_id][0] += 1
+            if guild_id in self._rank_indexes:
+                self._rank_indexes[guild_id].update(user_id, 0)
+            self.leaderboards.on_new_member(guild_id, user_id)
+            self.mark_dirty(guild_id, user_id)
+        return data
+
+    def mark_dirty(self, guild_id: str, user_id: str):
+        """Signale une modification des données d'un membre (à sauvegarder)"""
+        dirty = self._dirty.get(guild_id)
+        if dirty is None:
+            dirty = self._dirty[guild_id] = set()
+        dirty.add(user_id)
+
+    def take_dirty(self) -> Dict[str, Set[str]]:
+        """Retourne et réinitialise l'ensemble des membres modifiés"""
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def add_xp(self, guild_id: str, user_id: str, amount: int) -> UserRecord:
+        """Ajoute de l'XP à un membre et tient le classement à jour"""
+        data = self.ensure(guild_id, user_id)
+        data.xp += amount
+        data.total_xp_gained += amount
+        self._totals[guild_id][1] += amount
+        if guild_id in self._rank_indexes:
+            self._rank_indexes[guild_id].update(user_id, data.xp)
+        self.leaderboards.on_xp_change(guild_id, user_id, data.xp)
+        self.mark_dirty(guild_id, user_id)
+        return data
+
+    def totals(self, guild_id: str) -> Tuple[int, int]:
+        """(fiches, XP totale) du serveur, sans parcourir ses membres"""
+        if self._table(guild_id) is None:
+            return 0, 0
+        registered, total_xp = self._totals[guild_id]
+        return registered, total_xp
+
+    def rebuild_totals(self, guild_id: str) -> int:
+        """Recalcule les totaux depuis les fiches ; retourne le nombre de valeurs corrigées"""
+        members = self._table(guild_id)
+        if members is None:
+            return 0
+        expected = [len(members), sum(data.xp for data in members.values())]
+        drift = sum(a != b for a, b in zip(self._totals.get(guild_id, (None, None)), expected))
+        self._totals[guild_id] = expected
+        return drift
+
+    def rank_index(self, guild_id: str) -> RankIndex:
+        """Index de classement du serveur, construit au premier accès"""
+        index = self._rank_indexes.get(guild_id)
+        if index is None:
+            index = RankIndex((user_id, data.xp) for user_id, data in self.members(guild_id).items())
+            self._rank_indexes[guild_id] = index
+        return index
+
+    def leaderboard(self, guild_id: str, now: float, keep: Optional[Callable[[str], bool]] = None) -> LeaderboardSnapshot:
+        """Top du serveur servi depuis le cache, reconstruit depuis l'index si invalidé.
+
+        `keep` permet d'écarter des utilisateurs (par exemple ceux qui ont quitté le serveur).
+        """
+        snapshot = self.leaderboards.get(guild_id, now)
+        if snapshot is None:
+            index = self.rank_index(guild_id)
+            members = self.members(guild_id)
+            size = self.leaderboards.size
+            entries = []
+            offset = 0
+            while len(entries) < size and offset < len(index):
+                for user_id, xp in index.top(size, offset):
+                    if keep is None or keep(user_id):
+                        data = members[user_id]
+                        entries.append((user_id, xp, data.level, data.messages_sent))
+                        if len(entries) == size:
+                            break
+                offset += size
+            if keep is None:
+                snapshot = LeaderboardSnapshot(entries, len(index), now, all_time=True)
+            else:
+                # Comme le classement, le total ne compte que les membres retenus (une fois par instantané)
+                snapshot = LeaderboardSnapshot(entries, sum(1 for user_id in members if keep(user_id)), now)
+            self.leaderboards.put(guild_id, snapshot)
+        return snapshot
+
+    # Chargement
+    def load_json(self, guild_data: dict):
+        """Charge des tables déjà lues ; chaque serveur est préparé à son premier accès"""
+        self._guilds = {}
+        self._pending = dict(guild_data)
+        self._loader = None
+        self._rank_indexes.clear()
+        self._totals.clear()
+        self.leaderboards = LeaderboardCache(self.leaderboards.size, self.leaderboards.ttl)
+        self._dirty.clear()
+
+    def load_lazy(self, guild_ids: Iterable[str], loader: Callable[[str], dict]):
+        """Ne lit la table d'un serveur (via `loader`) qu'à son premier accès"""
+        self._guilds = {}
+        self._pending = dict.fromkeys(guild_ids)
+        self._loader = loader
+        self._rank_indexes.clear()
+        self._totals.clear()
+        self.leaderboards = LeaderboardCache(self.leaderboards.size, self.leaderboards.ttl)
+        self._dirty.clear()
+
+
+def migrate_user_data(user_data: dict) -> dict:
+    """Convertit l'ancien format user_id -> {guild_id -> données} en guild_id -> {user_id -> données}"""
+    guild_data: Dict[str, Dict[str, dict]] = {}
+    for user_id, user_guilds in user_data.items():
+        for guild_id, data in user_guilds.items():
+            guild_data.setdefault(guild_id, {})[user_id] = data
+    return guild_data
+
+
+# Sauvegarde incrémentale
+class SnapshotStats(NamedTuple):
+    records: int      # enregistrements réécrits
+    bytes: int        # taille du fichier écrit
+    duration: float   # secondes passées dans le thread d'écriture
+    skipped: int = 0  # fiches vides non écrites
+
+
+def atomic_write(path: str, payload: bytes):
+    """Écrit dans un fichier temporaire, fsync, puis renomme par-dessus le fichier cible"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Rendre le renommage durable (POSIX uniquement)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _copy_record(data) -> dict:
+    """Format sauvegardé d'une fiche (UserRecord ou dict)"""
+    if isinstance(data, UserRecord):
+        return data.to_dict()
+    record = dict(data)
+    # last_xp_time est un timestamp en mémoire, sauvegardé au format ISO
+    if isinstance(record.get('last_xp_time'), float):
+        record['last_xp_time'] = datetime.datetime.fromtimestamp(record['last_xp_time']).isoformat()
+    return record
+
+
+def _collect_dirty(store: GuildStore, changes: Dict[str, Dict[str, Optional[dict]]], skip=()) -> int:
+    """Copie les membres modifiés (None pour un membre supprimé ou revenu à une fiche vide).
+
+    Retourne le nombre de fiches vides ignorées.
+    """
+    skipped = 0
+    for guild_id, user_ids in store.take_dirty().items():
+        if guild_id in skip:
+            continue
+        members = store.members(guild_id)
+        guild_changes = changes.setdefault(guild_id, {})
+        for user_id in user_ids:
+            data = members.get(user_id)
+            if data is not None and is_default(data):
+                skipped += 1
+                data = None
+            guild_changes[user_id] = _copy_record(data) if data is not None else None
+    return skipped
+
+
+class StorageBackend:
+    """Interface commune des backends de persistance.
+
+    `load` retourne un dict avec les clés guild_data, guild_settings,
+    muted_users, banned_users et warning_log ; `save` écrit les membres modifiés du store,
+    les avertissements ajoutés ou supprimés et les sections annexes, hors de la boucle d'événements.
+    """
+
+    def load(self, lazy: bool = False) -> dict:
+        """Lit les données sauvegardées.
+
+        Avec lazy=True, un backend peut retourner 'guild_ids' à la place de
+        'guild_data' : les tables sont alors lues serveur par serveur avec
+        `load_guild`.
+        """
+        raise NotImplementedError
+
+    def load_guild(self, guild_id: str) -> dict:
+        raise NotImplementedError
+
+    def write_full(self, data: dict) -> int:
+        """Remplace tout le contenu par un état complet (format de `load`, avec guild_data) ; retourne le nombre de membres"""
+        raise NotImplementedError
+
+    async def save(self, store: GuildStore, sections: Dict[str, dict],
+                   warnings: Optional[WarningLog] = None) -> SnapshotStats:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def move(self, path: str):
+        """Renomme les données sauvegardées en `path` ; les sauvegardes suivantes y sont écrites"""
+        raise NotImplementedError
+
+
+def discard(path: str):
+    """Supprime un fichier de données s'il existe, avec les fichiers annexes de SQLite"""
+    for name in (path, f"{path}-wal", f"{path}-shm", f"{path}.tmp"):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+class JsonBackend(StorageBackend):
+    """Sauvegarde de GuildStore vers un fichier JSON (bot_data.json).
+
+    Seuls les membres et avertissements modifiés depuis la dernière sauvegarde
+    sont réencodés ; les autres sont repris du cache d'encodage. L'encodage et
+    l'écriture se font dans un thread, la copie des données modifiées sur la boucle.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, Dict[str, str]] = {}  # guild_id -> user_id -> JSON encodé
+        self._guilds: Dict[str, str] = {}              # guild_id -> JSON encodé de la table
+        self._warnings: Dict[str, Dict[int, str]] = {}  # guild_id -> id -> JSON encodé de l'avertissement
+        self._warning_guilds: Dict[str, str] = {}      # guild_id -> JSON encodé du journal
+        self._lock = asyncio.Lock()
+        self.last_stats: Optional[SnapshotStats] = None
+
+    def load(self, lazy: bool = False) -> dict:
+        # Le JSON est lu d'un bloc ; GuildStore ne prépare chaque serveur qu'au premier accès
+        # Si le fichier n'existe pas, le créer vide
+        if not os.path.exists(self.path):
+            with open(self.path, "w") as f:
+                json.dump({}, f)
+
+        # Lire le JSON
+        with open(self.path, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                data = {}  # Si le fichier est vide ou mal formé, on retourne un objet vide
+
+        # Migration de l'ancien format (user_id -> guild_id)
+        if 'user_data' in data:
+            if 'guild_data' not in data:
+                data['guild_data'] = migrate_user_data(data['user_data'])
+            del data['user_data']
+
+        # Migration des avertissements rangés dans les fiches membres
+        if 'warning_log' not in data:
+            data['warning_log'] = {}
+            for guild_id, members in data.get('guild_data', {}).items():
+                migrate_member_warnings(guild_id, members, data['warning_log'])
+        return data
+
+    def move(self, path: str):
+        os.replace(self.path, path)
+        self.path = path
+
+    def write_full(self, data: dict) -> int:
+        atomic_write(self.path, json.dumps(data).encode('utf-8'))
+        self._clear_cache()
+        return sum(len(members) for members in data.get('guild_data', {}).values())
+
+    def _collect(self, store: GuildStore):
+        full = set()
+        raw: Dict[str, dict] = {}
+        skipped = 0
+        changes: Dict[str, Dict[str, Optional[dict]]] = {}
+        for guild_id in store.guild_ids():
+            if guild_id not in self._guilds:  # Jamais encodé : tout le serveur
+                full.add(guild_id)
+                table = store.raw_table(guild_id)
+                if table is not None:
+                    # Pas encore préparé : encodé depuis la table chargée, dans le thread (le préparer annulerait le chargement à la demande)
+                    raw[guild_id] = table
+                    continue
+                members = store.members(guild_id)
+                changes[guild_id] = {user_id: _copy_record(data) for user_id, data in members.items() if not is_default(data)}
+                skipped += len(members) - len(changes[guild_id])
+        skipped += _collect_dirty(store, changes, skip=full)
+        return full, raw, changes, skipped
+
+    def _collect_warnings(self, warnings: WarningLog):
+        """Journaux jamais encodés (complets) et avertissements modifiés des autres"""
+        changes = warnings.take_changes()
+        full = {guild_id: warnings.snapshot(guild_id) for guild_id in warnings.guild_ids() if guild_id not in self._warning_guilds}
+        for guild_id in full:
+            changes.pop(guild_id, None)
+        return full, changes
+
+    def _encode_warnings(self, full, changes):
+        for guild_id, (next_id, entries) in full.items():
+            self._warnings[guild_id] = {entry.id: json.dumps(entry_row(entry)) for entry in entries}
+            changes[guild_id] = (next_id, {})
+        for guild_id, (next_id, entries) in changes.items():
+            encoded = self._warnings.setdefault(guild_id, {})
+            for warning_id, entry in entries.items():
+                if entry is None:
+                    encoded.pop(warning_id, None)
+                else:
+                    encoded[warning_id] = json.dumps(entry_row(entry))
+            self._warning_guilds[guild_id] = f'{{"next_id":{next_id},"entries":[{",".join(encoded.values())}]}}'
+
+    def _write(self, full, raw, changes, sections: Dict[str, str], skipped: int = 0, warnings=None) -> SnapshotStats:
+        start = time.perf_counter()
+        count = 0
+        for guild_id in full:
+            self._records[guild_id] = {}
+        for guild_id, table in raw.items():
+            # Les tables chargées ne sont jamais modifiées : lues sans risque hors de la boucle
+            records = self._records[guild_id]
+            for user_id, data in table.items():
+                if is_default(data):
+                    skipped += 1
+                else:
+                    records[user_id] = json.dumps(data)
+                    count += 1
+            self._guilds[guild_id] = '{' + ','.join(f'{json.dumps(user_id)}:{encoded}' for user_id, encoded in records.items()) + '}'
+        for guild_id, users in changes.items():
+            records = self._records.setdefault(guild_id, {})
+            for user_id, data in users.items():
+                if data is None:
+                    records.pop(user_id, None)
+                else:
+                    records[user_id] = json.dumps(data)
+                    count += 1
+            self._guilds[guild_id] = '{' + ','.join(f'{json.dumps(user_id)}:{encoded}' for user_id, encoded in records.items()) + '}'
+
+        parts = ['{"guild_data":{', ','.join(f'{json.dumps(guild_id)}:{encoded}' for guild_id, encoded in self._guilds.items()), '}']
+        for key, encoded in sections.items():
+            parts.append(f',{json.dumps(key)}:{encoded}')
+        if warnings is not None:
+            self._encode_warnings(*warnings)
+            parts.append(',"warning_log":{' + ','.join(f'{json.dumps(guild_id)}:{encoded}' for guild_id, encoded in self._warning_guilds.items()) + '}')
+        parts.append('}')
+        payload = ''.join(parts).encode('utf-8')
+
+        atomic_write(self.path, payload)
+        return SnapshotStats(count, len(payload), time.perf_counter() - start, skipped)
+
+    def _clear_cache(self):
+        self._records.clear()
+        self._guilds.clear()
+        self._warnings.clear()
+        self._warning_guilds.clear()
+
+    async def save(self, store: GuildStore, sections: Dict[str, dict],
+                   warnings: Optional[WarningLog] = None) -> SnapshotStats:
+        async with self._lock:
+            full, raw, changes, skipped = self._collect(store)
+            warning_changes = self._collect_warnings(warnings) if warnings is not None else None
+            # Les petites sections sont encodées directement sur la boucle
+            encoded = {key: json.dumps(value) for key, value in sections.items()}
+            try:
+                stats = await asyncio.to_thread(self._write, full, raw, changes, encoded, skipped, warning_changes)
+            except Exception:
+                # Cache peut-être incomplet : tout réencoder à la prochaine sauvegarde
+                self._clear_cache()
+                raise
+            self.last_stats = stats
+            return stats
+
+
+# Backend SQLite
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    xp INTEGER NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 1,
+    messages_sent INTEGER NOT NULL DEFAULT 0,
+    last_xp_time TEXT,
+    total_xp_gained INTEGER NOT NULL DEFAULT 0,
+    join_date TEXT,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS members_rank ON members (guild_id, xp DESC, user_id);
+CREATE TABLE IF NOT EXISTS warnings (
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    reason TEXT,
+    moderator INTEGER,
+    date TEXT,
+    PRIMARY KEY (guild_id, user_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS warning_log (
+    guild_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator INTEGER,
+    reason TEXT,
+    date TEXT,
+    PRIMARY KEY (guild_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS warning_log_user ON warning_log (guild_id, user_id);
+CREATE INDEX IF NOT EXISTS warning_log_moderator ON warning_log (guild_id, moderator);
+CREATE TABLE IF NOT EXISTS warning_ids (
+    guild_id TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mutes (
+    key TEXT PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    unmute_time TEXT NOT NULL,
+    reason TEXT,
+    moderator INTEGER
+);
+CREATE TABLE IF NOT EXISTS bans (
+    key TEXT PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    unban_time TEXT NOT NULL,
+    reason TEXT,
+    moderator INTEGER
+);
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id TEXT PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+"""
+
+MEMBER_COLUMNS = ('xp', 'level', 'messages_sent', 'last_xp_time', 'total_xp_gained', 'join_date')
+UPSERT_MEMBER = "INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+DELETE_MEMBER = "DELETE FROM members WHERE guild_id = ? AND user_id = ?"
+INSERT_WARNING = "INSERT INTO warning_log VALUES (?, ?, ?, ?, ?, ?)"
+UPSERT_WARNING = "INSERT OR REPLACE INTO warning_log VALUES (?, ?, ?, ?, ?, ?)"
+DELETE_WARNING = "DELETE FROM warning_log WHERE guild_id = ? AND id = ?"
+UPSERT_WARNING_ID = "INSERT OR REPLACE INTO warning_ids VALUES (?, ?)"
+
+# Tables annexes réécrites en entier quand leur section change : nom dans _section_rows -> (table, insertion)
+SECTION_TABLES = {
+    'mutes': ('mutes', "INSERT INTO mutes VALUES (?, ?, ?, ?, ?, ?)"),
+    'bans': ('bans', "INSERT INTO bans VALUES (?, ?, ?, ?, ?, ?)"),
+    'guild_settings': ('guild_settings', "INSERT INTO guild_settings VALUES (?, ?)"),
+    'warnings': ('warning_log', INSERT_WARNING),
+    'warning_ids': ('warning_ids', "INSERT INTO warning_ids VALUES (?, ?)"),
+}
+
+
+def _member_row(guild_id: str, user_id: str, data: dict) -> tuple:
+    return (guild_id, user_id, *(data.get(column) for column in MEMBER_COLUMNS))
+
+
+def _warning_rows(warning_log: Dict[str, dict]) -> Tuple[List[tuple], List[tuple]]:
+    """Lignes de warning_log et de warning_ids depuis le format sauvegardé du journal"""
+    entries = [(guild_id, *entry) for guild_id, log in warning_log.items() for entry in log['entries']]
+    next_ids = [(guild_id, log['next_id']) for guild_id, log in warning_log.items()]
+    return entries, next_ids
+
+
+def _section_rows(sections: dict) -> dict:
+    """Lignes des tables annexes à partir des sections sauvegardées (seulement celles présentes)"""
+    rows = {}
+    if 'warning_log' in sections:
+        rows['warnings'], rows['warning_ids'] = _warning_rows(sections['warning_log'])
+    if 'muted_users' in sections:
+        rows['mutes'] = _punishment_rows(sections['muted_users'], 'unmute_time')
+    if 'banned_users' in sections:
+        rows['bans'] = _punishment_rows(sections['banned_users'], 'unban_time')
+    if 'guild_settings' in sections:
+        rows['guild_settings'] = [(guild_id, json.dumps(settings)) for guild_id, settings in sections['guild_settings'].items()]
+    return rows
+
+def _warning_change_rows(changes) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+    """Lignes à insérer, à supprimer et prochains ids depuis WarningLog.take_changes"""
+    upserts, removed, next_ids = [], [], []
+    for guild_id, (next_id, entries) in changes.items():
+        next_ids.append((guild_id, next_id))
+        for warning_id, entry in entries.items():
+            if entry is None:
+                removed.append((guild_id, warning_id))
+            else:
+                upserts.append((guild_id, *entry_row(entry)))
+    return upserts, removed, next_ids
+
+def _punishment_rows(punishments: Dict[str, dict], time_key: str) -> List[tuple]:
+    return [
+        (key, p['guild_id'], p['user_id'], p[time_key], p.get('reason'), p.get('moderator'))
+        for key, p in punishments.items()
+    ]
+
+
+class SqliteBackend(StorageBackend):
+    """Sauvegarde dans une base SQLite en mode WAL.
+
+    Chaque sauvegarde est une seule transaction de requêtes préparées
+    (executemany) ne touchant que les membres et avertissements modifiés ;
+    les autres tables annexes ne sont réécrites que si leur contenu a changé.
+    L'index (guild_id, xp) permet aussi de calculer rangs et top N en SQL.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connect()
+        self._migrate_warnings()
+        self._lock = asyncio.Lock()
+        self._written: Dict[str, list] = {}  # Dernières lignes écrites par table annexe
+        self.last_stats: Optional[SnapshotStats] = None
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._reader: Optional[sqlite3.Connection] = None
+
+    def close(self):
+        self._conn.close()
+        if self._reader is not None:
+            self._reader.close()
+
+    def move(self, path: str):
+        # La fermeture de la dernière connexion reporte le WAL dans la base : un seul fichier à renommer
+        self.close()
+        os.replace(self.path, path)
+        self.path = path
+        self._connect()
+
+    def _migrate_warnings(self):
+        """Déplace l'ancienne table warnings (par fiche membre) dans warning_log"""
+        members: Dict[str, Dict[str, dict]] = {}
+        for guild_id, user_id, _, _, reason, moderator, date in self._conn.execute(
+                "SELECT * FROM warnings ORDER BY guild_id, user_id, position"):
+            members.setdefault(guild_id, {}).setdefault(user_id, {'warnings': []})['warnings'].append(
+                {'reason': reason, 'moderator': moderator, 'date': date})
+        if not members:
+            return
+        log: Dict[str, dict] = {}
+        for guild_id, users in members.items():
+            migrate_member_warnings(guild_id, users, log)
+        entries, next_ids = _warning_rows(log)
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(INSERT_WARNING, entries)
+            conn.executemany("INSERT OR REPLACE INTO warning_ids VALUES (?, ?)", next_ids)
+            conn.execute("DELETE FROM warnings")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load(self, lazy: bool = False) -> dict:
+        if lazy:
+            data = {'guild_ids': [row[0] for row in self._conn.execute("SELECT DISTINCT guild_id FROM members")]}
+        else:
+            data = {'guild_data': self._read_members(self._conn, "", ())}
+        data.update(self._read_sections())
+        return data
+
+    def load_guild(self, guild_id: str) -> dict:
+        # Connexion de lecture séparée : le mode WAL permet de lire pendant une sauvegarde
+        if self._reader is None:
+            self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        return self._read_members(self._reader, " WHERE guild_id = ?", (guild_id,)).get(guild_id, {})
+
+    @staticmethod
+    def _read_members(conn, where: str, params: tuple) -> Dict[str, Dict[str, dict]]:
+        guild_data: Dict[str, Dict[str, dict]] = {}
+        for row in conn.execute(f"SELECT * FROM members{where}", params):
+            guild_data.setdefault(row[0], {})[row[1]] = dict(zip(MEMBER_COLUMNS, row[2:]))
+        return guild_data
+
+    def _read_sections(self) -> dict:
+        muted_users = {
+            key: {'user_id': user_id, 'guild_id': guild_id, 'unmute_time': until, 'reason': reason, 'moderator': moderator}
+            for key, guild_id, user_id, until, reason, moderator in self._conn.execute("SELECT * FROM mutes")
+        }
+        banned_users = {
+            key: {'user_id': user_id, 'guild_id': guild_id, 'unban_time': until, 'reason': reason, 'moderator': moderator}
+            for key, guild_id, user_id, until, reason, moderator in self._conn.execute("SELECT * FROM bans")
+        }
+        guild_settings = {
+            guild_id: json.loads(settings)
+            for guild_id, settings in self._conn.execute("SELECT * FROM guild_settings")
+        }
+        warning_log = {
+            guild_id: {'next_id': next_id, 'entries': []}
+            for guild_id, next_id in self._conn.execute("SELECT * FROM warning_ids")
+        }
+        for guild_id, *entry in self._conn.execute("SELECT * FROM warning_log ORDER BY guild_id, id"):
+            warning_log.setdefault(guild_id, {'next_id': entry[0] + 1, 'entries': []})['entries'].append(entry)
+        return {
+            'guild_settings': guild_settings,
+            'muted_users': muted_users,
+            'banned_users': banned_users,
+            'warning_log': warning_log
+        }
+
+    def write_members(self, changes: Dict[str, Dict[str, Optional[dict]]], sections: Optional[dict] = None,
+                      replace: bool = False, warnings: Optional[tuple] = None) -> int:
+        """Écrit en une transaction les membres modifiés, les tables annexes de `sections` (réécrites)
+        et les lignes d'avertissements de `warnings` ; `replace` efface d'abord tous les membres"""
+        upserts, removed = [], []
+        for guild_id, users in changes.items():
+            for user_id, data in users.items():
+                if data is None:
+                    removed.append((guild_id, user_id))
+                else:
+                    upserts.append(_member_row(guild_id, user_id, data))
+
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            if replace:
+                conn.execute("DELETE FROM members")
+            conn.executemany(DELETE_MEMBER, removed)
+            conn.executemany(UPSERT_MEMBER, upserts)
+            for name, rows in (sections or {}).items():
+                table, insert = SECTION_TABLES[name]
+                conn.execute(f"DELETE FROM {table}")
+                conn.executemany(insert, rows)
+            if warnings is not None:
+                warning_upserts, warning_removed, next_ids = warnings
+                conn.executemany(UPSERT_WARNING, warning_upserts)
+                conn.executemany(DELETE_WARNING, warning_removed)
+                conn.executemany(UPSERT_WARNING_ID, next_ids)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(upserts)
+
+    def write_full(self, data: dict) -> int:
+        changes = {guild_id: dict(members) for guild_id, members in data.get('guild_data', {}).items()}
+        keys = ('guild_settings', 'muted_users', 'banned_users', 'warning_log')
+        sections = _section_rows({key: data.get(key, {}) for key in keys})
+        count = self.write_members(changes, sections, replace=True)
+        self._written = sections
+        return count
+
+    def _write(self, changes, sections, skipped: int = 0, warnings=None) -> SnapshotStats:
+        start = time.perf_counter()
+        count = self.write_members(changes, sections, warnings=warnings)
+        size = sum(os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path))
+        return SnapshotStats(count, size, time.perf_counter() - start, skipped)
+
+    async def save(self, store: GuildStore, sections: Dict[str, dict],
+                   warnings: Optional[WarningLog] = None) -> SnapshotStats:
+        async with self._lock:
+            changes = {}
+            skipped = _collect_dirty(store, changes)
+            # Tables annexes : seulement celles dont le contenu a changé depuis la dernière écriture
+            rows = {name: value for name, value in _section_rows(sections).items() if self._written.get(name) != value}
+            warning_changes = warnings.take_changes() if warnings is not None else {}
+            try:
+                stats = await asyncio.to_thread(self._write, changes, rows, skipped, _warning_change_rows(warning_changes))
+            except Exception:
+                # Remettre les membres et avertissements en attente pour la prochaine sauvegarde
+                for guild_id, users in changes.items():
+                    for user_id in users:
+                        store.mark_dirty(guild_id, user_id)
+                if warnings is not None:
+                    warnings.restore_changes(warning_changes)
+                self._written.clear()
+                raise
+            self._written.update(rows)
+            self.last_stats = stats
+            return stats
+
+    # Requêtes de classement
+    def top(self, guild_id: str, count: int, offset: int = 0) -> List[Tuple[str, int]]:
+        return self._conn.execute(
+            "SELECT user_id, xp FROM members WHERE guild_id = ? ORDER BY xp DESC, user_id LIMIT ? OFFSET ?",
+            (guild_id, count, offset)
+        ).fetchall()
+
+    def rank(self, guild_id: str, user_id: str) -> Optional[int]:
+        row = self._conn.execute("SELECT xp FROM members WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)).fetchone()
+        if row is None:
+            return None
+        xp = row[0]
+        (above,) = self._conn.execute(
+            "SELECT COUNT(*) FROM members WHERE guild_id = ? AND (xp > ? OR (xp = ? AND user_id < ?))",
+            (guild_id, xp, xp, user_id)
+        ).fetchone()
+        return above + 1
+
+
+def make_backend(kind: str, json_path: str, sqlite_path: str) -> StorageBackend:
+    """Backend choisi par STORAGE_BACKEND ('json' par défaut, ou 'sqlite')"""
+    if kind == 'sqlite':
+        return SqliteBackend(sqlite_path)
+    if kind != 'json':
+        raise ValueError(f"Backend de stockage inconnu: {kind}")
+    return JsonBackend(json_path)
+
+
+# Migration JSON -> SQLite
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str) -> int:
+    """Copie un bot_data.json (ancien ou nouveau format) dans une base SQLite"""
+    data = JsonBackend(json_path).load()
+    backend = SqliteBackend(sqlite_path)
+    try:
+        return backend.write_full(data)
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migre bot_data.json vers une base SQLite")
+    parser.add_argument('json_path', nargs='?', default='bot_data.json')
+    parser.add_argument('sqlite_path', nargs='?', default='bot_data.db')
+    args = parser.parse_args()
+    count = migrate_json_to_sqlite(args.json_path, args.sqlite_path)
+    print(f"✅ {count} membre(s) migré(s) vers {args.sqlite_path}")
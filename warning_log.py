@@ -0,0 +1,213 @@
+import bisect
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class WarningEntry(NamedTuple):
+    id: int
+    user_id: int
+    moderator: int
+    reason: str
+    date: float  # timestamp
+
+
+def entry_row(entry: WarningEntry) -> list:
+    """Format sauvegardé d'un avertissement : [id, user_id, moderator, raison, date ISO]"""
+    return [entry.id, entry.user_id, entry.moderator, entry.reason, datetime.datetime.fromtimestamp(entry.date).isoformat()]
+
+
+def _remove_sorted(ids: List[int], warning_id: int):
+    position = bisect.bisect_left(ids, warning_id)
+    if position < len(ids) and ids[position] == warning_id:
+        del ids[position]
+
+
+# Journal des avertissements d'un serveur
+class GuildWarnings:
+    """Avertissements d'un serveur, dans l'ordre d'ajout.
+
+    Les ids ne sont jamais réutilisés (`next_id` ne fait qu'augmenter, même
+    après une suppression). Les listes d'ids par membre et par modérateur
+    restent triées puisque les ajouts se font toujours en fin de liste.
+    Les ids ajoutés ou supprimés depuis la dernière sauvegarde sont dans `changed`.
+    """
+
+    __slots__ = ('next_id', 'entries', 'by_user', 'by_moderator', '_ids', '_dates', 'changed', 'saved_next_id')
+
+    def __init__(self, next_id: int = 1):
+        self.next_id = next_id
+        self.changed: Set[int] = set()
+        self.saved_next_id = next_id
+        self.entries: Dict[int, WarningEntry] = {}
+        self.by_user: Dict[int, List[int]] = {}
+        self.by_moderator: Dict[int, List[int]] = {}
+        # Ordre chronologique pour les requêtes par période (les ids supprimés y restent, ignorés à la lecture)
+        self._ids: List[int] = []
+        self._dates: List[float] = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _append(self, entry: WarningEntry):
+        self.entries[entry.id] = entry
+        self.by_user.setdefault(entry.user_id, []).append(entry.id)
+        self.by_moderator.setdefault(entry.moderator, []).append(entry.id)
+        if self._dates and entry.date < self._dates[-1]:
+            # Horloge revenue en arrière : on garde les dates triées
+            position = bisect.bisect_right(self._dates, entry.date)
+            self._dates.insert(position, entry.date)
+            self._ids.insert(position, entry.id)
+        else:
+            self._dates.append(entry.date)
+            self._ids.append(entry.id)
+        self.next_id = max(self.next_id, entry.id + 1)
+
+    def add(self, user_id: int, moderator: int, reason: str, date: float) -> WarningEntry:
+        entry = WarningEntry(self.next_id, user_id, moderator, reason, date)
+        self._append(entry)
+        self.changed.add(entry.id)
+        return entry
+
+    def get(self, warning_id: int) -> Optional[WarningEntry]:
+        return self.entries.get(warning_id)
+
+    def remove(self, warning_id: int) -> Optional[WarningEntry]:
+        entry = self.entries.pop(warning_id, None)
+        if entry is None:
+            return None
+        self.changed.add(warning_id)
+        for index, key in ((self.by_user, entry.user_id), (self.by_moderator, entry.moderator)):
+            ids = index[key]
+            _remove_sorted(ids, warning_id)
+            if not ids:
+                del index[key]
+        if len(self._ids) > 2 * len(self.entries) + 64:
+            self._compact()
+        return entry
+
+    def clear_user(self, user_id: int) -> int:
+        """Supprime tous les avertissements d'un membre et retourne leur nombre"""
+        ids = list(self.by_user.get(user_id, ()))
+        for warning_id in ids:
+            self.remove(warning_id)
+        return len(ids)
+
+    def _compact(self):
+        pairs = [(date, warning_id) for date, warning_id in zip(self._dates, self._ids) if warning_id in self.entries]
+        self._dates = [date for date, _ in pairs]
+        self._ids = [warning_id for _, warning_id in pairs]
+
+    def count_user(self, user_id: int) -> int:
+        return len(self.by_user.get(user_id, ()))
+
+    def query(self, user_id: Optional[int] = None, moderator: Optional[int] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> List[WarningEntry]:
+        """Avertissements correspondant aux filtres, du plus ancien au plus récent.
+
+        Le parcours part de l'index le plus sélectif disponible (membre,
+        modérateur, puis période) ; les autres filtres sont appliqués ensuite.
+        """
+        if user_id is not None:
+            ids: Iterable[int] = self.by_user.get(user_id, ())
+        elif moderator is not None:
+            ids = self.by_moderator.get(moderator, ())
+        else:
+            start = 0 if since is None else bisect.bisect_left(self._dates, since)
+            end = len(self._dates) if until is None else bisect.bisect_right(self._dates, until)
+            ids = sorted(warning_id for warning_id in self._ids[start:end] if warning_id in self.entries)
+
+        entries = self.entries
+        return [
+            entry for entry in (entries[warning_id] for warning_id in ids)
+            if (moderator is None or entry.moderator == moderator)
+            and (since is None or entry.date >= since)
+            and (until is None or entry.date <= until)
+        ]
+
+    # Format sauvegardé : {'next_id': n, 'entries': [[id, user_id, moderator, raison, date ISO], ...]}
+    def to_json(self) -> dict:
+        return {'next_id': self.next_id, 'entries': [entry_row(e) for e in self.entries.values()]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "GuildWarnings":
+        log = cls(data.get('next_id', 1))
+        for warning_id, user_id, moderator, reason, date in data.get('entries', ()):
+            log._append(WarningEntry(warning_id, user_id, moderator, reason, datetime.datetime.fromisoformat(date).timestamp()))
+        return log
+
+
+class WarningLog:
+    """Journaux d'avertissements de tous les serveurs (guild_id entier -> GuildWarnings)"""
+
+    def __init__(self):
+        self._guilds: Dict[int, GuildWarnings] = {}
+
+    def __len__(self):
+        return sum(len(log) for log in self._guilds.values())
+
+    def guild(self, guild_id: int) -> GuildWarnings:
+        log = self._guilds.get(guild_id)
+        if log is None:
+            log = self._guilds[guild_id] = GuildWarnings()
+        return log
+
+    def to_json(self) -> Dict[str, dict]:
+        return {str(guild_id): log.to_json() for guild_id, log in self._guilds.items() if log.entries or log.next_id > 1}
+
+    # Sauvegarde incrémentale
+    def guild_ids(self) -> List[str]:
+        """Serveurs à sauvegarder (ceux qui ont eu au moins un avertissement)"""
+        return [str(guild_id) for guild_id, log in self._guilds.items() if log.entries or log.next_id > 1]
+
+    def snapshot(self, guild_id: str) -> Tuple[int, List[WarningEntry]]:
+        """(next_id, avertissements) d'un serveur ; les entrées sont immuables, lisibles hors de la boucle"""
+        log = self.guild(int(guild_id))
+        return log.next_id, list(log.entries.values())
+
+    def take_changes(self) -> Dict[str, Tuple[int, Dict[int, Optional[WarningEntry]]]]:
+        """Retourne et réinitialise les modifications : guild_id -> (next_id, {id: entrée, ou None si supprimée}).
+
+        Les ids sont rendus dans l'ordre croissant : un journal sauvegardé reste trié par id.
+        """
+        changes = {}
+        for guild_id, log in self._guilds.items():
+            if log.changed or log.next_id != log.saved_next_id:
+                changes[str(guild_id)] = (log.next_id, {warning_id: log.entries.get(warning_id) for warning_id in sorted(log.changed)})
+                log.changed = set()
+                log.saved_next_id = log.next_id
+        return changes
+
+    def restore_changes(self, changes: Dict[str, Tuple[int, Dict[int, Optional[WarningEntry]]]]):
+        """Remet en attente des modifications dont l'écriture a échoué"""
+        for guild_id, (_, entries) in changes.items():
+            log = self.guild(int(guild_id))
+            log.changed.update(entries)
+            log.saved_next_id = 0
+
+    def mark_all(self):
+        """Tout est à écrire (nouvelle partition de shards)"""
+        for log in self._guilds.values():
+            log.changed = set(log.entries)
+            log.saved_next_id = 0
+
+    def load(self, data: Dict[str, dict]):
+        self._guilds = {int(guild_id): GuildWarnings.from_json(log) for guild_id, log in data.items()}
+
+
+def migrate_member_warnings(guild_id: str, members: Dict[str, dict], log: dict):
+    """Déplace les listes 'warnings' des fiches membres dans le journal du serveur (format sauvegardé).
+
+    Les anciens ids (len()+1, réutilisés après /clearwarns) sont renumérotés
+    par ordre de date.
+    """
+    collected = []
+    for user_id, data in members.items():
+        for warning in data.pop('warnings', None) or ():
+            collected.append((warning['date'], int(user_id), warning['moderator'], warning['reason']))
+    if not collected:
+        return
+    collected.sort()
+    guild_log = log.setdefault(guild_id, {'next_id': 1, 'entries': []})
+    for date, user_id, moderator, reason in collected:
+        guild_log['entries'].append([guild_log['next_id'], user_id, moderator, reason, date])
+        guild_log['next_id'] += 1
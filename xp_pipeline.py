@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class XpEvent(NamedTuple):
+    guild_id: int
+    user_id: int
+    timestamp: float  # time.time() à la réception du message
+    message: Any      # discord.Message, pour la notification de level up
+
+
+# File d'accumulation d'XP
+class XpPipeline:
+    """File des messages donnant potentiellement de l'XP, consommée par lots.
+
+    on_message se contente de `push` ; une tâche unique vide la file par lots
+    de `max_batch` événements, ne garde que le premier message de chaque
+    (serveur, utilisateur) du lot, puis appelle `apply_batch`.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[XpEvent]], Awaitable[None]],
+                 max_batch: int = 512, maxsize: int = 100_000):
+        self._apply_batch = apply_batch
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._task: Optional[asyncio.Task] = None
+
+        # Métriques
+        self.processed = 0   # événements traités
+        self.coalesced = 0   # événements fusionnés avec un autre du même lot
+        self.dropped = 0     # événements perdus, file pleine
+        self.batches = 0
+        self.last_lag = 0.0  # âge du plus vieil événement du dernier lot (s)
+        self.max_lag = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def push(self, guild_id: int, user_id: int, timestamp: float, message) -> bool:
+        try:
+            self._queue.put_nowait(XpEvent(guild_id, user_id, timestamp, message))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth,
+            'processed': self.processed,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _take_batch(self, first: XpEvent) -> List[XpEvent]:
+        # Un seul événement par utilisateur et par lot : les suivants tomberaient dans le cooldown
+        events: Dict[Tuple[int, int], XpEvent] = {(first.guild_id, first.user_id): first}
+        count = 1
+        while count < self.max_batch:
+            try:
+                event = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            count += 1
+            events.setdefault((event.guild_id, event.user_id), event)
+        self.processed += count
+        self.coalesced += count - len(events)
+        return list(events.values())
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            lag = time.time() - first.timestamp
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+            batch = self._take_batch(first)
+            self.batches += 1
+            try:
+                await self._apply_batch(batch)
+            except Exception as e:
+                print(f"❌ Erreur lors du traitement de l'XP: {e}")